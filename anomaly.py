@@ -0,0 +1,44 @@
+class AnomalyEngine:
+    """Rule engine anomali: hanya rule yang tersentuh perubahan state yang dievaluasi"""
+
+    def __init__(self, on_raise, on_clear):
+        self.on_raise = on_raise    # dipanggil (key, notifikasi) saat anomali baru muncul
+        self.on_clear = on_clear    # dipanggil (key, notifikasi) saat anomali hilang
+        self.watchers = {}          # event -> [(name, check, subjects)]
+        self.active = {}            # (rule, subject) -> notifikasi yang sedang aktif
+
+    def add_rule(self, name, watch, check, subjects=None):
+        """check(subject) -> dict notifikasi atau None; subjects() -> semua subject milik rule"""
+        for event in watch:
+            self.watchers.setdefault(event, []).append((name, check, subjects))
+
+    def changed(self, event, subject=None):
+        """Evaluasi rule yang memantau event ini. subject None = semua subject. True jika ada yang berubah"""
+        touched = False
+        for name, check, subjects in self.watchers.get(event, ()):
+            if subjects is None:
+                targets = (None,)
+            elif subject is None:
+                targets = subjects()
+            else:
+                targets = (subject,)
+            for target in targets:
+                touched |= self.evaluate(name, check, target)
+        return touched
+
+    def evaluate(self, name, check, target):
+        key = (name, target)
+        anomaly = check(target)
+        current = self.active.get(key)
+        if anomaly and current is None:
+            self.active[key] = anomaly
+            self.on_raise(key, anomaly)
+            return True
+        if not anomaly and current is not None:
+            del self.active[key]
+            self.on_clear(key, current)
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.active)
@@ -1,17 +1,58 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, abort, render_template, jsonify, make_response, request
 from datetime import datetime
-import json
+import collections
+import functools
+import itertools
 import os
+import time
+import uuid
+import atexit
 import paho.mqtt.client as mqtt 
+from mqtt_connection import MqttConnection
+from topic_router import TopicRouter
+from anomaly import AnomalyEngine
+from journal import Journal
+from houses import House, HouseRegistry
+from commands import CommandPublisher
+from ingest import IngestQueue
+from notifications import NotificationCenter
+from cluster import ChangeFollower, ChangeLog, LeaderLock
+from scheduler import Scheduler
+from timeseries import parse_time
+from ringbuffer import RingBuffer
+from occupancy import OccupancyAggregator
+from metrics import Registry, instrument, timed
+from applog import setup_logging
+from http_cache import EncodedBody
 
-BROKER = '192.168.0.100'
-PORT = 1883
+startup_started = time.perf_counter()
+
+BROKER = '192.168.0.100'  # default, bisa diganti lewat env MQTT_BROKER
+MQTT_ENABLED = os.environ.get('MQTT_ENABLED', '1') != '0'
+# thread = loop paho sendiri (app.run); asyncio = dijalankan bridge di event loop asgi.py
+MQTT_LOOP = os.environ.get('MQTT_LOOP', 'thread')
+DEBUG = os.environ.get('FLASK_DEBUG', '1') != '0'
 app = Flask(__name__)
+startup_timing = {}
+
+# Log operasional lewat antrian; thread MQTT tidak pernah menunggu stdout (LOG_RATE=0: tanpa rate limit)
+logger, log_stats = setup_logging('smarthome', os.environ.get('LOG_LEVEL', 'INFO'),
+                                  rate=int(os.environ.get('LOG_RATE', 20)))
+PIR_LOG_SAMPLE = int(os.environ.get('PIR_LOG_SAMPLE', 100))
+
+# Metrik operasional di /metrics (format teks Prometheus, tanpa layanan eksternal)
+registry = Registry()
+instrument(app, registry)
+CALLBACK_LATENCY = registry.histogram('callback_duration_seconds', 'Latensi callback hot path', ('callback',))
+MQTT_IN = registry.counter('mqtt_messages_received_total', 'Pesan MQTT masuk per kelas topik', ('kind',))
+MQTT_OUT = registry.counter('mqtt_messages_published_total', 'Pesan MQTT lock yang dipublish', ('kind',))
+MQTT_SUBSCRIBE_LATENCY = registry.histogram(
+    'mqtt_subscribed_seconds', 'Sampai semua topik ter-subscribe: dari CONNACK (connack) atau dari putus (reconnect)',
+    ('since',), buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
 
-# Data storage (dalam production gunakan database)
-house_data = {
+# Template data per rumah (setiap rumah dapat salinan sendiri)
+HOUSE_TEMPLATE = {
     'status': 'kosong',  # kosong or berpenghuni
-    'mqtt_connected': False,
     'rooms': {
         'kamar1': {'name': 'Kamar 1', 'light': False, 'occupied': False},
         'kamar2': {'name': 'Kamar 2', 'light': False, 'occupied': False},
@@ -26,328 +67,1171 @@ house_data = {
         'kulkas': {'name': 'Kulkas', 'status': False, 'icon': '❄️'},
     },
     'notifications': [],
-    'logs': [],
     'notification_sound_active': None  # Track which sound is playing
 }
 
-rooms = list(house_data['rooms'].keys())
+# Flag panas per section, disimpan ringkas di SlotTable (metadata nama/ikon terpisah)
+HOT_FIELDS = {'rooms': ('light', 'occupied'), 'devices': ('status',)}
+
+# Analitik hunian (/api/presence/...): jendela default query
+PRESENCE_WINDOW = 24 * 3600
+HEATMAP_WINDOW = 28 * 24 * 3600
+PRESENCE_MAX_POINTS = 2000
+WEEKDAYS = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+
+# Notifikasi: ID naik terus (/api/notifications?since=), pesan/anomali yang sama dalam
+# NOTIFY_MIN_INTERVAL detik tidak dikirim ulang
+NOTIFY_CAPACITY = 10
+NOTIFY_MIN_INTERVAL = float(os.environ.get('NOTIFY_MIN_INTERVAL', 30))
+
+# Log aktivitas: ring buffer dengan seq untuk fetch incremental (/api/logs?since=)
+LOG_CAPACITY = int(os.environ.get('LOG_CAPACITY', 5000))
+LOG_PAGE = 100
+
+rooms = list(HOUSE_TEMPLATE['rooms'].keys())
 index_ruangcuci = rooms.index('ruang_cuci')
 rooms[index_ruangcuci] = 'jemuran'
-devices = list(house_data['devices'].keys())
+devices = list(HOUSE_TEMPLATE['devices'].keys())
 devices.append('lampu')  # Tambah lampu sebagai device untuk monitoring
-lock_topic = "smarthome/lock"
-presence = {room: 0 for room in rooms}
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        house_data['mqtt_connected'] = True
-        print("Connected with result code", rc)
+mqtt_state = {'connected': False}
 
-        # Subscribe PIR
-        for room in rooms:
-            client.subscribe(f"smarthome/deteksi/{room}")
+# Multi rumah: HOUSES=id1,id2,... Rumah default tetap di namespace topik lama smarthome/...,
+# rumah lain di smarthome/<house_id>/...
+DEFAULT_HOUSE = os.environ.get('DEFAULT_HOUSE', 'utama')
+HOUSE_IDS = [h for h in os.environ.get('HOUSES', '').split(',') if h and h != DEFAULT_HOUSE]
+RESERVED_IDS = set(rooms) | {'deteksi', 'lock'}
+
+# Lock rumah: debounce/hold (ms) supaya kedip PIR tidak membuat lock naik-turun
+LOCK_DEBOUNCE = int(os.environ.get('LOCK_DEBOUNCE_MS', 0)) / 1000
+LOCK_HOLD = int(os.environ.get('LOCK_HOLD_MS', 0)) / 1000
+
+# Versi state: naik setiap ada mutasi (next() pada count atomik di CPython). Counter ini
+# per proses, jadi boot_id di ETag harus unik per proses (worker yang start di detik yang
+# sama atau hasil fork dari app yang di-preload tidak boleh berbagi ETag)
+def new_boot_id():
+    global boot_id
+    boot_id = f'{os.getpid():x}-{uuid.uuid4().hex[:12]}'
+
+new_boot_id()
+os.register_at_fork(after_in_child=new_boot_id)
+version_counter = itertools.count(1)
+
+# Journal state di disk per rumah (JOURNAL_DIR kosong = nonaktif)
+JOURNAL_DIR = os.environ.get('JOURNAL_DIR', 'data')
+PERSISTED_EVENTS = ('rooms', 'devices', 'status', 'log')
+
+# Beberapa proses worker (mis. CLUSTER_DIR=/dev/shm/smarthome gunicorn -w 4 app:app, tanpa
+# --preload): perubahan state disebar lewat log perubahan bersama di CLUSTER_DIR, dan hanya
+# satu worker (leader) yang memegang koneksi MQTT, publisher perintah dan journal
+CLUSTER_DIR = os.environ.get('CLUSTER_DIR', '')
+CLUSTER_POLL = int(os.environ.get('CLUSTER_POLL_MS', 20)) / 1000
+CLUSTER_MAX_BYTES = int(os.environ.get('CLUSTER_MAX_BYTES', 8 << 20))
+role = {'leader': True, 'worker': os.getpid()}
+# Dipanggil (dari thread follower) saat worker naik jadi leader; asgi.py mendaftarkan
+# start bridge MQTT asyncio di sini karena loop-nya milik server ASGI
+leader_hooks = []
+changes = leader_lock = follower = None
+anomaly_outbox = collections.deque()   # (house, op, data) anomali leader yang belum dipublish
+
+# Otomasi (hanya dieksekusi leader, mati kalau 0/kosong): lampu ruangan mati N menit setelah
+# PIR 0, perangkat diputus setelah menyala terlalu lama, scene harian mis. DAILY_SCENES="23:30=lampu_mati"
+LIGHT_AUTO_OFF = float(os.environ.get('LIGHT_AUTO_OFF_MIN', 0)) * 60
+DEVICE_MAX_ON = {'kompor': float(os.environ.get('KOMPOR_MAX_HOURS', 0)) * 3600}
+DAILY_SCENES = os.environ.get('DAILY_SCENES', '')
+scheduler = Scheduler(logger=logger)
+
+def house_snapshot(house):
+    """State rumah untuk snapshot cluster (tanpa riwayat hunian yang besar)"""
+    return {
+        'status': house.state.view('status'),
+        'rooms': house.state.view('rooms'),
+        'devices': house.state.view('devices'),
+        'logs': house.logs.latest(LOG_CAPACITY),
+    }
 
-        # Subscribe monitoring device
+def journal_snapshot(house):
+    """State yang disimpan saat kompaksi journal, termasuk riwayat hunian (/api/presence)"""
+    return dict(house_snapshot(house), presence=house.presence.dump())
+
+def notify_change(house, event, data):
+    """Naikkan versi state rumah, push ke dashboard di /api/stream dan catat ke journal"""
+    house.version = next(version_counter)
+    house.broker.publish(event, data)
+    if house.journal is not None and role['leader'] and event in PERSISTED_EVENTS:
+        house.journal.append(event, data)
+
+def publish_change(house, op, data):
+    """Tulis record ke log perubahan cluster; semua worker (termasuk ini) menerapkannya"""
+    changes.append({'w': role['worker'], 'h': house.id if house is not None else None, 'op': op, 'd': data})
+
+def publish_flag(house, section, item_id, field, value):
+    """Observer SlotTable: item_id None = fill"""
+    publish_change(house, 'flag', [section, item_id, field, value])
+
+def status_payload(house, house_data=None):
+    """Ringkasan status rumah (dipakai /api/status dan /api/stream)"""
+    if house_data is None:
+        # Hitung langsung dari kolom SlotTable tanpa membangun view
+        status = house.state.view('status')
+        rooms_data, devices_data = house.state.table('rooms'), house.state.table('devices')
+    else:
+        # Hitungan dibawa view dari versi yang sama, jadi selalu cocok dengan isi snapshot
+        status = house_data['status']
+        rooms_data, devices_data = house_data['rooms'], house_data['devices']
+    return {
+        'house_id': house.id,
+        'status': status,
+        'mqtt_connected': mqtt_state['connected'],
+        'room_count': len(rooms_data),
+        'active_lights': rooms_data.count('light'),
+        'active_devices': devices_data.count('status'),
+    }
+
+def notify_state(house, section=None, item_ids=None):
+    """Push flag item rooms/devices yang berubah ({id: {flag: bool}}) beserta status terbaru
+
+    Dashboard menggabungkan delta ke state-nya; item_ids None = semua item section.
+    """
+    if section is not None:
+        delta = house.state.table(section).rows(item_ids)
+        if delta:
+            notify_change(house, section, delta)
+    notify_change(house, 'status', status_payload(house))
+
+def handle_presence(client, payload, house, room, slot):
+    """Handler topik PIR <prefix>/deteksi/<room>"""
+    MQTT_IN.inc('presence')
+    logger.debug("PIR [%s] %s: %s", house.id, room, payload, extra={'sample': PIR_LOG_SAMPLE})
+    # Hitungan ruangan terisi berjalan; lock hanya dipublish saat hunian rumah berubah
+    house_changed = house.occupancy.set(room, payload)
+    if house_changed:
+        set_status(house, 'berpenghuni' if house.occupancy.occupied else 'kosong')
+    with house.state.write('rooms') as rooms_data:
+        changed = rooms_data.set(slot, 'occupied', int(payload))
+    # PIR mengirim nilai yang sama berulang-ulang: tanpa perubahan tidak ada push/journal
+    if changed:
+        room_occupancy_changed(house, slot, int(payload))
+    if changed:
+        notify_state(house, 'rooms', [slot])
+    elif house_changed:
+        notify_state(house)
+    if house_changed:
+        check_anomalies(house, 'house')
+
+def handle_light(client, payload, house, slot):
+    """Handler topik monitoring lampu <prefix>/<room>/lampu"""
+    MQTT_IN.inc('light')
+    with house.state.write('rooms') as rooms_data:
+        changed = rooms_data.set(slot, 'light', payload == 'lampu/nyala')
+    if changed:
+        notify_state(house, 'rooms', [slot])
+        check_anomalies(house, 'light', slot)
+
+def handle_device(client, payload, house, dev, on_payload):
+    """Handler topik monitoring device <prefix>/<room>/<dev>"""
+    MQTT_IN.inc('device')
+    with house.state.write('devices') as devices_data:
+        changed = devices_data.set(dev, 'status', payload == on_payload)
+    if changed:
+        arm_device_timer(house, dev, payload == on_payload)
+        notify_state(house, 'devices', [dev])
+        check_anomalies(house, 'device', dev)
+
+def build_topic_router():
+    """Bangun tabel topik -> handler semua rumah sekali saja (rename jemuran/pompa sudah di sini)"""
+    router = TopicRouter()
+    for house in houses:
+        prefix = house.topic_prefix
         for room in rooms:
+            slot = 'ruang_cuci' if room == 'jemuran' else room
+            router.add(f"{prefix}/deteksi/{room}", handle_presence, house, room, slot)
+        for room in rooms:
+            slot = 'ruang_cuci' if room == 'jemuran' else room
             for dev in devices:
-                if dev == 'pompa_air':
-                    dev = 'pompa'
-                client.subscribe(f"smarthome/{room}/{dev}")
-        add_log('MQTT', 'Terhubung ke broker MQTT')
+                topic_dev = 'pompa' if dev == 'pompa_air' else dev
+                topic = f"{prefix}/{room}/{topic_dev}"
+                if dev == 'lampu':
+                    router.add(topic, handle_light, house, slot)
+                else:
+                    router.add(topic, handle_device, house, dev, f'{topic_dev}/nyala')
+    return router
+
+topic_router = TopicRouter()
+
+def set_mqtt_connected(connected):
+    mqtt_state['connected'] = connected
+    for house in houses:
+        notify_change(house, 'status', status_payload(house))
+    if changes is not None and role['leader']:
+        publish_change(None, 'mqtt', connected)
+
+def on_connect(client, userdata, flags, rc):
+    global topic_router
+    if rc == 0:
+        set_mqtt_connected(True)
+        logger.info("Connected with result code %s", rc)
+        connect_ms = mqtt_connection.mark_connected()
+        if connect_ms is not None:
+            startup_timing['mqtt_connect_ms'] = round(connect_ms, 1)
+            logger.info("MQTT terhubung %.0f ms setelah start", connect_ms)
+
+        # Wildcard per prefix rumah (smarthome/+/+, smarthome/<house_id>/+/+) dalam satu
+        # paket SUBSCRIBE; topik yang tidak ada di tabel routing dibuang lokal
+        topic_router = build_topic_router()
+        mqtt_connection.subscribe(topic_router.wildcards())
+        for house in houses:
+            # Lock retained di broker bisa basi selama terputus
+            update_global_lock(house, house.occupancy.published)
+            add_log(house, 'MQTT', 'Terhubung ke broker MQTT')
     else:
-        print("Failed to connect, return code %d\n", rc)
-        house_data['mqtt_connected'] = False
+        logger.error("Failed to connect, return code %d", rc)
+        set_mqtt_connected(False)
 
-    print("Subscribed to all topics!")
+def on_subscribe(client, userdata, mid, granted_qos):
+    reconnecting = mqtt_connection.disconnected_at is not None
+    if mqtt_connection.mark_subscribed(mid):
+        logger.info("Subscribed to all topics! (%s ms setelah CONNACK)", mqtt_connection.subscribe_ms)
+        MQTT_SUBSCRIBE_LATENCY.observe(mqtt_connection.subscribe_ms / 1000, 'connack')
+        if reconnecting:
+            MQTT_SUBSCRIBE_LATENCY.observe(mqtt_connection.reconnect_ms / 1000, 'reconnect')
+
+@timed(CALLBACK_LATENCY, 'on_message')
 def on_message(client, userdata, msg):
-    topic = msg.topic
-    payload = msg.payload.decode()
-
-    # Handle PIR
-    for room in rooms:
-        if topic == f"smarthome/deteksi/{room}":
-            presence[room] = int(payload)
-            update_global_lock(client)
-            if any(presence.values()):
-                house_data['status'] = 'berpenghuni'
-            else:
-                house_data['status'] = 'kosong'
-            if room == 'jemuran':
-                room = 'ruang_cuci'
-                house_data['rooms'][room]['occupied'] = int(payload)
-            else:
-                house_data['rooms'][room]['occupied'] = int(payload)
-            return
-    for room in rooms:
-        for dev in devices:
-            if dev == 'pompa_air':
-                dev = 'pompa'
-            if topic == f"smarthome/{room}/{dev}":
-                if dev == 'lampu':
-                    light_status = 1 if payload == 'lampu/nyala' else 0
-                    if room == 'jemuran':
-                        room = 'ruang_cuci'
-                        house_data['rooms'][room]['light'] = light_status
-                    else:
-                        house_data['rooms'][room]['light'] = light_status
-                else:
-                    dev_status = 1 if payload == f'{dev}/nyala' else 0
-                    dev = 'pompa_air' if dev == 'pompa' else dev
-                    house_data['devices'][dev]['status'] = dev_status
-                return
-    
-def update_global_lock(client):
-    if any(presence.values()):
-        client.publish(lock_topic, "1")
-        print("⚠ LOCK AKTIF (Ada orang!)")
+    """Callback paho: hanya lookup topik lalu titip ke antrian ingest (worker yang menerapkan)"""
+    if ingest_queue is None:
+        apply_message(msg.topic, client, msg.payload.decode())
+    elif msg.topic in topic_router:
+        ingest_queue.put(msg.topic, client, msg.payload.decode())
     else:
-        client.publish(lock_topic, "0")
-        print("✔ LOCK NON-AKTIF (Rumah kosong)")
+        # Topik tak dikenal dibuang di sini supaya tidak memakan kapasitas antrian
+        topic_router.misses += 1
+        MQTT_IN.inc('unrouted')
+
+@timed(CALLBACK_LATENCY, 'ingest_apply')
+def apply_message(topic, client, payload):
+    if not topic_router.dispatch(topic, client, payload):
+        MQTT_IN.inc('unrouted')
 
-def send_command(client, room, device, state):
-    if room not in rooms:
-        print(f"Ruangan '{room}' tidak dikenali!")
-        return
 
-    if device not in devices:
-        print(f"Device '{device}' tidak dikenali!")
+def update_global_lock(house, occupied):
+    """Publish lock (retained) hanya saat hunian berubah; dipanggil OccupancyAggregator"""
+    if not mqtt_state['connected']:
+        return  # dikirim ulang dari on_connect
+    MQTT_OUT.inc('lock')
+    if occupied:
+        client.publish(house.lock_topic, "1", qos=1, retain=True)
+        logger.info("⚠ LOCK AKTIF [%s] (Ada orang!)", house.id)
+    else:
+        client.publish(house.lock_topic, "0", qos=1, retain=True)
+        logger.info("✔ LOCK NON-AKTIF [%s] (Rumah kosong)", house.id)
+
+@timed(CALLBACK_LATENCY, 'send_command')
+def send_command(house, room, device, state):
+    """Antrikan perintah ke publisher (request langsung kembali, publish di thread sendiri)"""
+    topic = house.command_topics.get((room, device))
+    if topic is None:
+        logger.warning("Ruangan/device '%s/%s' tidak dikenali!", room, device)
         return
 
     if state not in ["on", "off"]:
-        print("Gunakan 'on' atau 'off'")
+        logger.warning("Gunakan 'on' atau 'off'")
         return
 
-    val = "1" if state == "on" else "0"
-    if device == 'pompa_air':
-        device = 'pompa'
-        topic = f"smarthome/{room}/{device}/perintah"
+    payload = "1" if state == "on" else "0"
+    if role['leader']:
+        command_publisher.enqueue(topic, payload)
     else:
-        topic = f"smarthome/{room}/{devices[devices.index(device)]}/perintah"
+        # Hanya leader yang terhubung ke broker
+        publish_change(house, 'command', [topic, payload])
 
-    print(f"Mengirim ke [{topic}] → {val}")
-    client.publish(topic, val)
+def on_disconnect(client, userdata, rc):
+    mqtt_connection.mark_disconnected()
+    set_mqtt_connected(False)
+    if rc != 0:
+        # Loop paho reconnect sendiri dengan backoff (reconnect_delay_set)
+        logger.warning("MQTT terputus, mencoba reconnect...")
 
 client = mqtt.Client()
 client.on_connect = on_connect
 client.on_message = on_message
+client.on_disconnect = on_disconnect
+client.on_subscribe = on_subscribe
+client.on_publish = lambda client, userdata, mid: command_publisher.acked(mid)
+# Batas pesan QoS 1 yang menunggu di dalam paho (mis. lock retained saat koneksi baru putus)
+client.max_queued_messages_set(int(os.environ.get('MQTT_MAX_QUEUED', 100)))
+mqtt_connection = MqttConnection.from_env(client, BROKER)
+command_publisher = CommandPublisher(client, int(os.environ.get('COMMAND_WINDOW_MS', 20)) / 1000)
+# INGEST_QUEUE=0: terapkan langsung di callback paho seperti dulu
+INGEST_CAPACITY = int(os.environ.get('INGEST_QUEUE', 4096))
+ingest_queue = IngestQueue(apply_message, INGEST_CAPACITY, logger) if INGEST_CAPACITY > 0 else None
+
+def apply_record(house, op, data):
+    """Terapkan satu record journal/snapshot ke data rumah (idempotent)"""
+    if op in ('rooms', 'devices'):
+        table = house.state.table(op)
+        for item_id, values in data.items():
+            if item_id in table:
+                table.update(item_id, values, observe=False)
+    elif op == 'status':
+        house.state.set('status', data['status'])
+    elif op == 'presence':
+        room_id, occupied, t = data
+        if room_id in house.presence.rooms:
+            house.presence.record(room_id, occupied, now=t)
+    elif op == 'log':
+        # Snapshot kompaksi bisa sudah memuat entri yang record-nya masih di antrian journal
+        if data['seq'] > house.logs.last_seq:
+            house.logs.append(data, seq=data['seq'])
+
+def restore_state(house):
+    """Rebuild data rumah dari snapshot terakhir lalu replay sisa journal"""
+    start = time.perf_counter()
+    journal = house.journal
+    snapshot, records = journal.load()
+    if snapshot is not None:
+        load_house_state(house, snapshot['state'])
+    for record in records:
+        apply_record(house, record['op'], record['data'])
+
+    reset_occupancy(house)
+    journal.start()
+    atexit.register(journal.stop)
+    logger.info("State [%s] dipulihkan dalam %.1f ms (snapshot: %s, %d record journal)",
+                house.id, (time.perf_counter() - start) * 1000, 'ya' if snapshot else 'tidak', len(records))
+
+def load_house_state(house, state):
+    """Terapkan snapshot state rumah (format journal_snapshot/house_snapshot)"""
+    apply_record(house, 'status', state)
+    apply_record(house, 'rooms', state['rooms'])
+    apply_record(house, 'devices', state['devices'])
+    for entry in state['logs']:
+        apply_record(house, 'log', entry)
+    if 'presence' in state:
+        house.presence.load(state['presence'])
+
+def reset_occupancy(house):
+    """Samakan agregator hunian dengan flag occupied saat ini"""
+    rooms_data = house.state.table('rooms')
+    house.occupancy.reset({room: rooms_data.get('ruang_cuci' if room == 'jemuran' else room, 'occupied')
+                           for room in rooms})
 
-client.connect(BROKER, PORT, 60)
-client.loop_start()
-def add_log(action, details):
+def resume_journal(house):
+    """Leader pengganti: state sudah terkini dari log perubahan, journal cukup dilanjutkan"""
+    house.journal.load()
+    house.journal.start()
+    atexit.register(house.journal.stop)
+
+def set_status(house, status):
+    house.state.set('status', status)
+    if changes is not None:
+        publish_change(house, 'status', status)
+
+def add_log(house, action, details):
     """Tambah log aktivitas"""
     log_entry = {
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'action': action,
         'details': details
     }
-    house_data['logs'].append(log_entry)
-    if len(house_data['logs']) > 100:  # Keep only last 100 logs
-        house_data['logs'] = house_data['logs'][-100:]
+    if changes is not None:
+        # seq ditentukan saat diterapkan, supaya urutannya sama di semua worker
+        publish_change(house, 'log', log_entry)
+    else:
+        append_log(house, log_entry)
 
-def check_anomalies():
-    """Check for anomalies and add notifications"""
-    house_data['notifications'] = []
-    
-    # Check for lights on when house is empty
-    if not house_data['status'] == 'berpenghuni':
-        for room_id, room_data in house_data['rooms'].items():
-            if room_data['light']:
-                house_data['notifications'].append({
-                    'id': len(house_data['notifications']) + 1,
-                    'timestamp': datetime.now().strftime('%H:%M:%S'),
-                    'type': 'warning',
-                    'message': f'💡 Lampu di {room_data["name"]} masih nyala padahal rumah kosong!',
-                    'sound_type': 'light'
-                })
-    
-    # Check for devices on when house is empty
-    if not house_data['status'] == 'berpenghuni':
-        for device_id, device_data in house_data['devices'].items():
-            if device_data['status']:
-                house_data['notifications'].append({
-                    'id': len(house_data['notifications']) + 1,
-                    'timestamp': datetime.now().strftime('%H:%M:%S'),
-                    'type': 'danger',
-                    'message': f'⚙️ {device_data["name"]} masih aktif padahal rumah kosong!',
-                    'sound_type': 'device'
-                })
-
-def add_notification(type, message, sound_type=None):
-    """Tambah notifikasi"""
+def append_log(house, log_entry):
+    log_entry['seq'] = house.logs.append(log_entry)
+    notify_change(house, 'log', log_entry)
+
+def rule_light_on_empty(house, room_id):
+    """Lampu menyala padahal rumah kosong"""
+    rooms_data = house.state.table('rooms')
+    if house.state.view('status') != 'berpenghuni' and rooms_data.get(room_id, 'light'):
+        return {
+            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'type': 'warning',
+            'message': f'💡 Lampu di {rooms_data.meta(room_id)["name"]} masih nyala padahal rumah kosong!',
+            'sound_type': 'light'
+        }
+
+def rule_device_on_empty(house, device_id):
+    """Perangkat aktif padahal rumah kosong"""
+    devices_data = house.state.table('devices')
+    if house.state.view('status') != 'berpenghuni' and devices_data.get(device_id, 'status'):
+        return {
+            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'type': 'danger',
+            'message': f'⚙️ {devices_data.meta(device_id)["name"]} masih aktif padahal rumah kosong!',
+            'sound_type': 'device'
+        }
+
+def on_anomaly_raise(house, key, notification):
+    key = f'{key[0]}:{key[1]}'
+    if changes is None:
+        raise_notification(house, key, notification)
+    elif role['leader']:
+        # Cluster: hanya leader yang mengumumkan, lewat log perubahan supaya ID sama di semua
+        # worker. Dipublish dari thread follower, bukan di bawah anomaly_lock
+        notification['time'] = time.time()
+        anomaly_outbox.append((house, 'anomaly', [key, notification]))
+
+def on_anomaly_clear(house, key, notification):
+    key = f'{key[0]}:{key[1]}'
+    if changes is None:
+        resolve_notification(house, key)
+    elif role['leader']:
+        anomaly_outbox.append((house, 'anomaly_clear', key))
+
+def raise_notification(house, key, notification):
+    # Tampil terus sampai kondisinya hilang; anomali yang berkedip tidak dapat ID baru
+    house.notices.post(key, notification, sticky=True, now=notification.get('time'))
+    house.state.set('notifications', house.notices.visible())
+
+def resolve_notification(house, key):
+    house.notices.resolve(key)
+    house.state.set('notifications', house.notices.visible())
+
+@timed(CALLBACK_LATENCY, 'check_anomalies')
+def check_anomalies(house, event, subject=None):
+    """Evaluasi hanya rule anomali yang tersentuh perubahan (light/device/house)"""
+    with house.anomaly_lock:
+        changed = house.anomalies.changed(event, subject)
+    # Cluster: push terjadi saat record anomaly diterapkan
+    if changed and changes is None:
+        notify_change(house, 'notifications', house.state.view('notifications'))
+
+def add_notification(house, type, message, sound_type=None, key=None):
+    """Tambah notifikasi; key dedup default isi pesan (pesan sama tidak dikirim beruntun)"""
     notification = {
-        'id': len(house_data['notifications']) + 1,
         'timestamp': datetime.now().strftime('%H:%M:%S'),
         'type': type,  # warning, info, danger
         'message': message,
-        'sound_type': sound_type
+        'sound_type': sound_type,
+        'key': key or message,
+        'time': time.time(),
+    }
+    if changes is not None:
+        publish_change(house, 'notification', notification)
+    else:
+        append_notification(house, notification)
+
+def append_notification(house, notification):
+    key = notification.get('key') or notification['message']
+    if house.notices.post(key, notification, now=notification.get('time')) is None:
+        return   # duplikat, atau rate limit untuk notifikasi yang sudah tidak tampil
+    # Notifikasi baru atau hitungan (count) yang naik; dashboard hanya berbunyi untuk ID baru
+    house.state.set('notifications', house.notices.visible())
+    notify_change(house, 'notifications', house.state.view('notifications'))
+
+def reset_notifications(house):
+    # Anomali yang masih aktif tetap tampil sampai kondisinya hilang
+    house.notices.clear()
+    house.state.set('notifications', house.notices.visible())
+    notify_change(house, 'notifications', house.state.view('notifications'))
+
+def create_house(house_id, topic_prefix):
+    """Buat state rumah baru lengkap dengan rule anomali dan journal-nya"""
+    if house_id in RESERVED_IDS:
+        raise ValueError(f"house_id '{house_id}' bentrok dengan nama topik")
+    house = House(house_id, HOUSE_TEMPLATE, topic_prefix, LOG_CAPACITY, HOT_FIELDS)
+    house.occupancy = OccupancyAggregator(functools.partial(update_global_lock, house), rooms,
+                                          LOCK_DEBOUNCE, LOCK_HOLD)
+    house.command_topics = {
+        (room, dev): f"{topic_prefix}/{room}/{'pompa' if dev == 'pompa_air' else dev}/perintah"
+        for room in rooms for dev in devices
     }
-    house_data['notifications'].append(notification)
-    if len(house_data['notifications']) > 10:
-        house_data['notifications'] = house_data['notifications'][-10:]
+    # Notifikasi tidak disimpan di journal: ID mulai dari jam (ms) supaya tetap naik setelah restart
+    house.notices = NotificationCenter(NOTIFY_CAPACITY, min_interval=NOTIFY_MIN_INTERVAL,
+                                       first_id=int(time.time() * 1000))
+    house.anomalies = AnomalyEngine(functools.partial(on_anomaly_raise, house),
+                                    functools.partial(on_anomaly_clear, house))
+    house.anomalies.add_rule('light_on_empty', ('light', 'house'),
+                             functools.partial(rule_light_on_empty, house), lambda: house.state.table('rooms'))
+    house.anomalies.add_rule('device_on_empty', ('device', 'house'),
+                             functools.partial(rule_device_on_empty, house), lambda: house.state.table('devices'))
+    if JOURNAL_DIR:
+        house.journal = Journal(os.path.join(JOURNAL_DIR, house_id),
+                                functools.partial(journal_snapshot, house))
+    return house
+
+houses = HouseRegistry(DEFAULT_HOUSE)
+houses.add(create_house(DEFAULT_HOUSE, 'smarthome'))
+for house_id in HOUSE_IDS:
+    houses.add(create_house(house_id, f'smarthome/{house_id}'))
+
+registry.gauge('house_log_entries', 'Jumlah entri di ring buffer log', ('house',),
+               lambda: {house.id: len(house.logs) for house in houses})
+registry.gauge('house_notifications', 'Jumlah notifikasi aktif', ('house',),
+               lambda: {house.id: len(house.state.view('notifications')) for house in houses})
+registry.counter('notifications_total', 'Notifikasi per hasil (sent/deduplicated/rate_limited/resolved)',
+                 ('house', 'result'),
+                 lambda: {(house.id, result): n for house in houses for result, n in house.notices.stats.items()})
+registry.gauge('house_state_version', 'Versi state terakhir', ('house',),
+               lambda: {house.id: house.version for house in houses})
+registry.gauge('house_stream_clients', 'Klien SSE yang terhubung', ('house',),
+               lambda: {house.id: len(house.broker.subscribers) for house in houses})
+registry.gauge('mqtt_connected', 'Status koneksi broker (1 = terhubung)',
+               fn=lambda: int(mqtt_state['connected']))
+registry.counter('mqtt_commands_total', 'Perintah device per tahap (queued/coalesced/published/acked/failed/dropped)',
+                 ('result',), lambda: dict(command_publisher.stats))
+registry.counter('log_records_total', 'Record log per hasil (enqueued/dropped/rate_limited/sampled_out)',
+                 ('result',), lambda: dict(log_stats))
+registry.gauge('mqtt_commands_inflight', 'Perintah QoS 1 yang belum di-PUBACK',
+               fn=lambda: len(command_publisher.inflight))
+registry.gauge('automation_timers_pending', 'Timer otomasi yang menunggu (auto-off, scene harian)',
+               fn=lambda: len(scheduler))
+registry.counter('automation_timers_total', 'Timer otomasi per hasil (scheduled/fired/cancelled/failed)',
+                 ('result',), lambda: dict(scheduler.stats))
+if CLUSTER_DIR:
+    registry.gauge('cluster_leader', 'Worker ini leader ingest MQTT (1) atau follower (0)',
+                   fn=lambda: int(role['leader']))
+    registry.counter('cluster_records_total', 'Record log perubahan cluster per hasil (applied/failed/rotations)',
+                     ('result',), lambda: dict(follower.stats) if follower is not None else {})
+if ingest_queue is not None:
+    registry.counter('mqtt_ingest_total', 'Pesan antrian ingest per hasil (received/coalesced/dropped/applied/failed)',
+                     ('result',), lambda: dict(ingest_queue.stats))
+    registry.gauge('mqtt_ingest_queue_depth', 'Topik yang menunggu diterapkan worker ingest',
+                   fn=lambda: len(ingest_queue))
+    registry.gauge('mqtt_ingest_queue_high_water', 'Kedalaman antrian ingest tertinggi sejak start',
+                   fn=lambda: ingest_queue.high_water)
+
+def get_house(house_id):
+    """Rumah dari URL; None = rumah default. 404 JSON kalau tidak dikenal"""
+    house = houses.get(house_id)
+    if house is None:
+        abort(make_response(jsonify({'error': 'House not found'}), 404))
+    return house
+
+def house_route(rule, **options):
+    """Daftarkan route untuk rumah default (/api/...) dan per rumah (/api/houses/<house_id>/...)"""
+    def decorator(view):
+        app.add_url_rule(rule, view_func=view, defaults={'house_id': None}, **options)
+        app.add_url_rule(rule.replace('/api/', '/api/houses/<house_id>/', 1), view_func=view, **options)
+        return view
+    return decorator
 
 @app.route('/')
 def index():
     """Render halaman utama"""
-    return render_template('index.html')
+    return render_template('index.html', api_base='/api')
+
+@app.route('/houses/<house_id>')
+def house_index(house_id):
+    """Dashboard untuk satu rumah"""
+    house = get_house(house_id)
+    return render_template('index.html', api_base=f'/api/houses/{house.id}')
 
-@app.route('/api/status')
-def get_status():
+@app.route('/api/houses')
+def get_houses():
+    """Daftar rumah yang dikelola"""
+    return jsonify([{'house_id': house.id, 'topic_prefix': house.topic_prefix,
+                     'status': house.state.view('status')} for house in houses])
+
+@house_route('/api/status')
+def get_status(house_id):
     """Get status rumah"""
-    check_anomalies()
-    return jsonify({
-        'status': house_data['status'],
-        'mqtt_connected': house_data['mqtt_connected'],
-        'room_count': len(house_data['rooms']),
-        'active_lights': sum(1 for r in house_data['rooms'].values() if r['light']),
-        'active_devices': sum(1 for d in house_data['devices'].values() if d['status']),
-    })
+    return jsonify(status_payload(get_house(house_id)))
+
+def section_body(house, section):
+    """Body rooms/devices yang sudah di-encode, dibangun ulang hanya saat table berubah"""
+    table = house.state.table(section)
+    version = table.version
+    cached = house.section_cache.get(section)
+    if cached is None or cached[0] != version:
+        cached = (version, EncodedBody(None, f'"{boot_id}-{house.id}-{section}-{version}"', raw=table.encode()))
+        house.section_cache[section] = cached
+    return cached[1]
 
-@app.route('/api/rooms')
-def get_rooms():
+def meta_body(house):
+    """Metadata statis (nama, ikon) dan urutan flag untuk /api/state; di-encode sekali"""
+    if house.meta_body is None:
+        tables = {section: house.state.table(section) for section in HOT_FIELDS}
+        house.meta_body = EncodedBody({
+            'fields': {section: list(table.flags) for section, table in tables.items()},
+            **{section: table.metadata_view() for section, table in tables.items()},
+        })
+    return house.meta_body
+
+@house_route('/api/rooms')
+def get_rooms(house_id):
     """Get status semua ruangan"""
-    return jsonify(house_data['rooms'])
+    return section_body(get_house(house_id), 'rooms').response()
 
-@app.route('/api/devices')
-def get_devices():
+@house_route('/api/devices')
+def get_devices(house_id):
     """Get status semua perangkat"""
-    return jsonify(house_data['devices'])
+    return section_body(get_house(house_id), 'devices').response()
+
+@house_route('/api/meta')
+def get_meta(house_id):
+    """Metadata statis; dengan ?v=<hash> dari /api/state boleh di-cache selamanya"""
+    body = meta_body(get_house(house_id))
+    if request.args.get('v') == body.digest:
+        return body.response('public, max-age=31536000, immutable')
+    return body.response('public, max-age=300')
+
+@house_route('/api/state')
+def get_live_state(house_id):
+    """State live ringkas: flag 0/1 per id (urutan di /api/meta fields), tanpa nama/ikon"""
+    house = get_house(house_id)
+    version = house.version
+    etag = f'"{boot_id}-{house.id}-{version}-live"'
+    cached = house.live_cache
+    if cached is None or cached.etag != etag:
+        cached = EncodedBody({
+            'version': version,
+            'meta': meta_body(house).digest,
+            'status': house.state.view('status'),
+            'mqtt_connected': mqtt_state['connected'],
+            'rooms': house.state.table('rooms').live(),
+            'devices': house.state.table('devices').live(),
+        }, etag)
+        house.live_cache = cached
+    return cached.response()
+
+@house_route('/api/logs')
+def get_logs(house_id):
+    """Get activity logs (?since=<seq> hanya entri baru, ?limit=<n> default 100)"""
+    log_store = get_house(house_id).logs
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', type=int)
+    if since is not None:
+        return jsonify(log_store.since(since, limit))
+    return jsonify(log_store.latest(limit or LOG_PAGE))
+
+def presence_args(house, window):
+    """(from, to, ruangan) dari query string; 400 JSON kalau tidak valid"""
+    try:
+        t_to = parse_time(request.args.get('to'), time.time())
+        t_from = parse_time(request.args.get('from'), t_to - window)
+    except ValueError:
+        abort(make_response(jsonify({'error': 'Format waktu tidak valid'}), 400))
+    if t_from >= t_to:
+        abort(make_response(jsonify({'error': 'from harus lebih kecil dari to'}), 400))
+    # Di luar retensi tidak ada data; jangan sampai rentang raksasa dialokasikan per jam
+    t_from = min(max(t_from, house.presence.horizon()), t_to)
+    rooms_arg = request.args.get('room')
+    selected = rooms_arg.split(',') if rooms_arg else None
+    if selected and any(room not in house.presence.rooms for room in selected):
+        abort(make_response(jsonify({'error': 'Room not found'}), 404))
+    return t_from, t_to, selected
+
+def local_offset_hours():
+    """Selisih jam lokal server terhadap UTC (bucket hari/heatmap mengikuti jam lokal)"""
+    return round(datetime.now().astimezone().utcoffset().total_seconds() / 3600)
+
+@house_route('/api/presence/dwell')
+def get_presence_dwell(house_id):
+    """Detik terisi dan rasio hunian per ruangan (default 24 jam), ?by=hour|day untuk deret"""
+    house = get_house(house_id)
+    t_from, t_to, selected = presence_args(house, PRESENCE_WINDOW)
+    by = request.args.get('by')
+    if by not in (None, 'hour', 'day'):
+        return jsonify({'error': 'by harus hour atau day'}), 400
+    step = {'hour': 1, 'day': 24}.get(by)
+    if step and (t_to - t_from) / (step * 3600) > PRESENCE_MAX_POINTS:
+        return jsonify({'error': f'Maksimal {PRESENCE_MAX_POINTS} titik deret, perkecil rentang atau pakai by=day'}), 400
+    return jsonify({'from': t_from, 'to': t_to, 'by': by,
+                    'rooms': house.presence.dwell(t_from, t_to, selected, step, local_offset_hours())})
+
+@house_route('/api/presence/heatmap')
+def get_presence_heatmap(house_id):
+    """Rasio hunian hari (Senin..Minggu) x jam lokal, default 4 minggu terakhir"""
+    house = get_house(house_id)
+    t_from, t_to, selected = presence_args(house, HEATMAP_WINDOW)
+    rooms_grid, total = house.presence.heatmap(t_from, t_to, selected, local_offset_hours())
+    return jsonify({'from': t_from, 'to': t_to, 'days': WEEKDAYS, 'rooms': rooms_grid, 'all': total})
+
+@house_route('/api/presence/last-seen')
+def get_presence_last_seen(house_id):
+    """Per ruangan: sedang terisi, sejak kapan, dan terakhir terlihat"""
+    return jsonify(get_house(house_id).presence.last_seen())
 
-@app.route('/api/logs')
-def get_logs():
-    """Get activity logs"""
-    return jsonify(house_data['logs'])
+@house_route('/api/presence/intervals')
+def get_presence_intervals(house_id):
+    """Interval hunian mentah satu ruangan (?room=, untuk tagihan/audit), maks ?limit=1000"""
+    house = get_house(house_id)
+    t_from, t_to, selected = presence_args(house, PRESENCE_WINDOW)
+    if not selected or len(selected) != 1:
+        return jsonify({'error': 'Pilih satu ruangan dengan ?room='}), 400
+    limit = min(request.args.get('limit', 1000, type=int), 10000)
+    return jsonify({'room': selected[0], 'from': t_from, 'to': t_to,
+                    'intervals': house.presence.intervals(selected[0], t_from, t_to, limit)})
 
-@app.route('/api/notifications')
-def get_notifications():
-    """Get notifikasi"""
-    return jsonify(house_data['notifications'])
+@house_route('/api/notifications')
+def get_notifications(house_id):
+    """Notifikasi yang tampil, atau ?since=<id> hanya notifikasi baru (urut ID, ?limit=<n>)"""
+    house = get_house(house_id)
+    since = request.args.get('since', type=int)
+    if since is not None:
+        return jsonify(house.notices.since(since, request.args.get('limit', type=int)))
+    return jsonify(house.state.view('notifications'))
 
-@app.route('/api/room/<room_id>/toggle', methods=['POST'])
-def toggle_room_light(room_id):
+@app.route('/api/health')
+def get_health():
+    """Status koneksi MQTT dan waktu startup (ms)"""
+    return jsonify({
+        'mqtt_connected': mqtt_state['connected'],
+        'mqtt_broker': f'{mqtt_connection.host}:{mqtt_connection.port}',
+        'mqtt_connect_count': mqtt_connection.connect_count,
+        'mqtt_subscribe_ms': mqtt_connection.subscribe_ms,
+        'mqtt_reconnect_to_subscribed_ms': mqtt_connection.reconnect_ms,
+        'mqtt_unrouted_messages': topic_router.misses,
+        'commands': command_publisher.status(),
+        'automation': scheduler.status(),
+        'cluster': dict(follower.stats, worker=role['worker'], leader=role['leader'])
+                   if follower is not None else None,
+        'ingest': ingest_queue.status() if ingest_queue is not None else None,
+        'houses': len(houses),
+        'startup': startup_timing,
+    })
+
+@house_route('/api/snapshot')
+def get_snapshot(house_id):
+    """Seluruh state dalam satu response, di-cache per versi + ETag/304"""
+    house = get_house(house_id)
+    version = house.version
+    etag = f'"{boot_id}-{house.id}-{version}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+
+    cached = house.snapshot_cache
+    if cached is None or cached.etag != etag:
+        house_data = house.state.snapshot()
+        cached = EncodedBody({
+            'version': version,
+            'status': status_payload(house, house_data),
+            'rooms': house_data['rooms'],
+            'devices': house_data['devices'],
+            'notifications': house_data['notifications'],
+            'logs': house.logs.latest(LOG_PAGE),
+        }, etag)
+        house.snapshot_cache = cached
+    return cached.response()
+
+def stream_initial(house):
+    """Event 'snapshot' pertama untuk klien SSE (Flask maupun ASGI)"""
+    house_data = house.state.snapshot()
+    return {
+        'status': status_payload(house, house_data),
+        'rooms': house_data['rooms'],
+        'devices': house_data['devices'],
+        'notifications': house_data['notifications'],
+        'logs': house.logs.latest(LOG_PAGE),
+    }
+
+@house_route('/api/stream')
+def stream(house_id):
+    """Server-Sent Events: snapshot awal lalu push setiap perubahan state"""
+    house = get_house(house_id)
+    return Response(house.broker.stream(functools.partial(stream_initial, house)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@house_route('/api/room/<room_id>/toggle', methods=['POST'])
+def toggle_room_light(house_id, room_id):
     """Toggle lampu di ruangan"""
-    if room_id not in house_data['rooms']:
+    house = get_house(house_id)
+    if room_id not in house.state.table('rooms'):
         return jsonify({'error': 'Room not found'}), 404
     
-    room = house_data['rooms'][room_id]
-    current_state = room['light']
-    
-    # Jika ada penghuni, tidak bisa toggle off hanya bisa toggle on
-    if house_data['status'] == 'berpenghuni' and current_state:
-        add_notification('warning', f'Lampu {room["name"]} tidak bisa dimatikan saat ada penghuni')
+    with house.state.write('rooms') as rooms_data:
+        light = rooms_data.get(room_id, 'light')
+        # Jika ada penghuni, tidak bisa toggle off hanya bisa toggle on
+        blocked = house.state.view('status') == 'berpenghuni' and light
+        if not blocked:
+            light = not light
+            rooms_data.set(room_id, 'light', light)
+    name = rooms_data.meta(room_id)['name']
+
+    if blocked:
+        add_notification(house, 'warning', f'Lampu {name} tidak bisa dimatikan saat ada penghuni')
         return jsonify({'error': 'Cannot turn off lights when occupied'}), 403
     
-    room['light'] = not current_state
-    
-    action = 'Menyalakan' if room['light'] else 'Mematikan'
-    add_log('Kontrol Lampu', f'{action} lampu {room["name"]}')
+    action = 'Menyalakan' if light else 'Mematikan'
+    add_log(house, 'Kontrol Lampu', f'{action} lampu {name}')
     if room_id == 'ruang_cuci':
-        send_command(client, "jemuran", 'lampu', 'on' if room['light'] else 'off')
+        send_command(house, "jemuran", 'lampu', 'on' if light else 'off')
     else:
-        send_command(client, room_id, 'lampu', 'on' if room['light'] else 'off')
+        send_command(house, room_id, 'lampu', 'on' if light else 'off')
 
+    # Notifikasi lampu menyala saat rumah kosong ditangani rule anomali
+    notify_state(house, 'rooms', [room_id])
+    check_anomalies(house, 'light', room_id)
+    return jsonify({'room_id': room_id, 'light': light})
 
-    # Notifikasi jika lampu menyala saat rumah kosong
-    if room['light'] and house_data['status'] == 'kosong':
-        add_notification('warning', f'💡 Lampu {room["name"]} menyala saat rumah kosong!', 'light')
-    
-    check_anomalies()
-    return jsonify({'room_id': room_id, 'light': room['light']})
-
-@app.route('/api/room/<room_id>/occupied', methods=['POST'])
-def set_room_occupied(room_id):
+@house_route('/api/room/<room_id>/occupied', methods=['POST'])
+def set_room_occupied(house_id, room_id):
     """Set room occupied status"""
-    if room_id not in house_data['rooms']:
+    house = get_house(house_id)
+    rooms_data = house.state.table('rooms')
+    if room_id not in rooms_data:
         return jsonify({'error': 'Room not found'}), 404
     
     data = request.get_json()
     occupied = data.get('occupied', False)
     
-    house_data['rooms'][room_id]['occupied'] = occupied
+    with house.state.write('rooms') as rooms_data:
+        rooms_data.set(room_id, 'occupied', occupied)
+    room_occupancy_changed(house, room_id, occupied)
+    notify_state(house, 'rooms', [room_id])
     
     status = 'ditempati' if occupied else 'kosong'
-    add_log('Status Ruangan', f'{house_data["rooms"][room_id]["name"]} menjadi {status}')
+    add_log(house, 'Status Ruangan', f'{rooms_data.meta(room_id)["name"]} menjadi {status}')
     
     return jsonify({'room_id': room_id, 'occupied': occupied})
 
-@app.route('/api/lights/all/off', methods=['POST'])
-def turn_off_all_lights():
+@house_route('/api/lights/all/off', methods=['POST'])
+def turn_off_all_lights(house_id):
     """Matikan semua lampu (hanya saat rumah kosong)"""
-    if house_data['status'] == 'berpenghuni':
-        add_notification('warning', 'Tidak bisa matikan semua lampu saat ada penghuni')
+    house = get_house(house_id)
+    if house.state.view('status') == 'berpenghuni':
+        add_notification(house, 'warning', 'Tidak bisa matikan semua lampu saat ada penghuni')
         return jsonify({'error': 'Cannot turn off all lights when occupied'}), 403
     
-    for room_id, room in house_data['rooms'].items():
-        room['light'] = False
+    with house.state.write('rooms') as rooms_data:
+        changed = rooms_data.fill('light', False)
+    for room_id in rooms_data:
         if room_id == 'ruang_cuci':
-            send_command(client, "jemuran", 'lampu', 'on' if room['light'] else 'off')
+            send_command(house, "jemuran", 'lampu', 'off')
         else:
-            send_command(client, room_id, 'lampu', 'on' if room['light'] else 'off')
+            send_command(house, room_id, 'lampu', 'off')
 
-    
-    add_log('Kontrol Lampu', 'Mematikan semua lampu')
-    add_notification('info', '✓ Semua lampu telah dimatikan')
+    notify_state(house, 'rooms', changed)
+    check_anomalies(house, 'light')
+    add_log(house, 'Kontrol Lampu', 'Mematikan semua lampu')
+    add_notification(house, 'info', '✓ Semua lampu telah dimatikan')
     
     return jsonify({'message': 'All lights turned off'})
 
-@app.route('/api/device/<device_id>/toggle', methods=['POST'])
-def toggle_device(device_id):
+@house_route('/api/device/<device_id>/toggle', methods=['POST'])
+def toggle_device(house_id, device_id):
     """Toggle perangkat"""
-    if device_id not in house_data['devices']:
+    house = get_house(house_id)
+    if device_id not in house.state.table('devices'):
         return jsonify({'error': 'Device not found'}), 404
     
-    device = house_data['devices'][device_id]
-    device['status'] = not device['status']
+    with house.state.write('devices') as devices_data:
+        status = not devices_data.get(device_id, 'status')
+        devices_data.set(device_id, 'status', status)
+    arm_device_timer(house, device_id, status)
     
-    action = 'Menyalakan' if device['status'] else 'Mematikan'
-    add_log('Kontrol Perangkat', f'{action} {device["name"]}')
+    action = 'Menyalakan' if status else 'Mematikan'
+    add_log(house, 'Kontrol Perangkat', f'{action} {devices_data.meta(device_id)["name"]}')
     if device_id == 'kulkas' or device_id == 'kompor':
-        send_command(client, 'dapur', device_id, 'on' if device['status'] else 'off')
+        send_command(house, 'dapur', device_id, 'on' if status else 'off')
     if device_id == 'mesinCuci' or device_id == 'pompa_air':
-        send_command(client, 'jemuran', device_id, 'on' if device['status'] else 'off')
+        send_command(house, 'jemuran', device_id, 'on' if status else 'off')
     
-    if device['status'] and house_data['status'] == 'kosong':
-        add_notification('danger', f'⚙️ {device["name"]} menyala saat rumah kosong!', 'device')
-    
-    check_anomalies()
-    return jsonify({'device_id': device_id, 'status': device['status']})
+    # Notifikasi perangkat menyala saat rumah kosong ditangani rule anomali
+    notify_state(house, 'devices', [device_id])
+    check_anomalies(house, 'device', device_id)
+    return jsonify({'device_id': device_id, 'status': status})
 
-@app.route('/api/devices/all/off', methods=['POST'])
-def turn_off_all_devices():
+@house_route('/api/devices/all/off', methods=['POST'])
+def turn_off_all_devices(house_id):
     """Matikan semua perangkat"""
-    for device_id, device in house_data['devices'].items():
-        device['status'] = False
+    house = get_house(house_id)
+    with house.state.write('devices') as devices_data:
+        changed = devices_data.fill('status', False)
+    for device_id in DEVICE_MAX_ON:
+        arm_device_timer(house, device_id, False)
+    for device_id in devices_data:
         if device_id == 'kulkas' or device_id == 'kompor':
-            send_command(client, 'dapur', device_id, 'on' if device['status'] else 'off')
+            send_command(house, 'dapur', device_id, 'off')
         if device_id == 'mesinCuci' or device_id == 'pompa_air':
-            send_command(client, 'jemuran', device_id, 'on' if device['status'] else 'off')
+            send_command(house, 'jemuran', device_id, 'off')
     
-    add_log('Kontrol Perangkat', 'Mematikan semua perangkat')
-    add_notification('info', '✓ Semua perangkat telah dimatikan')
+    notify_state(house, 'devices', changed)
+    check_anomalies(house, 'device')
+    add_log(house, 'Kontrol Perangkat', 'Mematikan semua perangkat')
+    add_notification(house, 'info', '✓ Semua perangkat telah dimatikan')
     
     return jsonify({'message': 'All devices turned off'})
 
-@app.route('/api/house/status', methods=['POST'])
-def set_house_status():
+@house_route('/api/house/status', methods=['POST'])
+def set_house_status(house_id):
     """Set status rumah (kosong/berpenghuni)"""
+    house = get_house(house_id)
     data = request.get_json()
     new_status = data.get('status')
     
     if new_status not in ['kosong', 'berpenghuni']:
         return jsonify({'error': 'Invalid status'}), 400
     
-    old_status = house_data['status']
-    house_data['status'] = new_status
+    old_status = house.state.view('status')
+    set_status(house, new_status)
     
-    add_log('Status Rumah', f'Status berubah dari {old_status} menjadi {new_status}')
-    add_notification('info', f'Status rumah: {new_status}')
+    add_log(house, 'Status Rumah', f'Status berubah dari {old_status} menjadi {new_status}')
+    add_notification(house, 'info', f'Status rumah: {new_status}')
     
-    check_anomalies()
+    notify_state(house)
+    check_anomalies(house, 'house')
     return jsonify({'status': new_status})
 
-@app.route('/api/notification/clear', methods=['POST'])
-def clear_notifications():
+@house_route('/api/notification/clear', methods=['POST'])
+def clear_notifications(house_id):
     """Hapus semua notifikasi"""
-    house_data['notifications'] = []
+    house = get_house(house_id)
+    if changes is not None:
+        publish_change(house, 'clear_notifications', None)
+    else:
+        reset_notifications(house)
     return jsonify({'message': 'Notifications cleared'})
 
+def room_occupancy_changed(house, room_id, occupied):
+    """Setiap perubahan occupied (PIR, dashboard, worker lain): riwayat hunian + timer lampu"""
+    if room_id is None:
+        return
+    now = time.time()
+    house.presence.record(room_id, occupied, now)
+    if house.journal is not None and role['leader']:
+        # Waktu ikut dicatat: replay journal membangun ulang interval yang sama
+        house.journal.append('presence', [room_id, int(bool(occupied)), now])
+    arm_light_timer(house, room_id, occupied)
+
+def sync_presence(house):
+    """Buka interval hunian untuk ruangan yang sudah terisi (state hasil restore/snapshot)"""
+    rooms_data = house.state.table('rooms')
+    for room_id in rooms_data:
+        house.presence.record(room_id, rooms_data.get(room_id, 'occupied'))
+
+def arm_light_timer(house, room_id, occupied):
+    """PIR 0: jadwalkan lampu ruangan mati; PIR 1: batalkan"""
+    if not LIGHT_AUTO_OFF:
+        return
+    key = (house.id, 'light', room_id)
+    if occupied:
+        scheduler.cancel(key)
+    else:
+        scheduler.call_later(key, LIGHT_AUTO_OFF, auto_light_off, house, room_id,
+                             f'ruangan kosong {LIGHT_AUTO_OFF / 60:g} menit')
+
+def arm_device_timer(house, device_id, on):
+    """Perangkat menyala: batas waktu dihitung sejak pertama menyala (status berulang tidak mereset)"""
+    limit = DEVICE_MAX_ON.get(device_id)
+    if not limit:
+        return
+    key = (house.id, 'device', device_id)
+    if not on:
+        scheduler.cancel(key)
+    elif key not in scheduler:
+        scheduler.call_later(key, limit, auto_device_off, house, device_id,
+                             f'menyala lebih dari {limit / 3600:g} jam')
+
+def auto_light_off(house, room_id, reason):
+    """Aksi otomasi: matikan lampu satu ruangan lewat jalur yang sama dengan dashboard"""
+    if not role['leader']:
+        return
+    with house.state.write('rooms') as rooms_data:
+        changed = rooms_data.set(room_id, 'light', False)
+    if not changed:
+        return
+    send_command(house, 'jemuran' if room_id == 'ruang_cuci' else room_id, 'lampu', 'off')
+    add_log(house, 'Otomasi', f'Mematikan lampu {rooms_data.meta(room_id)["name"]} ({reason})')
+    notify_state(house, 'rooms', [room_id])
+    check_anomalies(house, 'light', room_id)
+
+def auto_device_off(house, device_id, reason):
+    if not role['leader']:
+        return
+    with house.state.write('devices') as devices_data:
+        changed = devices_data.set(device_id, 'status', False)
+    if not changed:
+        return
+    send_command(house, 'dapur' if device_id in ('kulkas', 'kompor') else 'jemuran', device_id, 'off')
+    name = devices_data.meta(device_id)['name']
+    add_log(house, 'Otomasi', f'Mematikan {name} ({reason})')
+    add_notification(house, 'warning', f'⏱ {name} dimatikan otomatis: {reason}')
+    notify_state(house, 'devices', [device_id])
+    check_anomalies(house, 'device', device_id)
+
+def scene_lights_off(house):
+    """Semua lampu mati, kecuali saat rumah berpenghuni (aturan yang sama dengan dashboard)"""
+    if house.state.view('status') == 'berpenghuni':
+        return
+    rooms_data = house.state.table('rooms')
+    for room_id in rooms_data:
+        if rooms_data.get(room_id, 'light'):
+            auto_light_off(house, room_id, 'scene lampu_mati')
+
+def scene_devices_off(house):
+    """Semua perangkat mati kecuali kulkas"""
+    devices_data = house.state.table('devices')
+    for device_id in devices_data:
+        if device_id != 'kulkas' and devices_data.get(device_id, 'status'):
+            auto_device_off(house, device_id, 'scene perangkat_mati')
+
+SCENES = {'lampu_mati': scene_lights_off, 'perangkat_mati': scene_devices_off}
+
+def schedule_scenes():
+    """DAILY_SCENES="HH:MM=scene,..." untuk semua rumah"""
+    for item in filter(None, DAILY_SCENES.split(',')):
+        at, _, name = item.strip().partition('=')
+        if name not in SCENES:
+            logger.warning("Scene '%s' tidak dikenal (pilihan: %s)", name, ', '.join(SCENES))
+            continue
+        try:
+            at = datetime.strptime(at, '%H:%M').time()
+        except ValueError:
+            logger.warning("Jam scene '%s' tidak valid (format HH:MM), dilewati", item.strip())
+            continue
+        for house in houses:
+            scheduler.daily((house.id, 'scene', name, at), at, SCENES[name], house)
+
+def apply_change(record):
+    """Terapkan satu record log perubahan cluster (thread ChangeFollower, berurutan)
+
+    Flag diterapkan langsung ke SlotTable tanpa lock section: thread ini bisa sedang memegang
+    lock ChangeLog, sedangkan request memegang lock section saat mem-publish perubahan.
+    """
+    op, data = record['op'], record['d']
+    if op == 'snapshot':
+        if record['w'] != role['worker']:
+            load_cluster_snapshot(data)
+        return
+    if op == 'mqtt':
+        if not role['leader']:
+            set_mqtt_connected(data)
+        return
+    house = houses.get(record['h'])
+    if house is None:
+        return
+    if op == 'flag':
+        section, item_id, field, value = data
+        table = house.state.table(section)
+        if item_id is None:
+            changed = table.fill(field, value, observe=False)
+        else:
+            changed = table.set(item_id, field, value, observe=False)
+        if changed:
+            notify_state(house, section, changed if item_id is None else [item_id])
+            if field == 'occupied':
+                room_occupancy_changed(house, item_id, value)
+            else:
+                check_anomalies(house, 'light' if section == 'rooms' else 'device', item_id)
+            if section == 'devices':
+                for device_id in (DEVICE_MAX_ON if item_id is None else (item_id,)):
+                    arm_device_timer(house, device_id, value)
+    elif op == 'status':
+        if house.state.view('status') != data:
+            house.state.set('status', data)
+            notify_state(house)
+            check_anomalies(house, 'house')
+    elif op == 'log':
+        append_log(house, data)
+    elif op == 'notification':
+        append_notification(house, data)
+    elif op == 'clear_notifications':
+        reset_notifications(house)
+    elif op in ('anomaly', 'anomaly_clear'):
+        if op == 'anomaly':
+            raise_notification(house, *data)
+        else:
+            resolve_notification(house, data)
+        notify_change(house, 'notifications', house.state.view('notifications'))
+    elif op == 'command':
+        if role['leader']:
+            command_publisher.enqueue(*data)
+
+def cluster_snapshot():
+    """Record pertama setelah rotasi log perubahan; notifikasi ikut supaya worker baru
+    melanjutkan ID (/api/notifications?since=) dan rate limit yang sama"""
+    return {'w': role['worker'], 'h': None, 'op': 'snapshot', 'd': {
+        'mqtt_connected': mqtt_state['connected'],
+        'houses': {house.id: dict(house_snapshot(house), notifications=house.notices.dump())
+                   for house in houses},
+    }}
+
+def load_cluster_snapshot(data):
+    mqtt_state['connected'] = data['mqtt_connected']
+    for house_id, state in data['houses'].items():
+        house = houses.get(house_id)
+        if house is None:
+            continue
+        # seq log ikut snapshot, jadi /api/logs?since= sama di semua worker
+        house.logs = RingBuffer(LOG_CAPACITY)
+        load_house_state(house, state)
+        house.notices.load(state['notifications'])
+        house.state.set('notifications', house.notices.visible())
+        sync_presence(house)
+        notify_change(house, 'notifications', house.state.view('notifications'))
+        notify_change(house, 'devices', house.state.table('devices').rows())
+        notify_state(house, 'rooms')
+        check_anomalies(house, 'house')
+
+def on_cluster_tick():
+    """Thread ChangeFollower: ambil alih kalau leader mati, rotasi log perubahan kalau besar"""
+    if not role['leader']:
+        if leader_lock.try_acquire():
+            become_leader(startup=False)
+        return
+    while anomaly_outbox:
+        house, op, data = anomaly_outbox.popleft()
+        publish_change(house, op, data)
+    if changes.size() > changes.max_bytes:
+        rotate_changes()
+
+def rotate_changes():
+    """Terapkan sisa record lalu ganti file dengan snapshot, di bawah lock (tidak ada penulis lain)"""
+    with changes.locked():
+        follower.poll()
+        changes.rotate(cluster_snapshot())
+
+def become_leader(startup):
+    """Worker ini menjadi satu-satunya proses ingest MQTT, publisher perintah dan penulis journal"""
+    role['leader'] = True
+    for house in houses:
+        if house.journal is None:
+            reset_occupancy(house)
+        elif startup:
+            restore_state(house)
+        else:
+            resume_journal(house)
+        sync_presence(house)
+        # Anomali dari state hasil restore journal
+        check_anomalies(house, 'house')
+    command_publisher.start()
+    if ingest_queue is not None:
+        ingest_queue.start()
+    schedule_scenes()
+    if MQTT_ENABLED and MQTT_LOOP == 'thread':
+        mqtt_connection.start()
+    for hook in leader_hooks:
+        hook()
+    if changes is not None:
+        if startup:
+            # Isi log lama (boot sebelumnya) digantikan state hasil restore journal
+            with changes.locked():
+                changes.rotate(cluster_snapshot())
+        else:
+            rotate_changes()
+        logger.info("Worker %s menjadi leader ingest MQTT", role['worker'])
+
+def start_services():
+    """Restore journal lalu mulai MQTT di background; web tier tidak menunggu broker"""
+    global changes, leader_lock, follower
+    if CLUSTER_DIR:
+        role['worker'] = os.getpid()
+        changes = ChangeLog(CLUSTER_DIR, CLUSTER_MAX_BYTES)
+        leader_lock = LeaderLock(CLUSTER_DIR)
+        follower = ChangeFollower(changes, apply_change, on_cluster_tick, CLUSTER_POLL, logger)
+        for house in houses:
+            for section in HOT_FIELDS:
+                house.state.table(section).observer = functools.partial(publish_flag, house, section)
+        role['leader'] = leader_lock.try_acquire()
+    scheduler.start()
+    if role['leader']:
+        become_leader(startup=True)
+    if follower is not None:
+        follower.start()
+    startup_timing['ready_ms'] = round((time.perf_counter() - startup_started) * 1000, 1)
+    logger.info("Web tier siap dalam %s ms (MQTT %s:%s di background)",
+                startup_timing['ready_ms'], mqtt_connection.host, mqtt_connection.port)
+
+# Proses induk reloader Flask debug hanya mengawasi file, jangan jalankan journal/MQTT di sana
+reloader_parent = __name__ == '__main__' and DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+if not reloader_parent:
+    start_services()
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    app.run(debug=DEBUG, port=5000)
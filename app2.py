@@ -1,13 +1,25 @@
 from flask import Flask, render_template, jsonify, request
 from datetime import datetime
 import json
+import time
+from anomaly import AnomalyEngine
+from timeseries import EnergySeries, parse_time
+from energy_meter import EnergyMeter
+from metrics import Registry, instrument, timed
+from slot_table import SlotTable
 
 app = Flask(__name__)
 
+# Metrik operasional di /metrics
+registry = Registry()
+instrument(app, registry)
+CALLBACK_LATENCY = registry.histogram('callback_duration_seconds', 'Latensi callback hot path', ('callback',))
+
 # State Management
 state = {
     'occupied': False,
-    'rooms': {
+    # Flag panas disimpan ringkas (bytearray per flag); daya tetap jadi metadata statis
+    'rooms': SlotTable({
         'kamar1': {'light': False, 'occupancy': False},
         'kamar2': {'light': False, 'occupancy': False},
         'kamar3': {'light': False, 'occupancy': False},
@@ -16,39 +28,46 @@ state = {
         'ruang_cuci_baju': {'light': False, 'occupancy': False},
         'kamar_mandi': {'light': False, 'occupancy': False},
         'teras_garasi': {'light': False, 'occupancy': False},
-    },
-    'devices': {
+    }, ('light', 'occupancy')),
+    'devices': SlotTable({
         'mesin_cuci': {'status': False, 'power': 500},
         'pompa_air': {'status': False, 'power': 200},
         'kompor': {'status': False, 'power': 300},
-    },
+    }, ('status',)),
     'energy_usage': 0,
-    'peak_usage': 0,
-    'avg_usage': 0,
     'logs': [],
     'notifications': []
 }
 
+# Riwayat daya; avg/peak di /api/status = rolling 24 jam berbobot waktu
+energy_history = EnergySeries()
+ENERGY_WINDOW = 24 * 3600
+
+# Setiap lampu menggunakan 50W
+LIGHT_POWER = 50
+
+meter = EnergyMeter()
+for room_id in state['rooms']:
+    meter.add_load(('light', room_id), LIGHT_POWER, room=room_id, category='lampu',
+                   on=state['rooms'].get(room_id, 'light'))
+for device_id in state['devices']:
+    meter.add_load(('device', device_id), state['devices'].meta(device_id)['power'], category='perangkat',
+                   on=state['devices'].get(device_id, 'status'))
+
 def calculate_energy():
-    """Calculate total energy usage"""
-    total = 0
-    
-    # Setiap lampu menggunakan 50W
-    for room_id, room_data in state['rooms'].items():
-        if room_data['light']:
-            total += 50
-    
-    # Device power
-    for device_id, device_data in state['devices'].items():
-        if device_data['status']:
-            total += device_data['power']
-    
-    state['energy_usage'] = total
-    if total > state['peak_usage']:
-        state['peak_usage'] = total
-    
-    # Calculate average (simplified)
-    state['avg_usage'] = (state['avg_usage'] + total) / 2
+    """Catat total daya terbaru (O(1); meter diperbarui di setiap toggle)"""
+    state['energy_usage'] = meter.total
+    energy_history.record(meter.total)
+
+def set_light(room_id, on):
+    state['rooms'].set(room_id, 'light', on)
+    meter.set(('light', room_id), on)
+
+def set_device(device_id, on):
+    state['devices'].set(device_id, 'status', on)
+    meter.set(('device', device_id), on)
+
+calculate_energy()
 
 def add_log(action, detail):
     """Add activity log"""
@@ -67,37 +86,52 @@ def add_log(action, detail):
     if len(state['logs']) > 50:
         state['logs'] = state['logs'][-50:]
 
-def check_anomalies():
-    """Check for anomalies and add notifications"""
-    state['notifications'] = []
-    
-    # Check for lights on when house is empty
-    if not state['occupied']:
-        for room_id, room_data in state['rooms'].items():
-            if room_data['light']:
-                state['notifications'].append({
-                    'type': 'warning',
-                    'icon': '💡',
-                    'message': f'Lampu di {get_room_name(room_id)} masih nyala padahal rumah kosong!'
-                })
-    
-    # Check for devices on when house is empty
-    if not state['occupied']:
-        for device_id, device_data in state['devices'].items():
-            if device_data['status']:
-                state['notifications'].append({
-                    'type': 'danger',
-                    'icon': '⚙️',
-                    'message': f'{get_device_name(device_id)} masih aktif padahal rumah kosong!'
-                })
-    
-    # Check for high energy usage
-    if state['energy_usage'] > 3200:  # 80% of 4000W
-        state['notifications'].append({
+def rule_light_on_empty(room_id):
+    """Lampu menyala padahal rumah kosong"""
+    if not state['occupied'] and state['rooms'].get(room_id, 'light'):
+        return {
+            'type': 'warning',
+            'icon': '💡',
+            'message': f'Lampu di {get_room_name(room_id)} masih nyala padahal rumah kosong!'
+        }
+
+def rule_device_on_empty(device_id):
+    """Perangkat aktif padahal rumah kosong"""
+    if not state['occupied'] and state['devices'].get(device_id, 'status'):
+        return {
+            'type': 'danger',
+            'icon': '⚙️',
+            'message': f'{get_device_name(device_id)} masih aktif padahal rumah kosong!'
+        }
+
+def rule_high_energy(_):
+    """Penggunaan listrik di atas 80% dari 4000W"""
+    if state['energy_usage'] > 3200:
+        return {
             'type': 'warning',
             'icon': '⚡',
             'message': f'Penggunaan listrik tinggi: {round(state["energy_usage"])}W'
-        })
+        }
+
+def on_anomaly_raise(key, notification):
+    state['notifications'].append(notification)
+
+def on_anomaly_clear(key, notification):
+    state['notifications'].remove(notification)
+
+anomalies = AnomalyEngine(on_anomaly_raise, on_anomaly_clear)
+anomalies.add_rule('light_on_empty', ('light', 'house'), rule_light_on_empty, lambda: state['rooms'])
+anomalies.add_rule('device_on_empty', ('device', 'house'), rule_device_on_empty, lambda: state['devices'])
+anomalies.add_rule('high_energy', ('energy',), rule_high_energy)
+
+@timed(CALLBACK_LATENCY, 'check_anomalies')
+def check_anomalies(event, subject=None):
+    """Evaluasi hanya rule anomali yang tersentuh perubahan (light/device/house/energy)"""
+    anomalies.changed(event, subject)
+
+registry.gauge('log_entries', 'Jumlah entri log', fn=lambda: len(state['logs']))
+registry.gauge('notifications', 'Jumlah notifikasi aktif', fn=lambda: len(state['notifications']))
+registry.gauge('energy_usage_watts', 'Total daya saat ini', fn=lambda: meter.total)
 
 def get_room_name(room_id):
     """Get room display name"""
@@ -129,23 +163,42 @@ def index():
 @app.route('/api/status')
 def get_status():
     """Get current status"""
-    calculate_energy()
-    check_anomalies()
+    now = time.time()
+    summary = energy_history.query(now - ENERGY_WINDOW, now, 'hour')
     
     return jsonify({
         'success': True,
         'status': {
             'occupied': state['occupied'],
-            'rooms': state['rooms'],
-            'devices': state['devices'],
+            'rooms': state['rooms'].view(),
+            'devices': state['devices'].view(),
             'energy_usage': state['energy_usage'],
-            'peak_usage': state['peak_usage'],
-            'avg_usage': state['avg_usage'],
+            'peak_usage': summary['peak_w'],
+            'avg_usage': summary['avg_w'],
+            'energy_by_room': dict(meter.by_room),
+            'energy_by_category': dict(meter.by_category),
         },
         'notifications': state['notifications'],
         'logs': state['logs']
     })
 
+@app.route('/api/energy/history')
+def get_energy_history():
+    """Riwayat energi: rata-rata berbobot waktu, puncak dan kWh per bucket"""
+    resolution = request.args.get('resolution') or None
+    if resolution is not None and resolution not in EnergySeries.RESOLUTIONS:
+        return jsonify({'success': False, 'error': 'Resolusi harus minute, hour atau day'}), 400
+    
+    try:
+        t_to = parse_time(request.args.get('to'), time.time())
+        t_from = parse_time(request.args.get('from'), t_to - ENERGY_WINDOW)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Format waktu tidak valid'}), 400
+    if t_from >= t_to:
+        return jsonify({'success': False, 'error': 'from harus lebih kecil dari to'}), 400
+    
+    return jsonify({'success': True, **energy_history.query(t_from, t_to, resolution)})
+
 @app.route('/api/set-house-mode/<mode>', methods=['POST'])
 def set_house_mode(mode):
     """Set house mode (occupied/empty)"""
@@ -155,6 +208,7 @@ def set_house_mode(mode):
     action = 'Mode rumah diubah'
     detail = 'Ditempati' if occupied else 'Kosong'
     add_log(action, detail)
+    check_anomalies('house')
     
     return jsonify({
         'success': True,
@@ -167,20 +221,22 @@ def toggle_light(room_id):
     if room_id not in state['rooms']:
         return jsonify({'success': False, 'error': 'Ruangan tidak ditemukan'}), 404
     
-    room = state['rooms'][room_id]
+    rooms = state['rooms']
+    light = rooms.get(room_id, 'light')
     
     # Check if room is occupied
-    if room['occupancy'] and not room['light']:
+    if rooms.get(room_id, 'occupancy') and not light:
         return jsonify({'success': False, 'error': 'Tidak bisa menyalakan lampu saat ruangan terisi'}), 400
     
-    room['light'] = not room['light']
+    set_light(room_id, not light)
     
     action = f"Lampu {get_room_name(room_id)}"
-    detail = 'Dinyalakan' if room['light'] else 'Dimatikan'
+    detail = 'Dinyalakan' if not light else 'Dimatikan'
     add_log(action, detail)
     
     calculate_energy()
-    check_anomalies()
+    check_anomalies('light', room_id)
+    check_anomalies('energy')
     
     return jsonify({'success': True})
 
@@ -191,13 +247,13 @@ def toggle_all_lights():
         return jsonify({'success': False, 'error': 'Tidak bisa mematikan semua lampu saat rumah terisi'}), 400
     
     # Turn off all lights
-    for room_id, room_data in state['rooms'].items():
-        if room_data['light']:
-            room_data['light'] = False
+    for room_id in state['rooms'].fill('light', False):
+        meter.set(('light', room_id), False)
     
     add_log('Semua lampu', 'Dimatikan sekaligus')
     calculate_energy()
-    check_anomalies()
+    check_anomalies('light')
+    check_anomalies('energy')
     
     return jsonify({'success': True})
 
@@ -208,14 +264,12 @@ def set_occupancy(room_id, status):
         return jsonify({'success': False, 'error': 'Ruangan tidak ditemukan'}), 404
     
     occupied = status.lower() == 'true'
-    state['rooms'][room_id]['occupancy'] = occupied
+    state['rooms'].set(room_id, 'occupancy', occupied)
     
     action = f"{get_room_name(room_id)}"
     detail = 'Terisi' if occupied else 'Kosong'
     add_log(action, detail)
     
-    check_anomalies()
-    
     return jsonify({'success': True})
 
 @app.route('/api/toggle-device/<device_id>', methods=['POST'])
@@ -224,21 +278,22 @@ def toggle_device(device_id):
     if device_id not in state['devices']:
         return jsonify({'success': False, 'error': 'Perangkat tidak ditemukan'}), 404
     
-    device = state['devices'][device_id]
+    status = state['devices'].get(device_id, 'status')
     
-    # Check if any room is occupied
-    any_occupied = any(room['occupancy'] for room in state['rooms'].values())
-    if any_occupied and not device['status']:
+    # Check if any room is occupied (hitung flag langsung di bytearray)
+    any_occupied = state['rooms'].count('occupancy') > 0
+    if any_occupied and not status:
         return jsonify({'success': False, 'error': 'Tidak bisa menyalakan perangkat saat ada penghuni'}), 400
     
-    device['status'] = not device['status']
+    set_device(device_id, not status)
     
     action = get_device_name(device_id)
-    detail = 'Diaktifkan' if device['status'] else 'Dimatikan'
+    detail = 'Diaktifkan' if not status else 'Dimatikan'
     add_log(action, detail)
     
     calculate_energy()
-    check_anomalies()
+    check_anomalies('device', device_id)
+    check_anomalies('energy')
     
     return jsonify({'success': True})
 
@@ -249,13 +304,13 @@ def toggle_all_devices():
         return jsonify({'success': False, 'error': 'Tidak bisa mematikan semua perangkat saat rumah terisi'}), 400
     
     # Turn off all devices
-    for device_id, device_data in state['devices'].items():
-        if device_data['status']:
-            device_data['status'] = False
+    for device_id in state['devices'].fill('status', False):
+        meter.set(('device', device_id), False)
     
     add_log('Semua perangkat', 'Dimatikan sekaligus')
     calculate_energy()
-    check_anomalies()
+    check_anomalies('device')
+    check_anomalies('energy')
     
     return jsonify({'success': True})
 
@@ -0,0 +1,96 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+
+class RateLimitFilter(logging.Filter):
+    """Batasi record per template pesan: token bucket (rate/detik, burst) plus sampling
+
+    Record dengan extra={'sample': n} hanya diteruskan 1 dari n. Record yang ditahan
+    dihitung dan jumlahnya ditempel ke record berikutnya yang lolos untuk template itu.
+    rate <= 0 mematikan rate limit (sampling tetap berlaku).
+    """
+
+    def __init__(self, rate=20, burst=50, stats=None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}      # (logger, msg) -> [token, waktu isi terakhir, ditahan, counter sample]
+        self.stats = stats if stats is not None else {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= 4096:
+                    self.buckets.clear()   # template pesan tak terbatas (mis. f-string) tidak boleh bocor
+                bucket = self.buckets[key] = [self.burst, now, 0, 0]
+            sample = getattr(record, 'sample', 1)
+            if sample > 1:
+                bucket[3] += 1
+                if bucket[3] % sample != 1:
+                    self.stats['sampled_out'] += 1
+                    return False
+            if self.rate <= 0:
+                return True
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.stats['rate_limited'] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.msg = f'{record.msg} (+{suppressed} pesan serupa ditahan)'
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler yang tidak pernah blocking: kalau antrian penuh, record dibuang dan dihitung"""
+
+    def __init__(self, log_queue, stats):
+        super().__init__(log_queue)
+        self.stats = stats
+
+    def prepare(self, record):
+        # Format pesan ditunda ke thread listener (QueueHandler bawaan memformat di thread pemanggil)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self.stats['enqueued'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+
+def setup_logging(name, level='INFO', queue_size=10000, rate=20, burst=50, stream=None):
+    """Logger dengan handler antrian; format dan tulis ke stream di thread QueueListener
+
+    Callback hot path hanya membuat record dan memasukkannya ke antrian terbatas.
+    Kembalikan (logger, stats) untuk metrik.
+    """
+    stats = {'enqueued': 0, 'dropped': 0, 'rate_limited': 0, 'sampled_out': 0}
+    log_queue = queue.Queue(queue_size)
+    handler = DroppingQueueHandler(log_queue, stats)
+    handler.addFilter(RateLimitFilter(rate, burst, stats))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger, stats
@@ -0,0 +1,332 @@
+"""Mode serving async (ASGI) untuk app.py
+
+Route HTTP dan klien MQTT berbagi satu event loop asyncio:
+- /api/stream (SSE) dilayani langsung di event loop; setiap klien hanya sebuah
+  asyncio.Queue, bukan satu thread per koneksi
+- loop paho dijalankan lewat add_reader/add_writer event loop (tanpa thread paho)
+- route Flask lain tetap dipakai apa adanya lewat jembatan WSGI di thread pool
+
+Jalankan: pip install uvicorn && uvicorn asgi:app --port 5000
+          (atau python asgi.py)
+"""
+import asyncio
+import functools
+import io
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('MQTT_LOOP', 'asyncio')
+
+import app as web  # noqa: E402
+from stream import format_sse  # noqa: E402
+
+STREAM_PATH = re.compile(r'^/api(?:/houses/([^/]+))?/stream$')
+HEARTBEAT = 15
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ASGI_THREADS', 32)),
+                              thread_name_prefix='wsgi')
+
+
+class AsyncFanout:
+    """Event perubahan state -> antrian asyncio tiap klien SSE ASGI
+
+    Per rumah hanya ada satu listener di EventBroker (dipasang selama ada klien), jadi
+    publish dari thread lain cukup satu call_soon_threadsafe, berapa pun jumlah kliennya.
+    """
+
+    def __init__(self, max_pending=256):
+        self.max_pending = max_pending
+        self.loop = None
+        self.loop_thread = None
+        self.clients = {}      # house_id -> set(asyncio.Queue)
+        self.listeners = {}    # house_id -> listener di house.broker
+
+    def bind(self, loop):
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+
+    def subscribe(self, house):
+        q = asyncio.Queue(self.max_pending)
+        clients = self.clients.setdefault(house.id, set())
+        if not clients:
+            listener = functools.partial(self.dispatch, house.id)
+            self.listeners[house.id] = listener
+            house.broker.add_listener(listener)
+        clients.add(q)
+        return q
+
+    def unsubscribe(self, house, q):
+        clients = self.clients.get(house.id, set())
+        clients.discard(q)
+        if not clients and house.id in self.listeners:
+            house.broker.remove_listener(self.listeners.pop(house.id))
+
+    def dispatch(self, house_id, message):
+        """Dipanggil EventBroker dari thread mana pun"""
+        if threading.get_ident() == self.loop_thread:
+            self.fanout(house_id, message)
+        else:
+            self.loop.call_soon_threadsafe(self.fanout, house_id, message)
+
+    def fanout(self, house_id, message):
+        for q in list(self.clients.get(house_id, ())):
+            try:
+                q.put_nowait(message)
+            except asyncio.QueueFull:
+                # Klien terlalu lambat: putuskan, EventSource akan reconnect dan dapat snapshot baru
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(None)
+
+    def __len__(self):
+        return sum(len(clients) for clients in self.clients.values())
+
+
+class AsyncioMqttBridge:
+    """Loop paho di event loop asyncio: socket lewat add_reader/add_writer, keepalive di task
+
+    Callback paho (on_message, on_connect, ...) berjalan di thread event loop. Publish dari
+    thread lain (CommandPublisher, timer lock) aman karena registrasi writer lewat
+    call_soon_threadsafe.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.client = connection.client
+        self.loop = None
+        self.loop_thread = None
+        self.misc_task = None
+        self.connect_task = None
+        self.stopping = False
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.client.on_socket_open = self.on_socket_open
+        self.client.on_socket_close = self.on_socket_close
+        self.client.on_socket_register_write = self.on_socket_register_write
+        self.client.on_socket_unregister_write = self.on_socket_unregister_write
+        self.connection.started_at = time.perf_counter()
+        self.connect_task = self.loop.create_task(self.connect())
+
+    async def stop(self):
+        self.stopping = True
+        if self.connect_task is not None:
+            self.connect_task.cancel()
+        self.client.disconnect()
+
+    async def connect(self):
+        """Connect dengan exponential backoff; TCP connect (blocking) di thread pool"""
+        delay = self.connection.min_delay
+        while not self.stopping:
+            try:
+                await self.loop.run_in_executor(None, self.client.connect, self.connection.host,
+                                                self.connection.port, self.connection.keepalive)
+                return
+            except OSError as e:
+                web.logger.warning("MQTT connect gagal (%s), coba lagi dalam %s s", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.connection.max_delay)
+
+    def call(self, fn, *args):
+        if threading.get_ident() == self.loop_thread:
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def on_socket_open(self, client, userdata, sock):
+        self.call(self.loop.add_reader, sock, client.loop_read)
+        self.call(self.start_misc)
+
+    def start_misc(self):
+        if self.misc_task is None or self.misc_task.done():
+            self.misc_task = self.loop.create_task(self.misc_loop())
+
+    def on_socket_close(self, client, userdata, sock):
+        self.call(self.loop.remove_reader, sock)
+        self.call(self.closed)
+
+    def closed(self):
+        if self.misc_task is not None:
+            self.misc_task.cancel()
+        if not self.stopping and (self.connect_task is None or self.connect_task.done()):
+            self.connect_task = self.loop.create_task(self.reconnect())
+
+    async def reconnect(self):
+        await asyncio.sleep(self.connection.min_delay)
+        await self.connect()
+
+    def on_socket_register_write(self, client, userdata, sock):
+        self.call(self.loop.add_writer, sock, client.loop_write)
+
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.call(self.loop.remove_writer, sock)
+
+    async def misc_loop(self):
+        """Keepalive PINGREQ dan retry QoS; berhenti saat koneksi putus"""
+        while self.client.loop_misc() == 0:
+            await asyncio.sleep(1)
+
+
+fanout = AsyncFanout()
+bridge = AsyncioMqttBridge(web.mqtt_connection)
+web.registry.gauge('asgi_stream_clients', 'Klien SSE yang dilayani event loop ASGI', fn=lambda: len(fanout))
+
+
+def build_environ(scope, body):
+    """Scope ASGI -> environ WSGI untuk Flask"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def call_wsgi(environ):
+    """Jalankan Flask di thread pool; kembalikan (status, headers, body)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    result = web.app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return started['status'], started['headers'], body
+
+
+async def serve_wsgi(scope, receive, send):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    environ = build_environ(scope, bytes(body))
+    status, headers, body = await asyncio.get_running_loop().run_in_executor(executor, call_wsgi, environ)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def serve_stream(house, receive, send):
+    """SSE di event loop: snapshot awal, lalu event dari antrian klien + heartbeat"""
+    q = fanout.subscribe(house)   # subscribe dulu supaya tidak ada event yang terlewat
+
+    async def pump():
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                        (b'x-accel-buffering', b'no')],
+        })
+        await send({'type': 'http.response.body', 'more_body': True,
+                    'body': format_sse('snapshot', web.stream_initial(house)).encode()})
+        while True:
+            try:
+                message = await asyncio.wait_for(q.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                message = ': ping\n\n'
+            if message is None:
+                break
+            await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def wait_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(wait_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        fanout.unsubscribe(house, q)
+
+
+def start_bridge_as_leader():
+    """Follower yang diangkat jadi leader: start bridge di event loop server (dari thread follower)"""
+    if web.MQTT_ENABLED and web.MQTT_LOOP == 'asyncio' and fanout.loop is not None:
+        asyncio.run_coroutine_threadsafe(start_bridge(), fanout.loop)
+
+
+async def start_bridge():
+    if bridge.loop is None:
+        await bridge.start()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            fanout.bind(asyncio.get_running_loop())
+            web.leader_hooks.append(start_bridge_as_leader)
+            if web.MQTT_ENABLED and web.MQTT_LOOP == 'asyncio' and web.role['leader']:
+                await start_bridge()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if bridge.loop is not None:
+                await bridge.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    if fanout.loop is None:
+        fanout.bind(asyncio.get_running_loop())   # server tanpa lifespan
+    match = STREAM_PATH.match(scope['path'])
+    if match is not None and scope['method'] == 'GET':
+        house = web.houses.get(match.group(1))
+        if house is not None:
+            await serve_stream(house, receive, send)
+            return
+    await serve_wsgi(scope, receive, send)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit('Mode ASGI butuh server ASGI: pip install uvicorn')
+    uvicorn.run(app, host=os.environ.get('HOST', '127.0.0.1'), port=int(os.environ.get('PORT', 5000)))
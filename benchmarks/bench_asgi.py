@@ -0,0 +1,185 @@
+"""Kapasitas koneksi SSE dan latensi: server Flask threaded (app.py) vs ASGI (asgi.py + uvicorn)
+
+Tiap server dijalankan sebagai subprocess (MQTT mati, journal mati). Klien asyncio membuka
+N koneksi /api/stream, lalu:
+- koneksi  : berapa yang menerima snapshot awal dalam --connect-timeout
+- fan-out  : POST toggle lampu -> semua klien menerima 'event: rooms' (p50/p99 per klien)
+- GET      : latensi /api/status selama N koneksi SSE tetap terbuka
+- RSS/thread server setelah semua klien tersambung
+
+Jalankan: pip install uvicorn && python benchmarks/bench_asgi.py --clients 1000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--clients', type=int, default=500, help='jumlah koneksi SSE')
+parser.add_argument('--rounds', type=int, default=20, help='jumlah toggle untuk latensi fan-out')
+parser.add_argument('--gets', type=int, default=200, help='jumlah GET /api/status saat beban')
+parser.add_argument('--connect-timeout', type=float, default=20, help='batas waktu buka semua koneksi (detik)')
+parser.add_argument('--port', type=int, default=5077)
+args = parser.parse_args()
+
+SERVERS = {
+    'flask threaded': [sys.executable, '-c',
+                       "import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"],
+    'asgi (uvicorn)': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+                       '--port', '{port}', '--log-level', 'warning', '--backlog', '4096'],
+}
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def server_stats(pid):
+    """(RSS MB, jumlah thread) dari /proc"""
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                fields[key] = value.split()
+    except OSError:
+        return 0.0, 0
+    return int(fields['VmRSS'][0]) / 1024, int(fields['Threads'][0])
+
+
+async def request(method, path, body=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', args.port)
+    headers = f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+    if body:
+        headers += f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+    writer.write(headers.encode() + b'\r\n' + body)
+    data = await reader.read()
+    writer.close()
+    return int(data.split(b' ', 2)[1])
+
+
+class Client:
+    """Satu koneksi SSE; mencatat kapan 'event: rooms' diterima di tiap ronde"""
+
+    def __init__(self, bench):
+        self.bench = bench
+        self.writer = None
+
+    async def run(self):
+        try:
+            reader, self.writer = await asyncio.open_connection('127.0.0.1', args.port, limit=1 << 20)
+            self.writer.write(b'GET /api/stream HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n')
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b'event: snapshot'):
+                    self.bench.connected += 1
+                elif line.startswith(b'event: rooms') and self.bench.round_started is not None:
+                    self.bench.latencies.append(time.perf_counter() - self.bench.round_started)
+                    self.bench.received += 1
+                    if self.bench.received >= self.bench.connected:
+                        self.bench.round_done.set()
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            self.bench.failed += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Bench:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.received = 0
+        self.round_started = None
+        self.round_done = asyncio.Event()
+        self.latencies = []
+
+    async def run(self, pid):
+        clients = [Client(self) for _ in range(args.clients)]
+        tasks = []
+        started = time.perf_counter()
+        for client in clients:
+            tasks.append(asyncio.ensure_future(client.run()))
+            await asyncio.sleep(0)
+        while self.connected + self.failed < args.clients and time.perf_counter() - started < args.connect_timeout:
+            await asyncio.sleep(0.05)
+        connect_s = time.perf_counter() - started
+        rss, threads = server_stats(pid)
+
+        timeouts = 0
+        for _ in range(args.rounds):
+            self.received = 0
+            self.round_done.clear()
+            self.round_started = time.perf_counter()
+            await request('POST', '/api/room/kamar1/toggle')
+            try:
+                await asyncio.wait_for(self.round_done.wait(), 5)
+            except asyncio.TimeoutError:
+                timeouts += 1
+            self.round_started = None
+            await asyncio.sleep(0.05)
+
+        gets = []
+        for _ in range(args.gets):
+            start = time.perf_counter()
+            await request('GET', '/api/status')
+            gets.append(time.perf_counter() - start)
+
+        for client in clients:
+            client.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return connect_s, rss, threads, timeouts, gets
+
+
+async def wait_ready(proc, timeout=15):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            if await request('GET', '/api/status') == 200:
+                return True
+        except OSError:
+            await asyncio.sleep(0.1)
+    return False
+
+
+def run_server(name, command):
+    env = dict(os.environ, MQTT_ENABLED='0', JOURNAL_DIR='', FLASK_DEBUG='0', LOG_LEVEL='WARNING')
+    command = [part.format(port=args.port) for part in command]
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not asyncio.run(wait_ready(proc)):
+            print(f"{name:<15} gagal start (uvicorn terpasang?)")
+            return
+        bench = Bench()
+        connect_s, rss, threads, timeouts, gets = asyncio.run(bench.run(proc.pid))
+        print(f"{name:<15} koneksi {bench.connected:>5}/{args.clients} dalam {connect_s:5.1f} s  "
+              f"RSS {rss:6.1f} MB  thread {threads:>5}")
+        print(f"{'':<15} fan-out p50 {percentile(bench.latencies, 0.5):7.2f} ms  "
+              f"p99 {percentile(bench.latencies, 0.99):7.2f} ms  ({timeouts} ronde timeout)")
+        print(f"{'':<15} GET /api/status p50 {percentile(gets, 0.5):7.2f} ms  p99 {percentile(gets, 0.99):7.2f} ms")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+if __name__ == '__main__':
+    print(f"{args.clients} klien SSE, {args.rounds} ronde fan-out, {args.gets} GET")
+    for name, command in SERVERS.items():
+        run_server(name, command)
@@ -0,0 +1,133 @@
+"""Skala baca multi-proses: N worker app.py berbagi state lewat CLUSTER_DIR
+
+Setiap worker dijalankan sebagai proses sendiri (server Flask threaded di port masing-masing,
+meniru worker gunicorn) dengan MQTT mati dan CLUSTER_DIR sementara yang sama. Diukur:
+- throughput GET /api/status agregat dari --clients proses klien, per jumlah worker
+- propagasi: POST toggle di worker pertama sampai terlihat di /api/state worker terakhir
+
+Di mesin dengan 1 core angka throughput tidak akan naik; jalankan di mesin multi-core.
+
+Jalankan: python benchmarks/bench_cluster.py --workers 1,2,4 --clients 8 --duration 5
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--workers', default='1,2,4', help='daftar jumlah worker, dipisah koma')
+parser.add_argument('--clients', type=int, default=4, help='proses klien HTTP')
+parser.add_argument('--duration', type=float, default=5, help='lama tiap run (detik)')
+parser.add_argument('--probes', type=int, default=50, help='jumlah toggle untuk latensi propagasi')
+parser.add_argument('--port', type=int, default=6100, help='port worker pertama')
+args = parser.parse_args()
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def get(port, path, method='GET'):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        conn.request(method, path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def start_workers(n, cluster_dir):
+    env = dict(os.environ, CLUSTER_DIR=cluster_dir, MQTT_ENABLED='0', JOURNAL_DIR='',
+               FLASK_DEBUG='0', LOG_LEVEL='WARNING')
+    procs = []
+    for i in range(n):
+        code = f"import app; app.app.run(host='127.0.0.1', port={args.port + i}, threaded=True)"
+        procs.append(subprocess.Popen([sys.executable, '-c', code], cwd=ROOT, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    deadline = time.time() + 15
+    for i in range(n):
+        while True:
+            try:
+                if get(args.port + i, '/api/status')[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.time() > deadline:
+                stop_workers(procs)
+                sys.exit(f'worker di port {args.port + i} gagal start')
+            time.sleep(0.1)
+    return procs
+
+
+def stop_workers(procs):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        proc.wait()
+
+
+def client(ports, offset, stop_at, result):
+    n = 0
+    i = offset
+    while time.time() < stop_at:
+        get(ports[i % len(ports)], '/api/status')
+        i += 1
+        n += 1
+    result.put(n)
+
+
+def read_throughput(ports):
+    result = multiprocessing.Queue()
+    stop_at = time.time() + args.duration
+    clients = [multiprocessing.Process(target=client, args=(ports, i, stop_at, result))
+               for i in range(args.clients)]
+    for p in clients:
+        p.start()
+    total = sum(result.get() for _ in clients)
+    for p in clients:
+        p.join()
+    return total / args.duration
+
+
+def propagation(ports):
+    """Toggle lampu di worker pertama, polling worker terakhir sampai nilainya sama"""
+    latencies = []
+    for _ in range(args.probes):
+        start = time.perf_counter()
+        status, body = get(ports[0], '/api/room/kamar1/toggle', 'POST')
+        light = json.loads(body)['light']
+        while json.loads(get(ports[-1], '/api/state')[1])['rooms']['kamar1'][0] != light:
+            if time.perf_counter() - start > 5:
+                break
+        else:
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+if __name__ == '__main__':
+    print(f"{os.cpu_count()} CPU, {args.clients} proses klien, {args.duration:g} s per run")
+    for n in [int(x) for x in args.workers.split(',')]:
+        with tempfile.TemporaryDirectory() as cluster_dir:
+            procs = start_workers(n, cluster_dir)
+            try:
+                ports = [args.port + i for i in range(n)]
+                rate = read_throughput(ports)
+                latencies = propagation(ports) if n > 1 else []
+            finally:
+                stop_workers(procs)
+        line = f"{n} worker : {rate:>8,.0f} GET/s"
+        if latencies:
+            line += (f"  propagasi p50 {percentile(latencies, 0.5):6.1f} ms  "
+                     f"p99 {percentile(latencies, 0.99):6.1f} ms ({len(latencies)}/{args.probes})")
+        print(line)
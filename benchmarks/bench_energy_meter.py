@@ -0,0 +1,68 @@
+"""Rescan penuh (calculate_energy lama) vs EnergyMeter inkremental
+
+Setiap langkah: satu beban acak berubah status lalu total daya dibaca, seperti satu
+request toggle. Diukur pada 10, 1.000 dan 100.000 beban.
+
+Jalankan: python benchmarks/bench_energy_meter.py [langkah]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from energy_meter import EnergyMeter
+
+
+def make_loads(n, rng):
+    return {f'beban{i}': {'status': rng.random() < 0.5, 'power': rng.randint(5, 2000),
+                          'room': f'ruang{i % 50}'} for i in range(n)}
+
+
+def rescan(loads):
+    """Cara lama: jumlahkan semua beban yang menyala setiap kali"""
+    total = 0
+    for data in loads.values():
+        if data['status']:
+            total += data['power']
+    return total
+
+
+def run_rescan(loads, flips):
+    start = time.perf_counter()
+    for load_id in flips:
+        loads[load_id]['status'] = not loads[load_id]['status']
+        total = rescan(loads)
+    return time.perf_counter() - start, total
+
+
+def run_incremental(loads, flips):
+    meter = EnergyMeter()
+    for load_id, data in loads.items():
+        meter.add_load(load_id, data['power'], room=data['room'], category='beban', on=data['status'])
+    start = time.perf_counter()
+    for load_id in flips:
+        loads[load_id]['status'] = not loads[load_id]['status']
+        meter.set(load_id, loads[load_id]['status'])
+        total = meter.total
+    elapsed = time.perf_counter() - start
+    assert total == meter.recompute() == rescan(loads)
+    return elapsed, total
+
+
+if __name__ == '__main__':
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'beban':>8} {'rescan us/op':>14} {'inkremental us/op':>18} {'speedup':>9}")
+    for n in (10, 1000, 100000):
+        rng = random.Random(n)
+        loads = make_loads(n, rng)
+        # Rescan 100k beban lambat; batasi jumlah langkahnya
+        n_steps = steps if n < 100000 else max(20, steps // 100)
+        flips = [f'beban{rng.randrange(n)}' for _ in range(n_steps)]
+        t_rescan, total_a = run_rescan({k: dict(v) for k, v in loads.items()}, flips)
+        t_incr, total_b = run_incremental({k: dict(v) for k, v in loads.items()}, flips)
+        assert total_a == total_b
+        us_rescan = t_rescan / n_steps * 1e6
+        us_incr = t_incr / n_steps * 1e6
+        print(f"{n:>8,} {us_rescan:>14.2f} {us_incr:>18.2f} {us_rescan / us_incr:>8.0f}x")
@@ -0,0 +1,254 @@
+"""Load generator ingest: lalu lintas PIR/device sintetis -> on_message -> /api/status
+
+Default memakai broker palsu in-process: publisher mengantrikan pesan dan satu thread
+pengantar memanggil app.on_message berurutan, seperti thread loop paho (antrian dibatasi
+--backlog supaya publisher tertahan kalau ingest tidak kuat). Dengan --broker HOST:PORT
+(mis. mosquitto lokal) pesan lewat broker MQTT sungguhan.
+
+Yang dilaporkan:
+- throughput: pesan ditawarkan vs diterima on_message vs diterapkan worker ingest
+  (termasuk update_global_lock; pesan yang digabung antrian ingest dihitung terpisah),
+  dan GET /api/status dari pembaca HTTP paralel
+- latensi end-to-end p50/p99: publish perubahan lampu sampai terlihat di /api/status
+- pertumbuhan memori (RSS) antara awal dan akhir run
+
+Jalankan: python benchmarks/bench_ingest.py --rate 2000 --houses 10 --duration 10
+          INGEST_QUEUE=0 python benchmarks/bench_ingest.py --rate 0   (tanpa antrian ingest)
+          python benchmarks/bench_ingest.py --rate 0 --broker localhost:1883
+"""
+import argparse
+import os
+import queue
+import random
+import resource
+import sys
+import threading
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--rate', type=float, default=1000, help='pesan/detik total (0 = secepatnya)')
+parser.add_argument('--houses', type=int, default=1, help='jumlah rumah')
+parser.add_argument('--duration', type=float, default=5, help='lama run (detik)')
+parser.add_argument('--publishers', type=int, default=2, help='thread publisher')
+parser.add_argument('--readers', type=int, default=2, help='thread pembaca GET /api/status')
+parser.add_argument('--backlog', type=int, default=10000, help='kapasitas antrian broker palsu')
+parser.add_argument('--broker', help='HOST:PORT broker MQTT sungguhan (default: broker palsu)')
+args = parser.parse_args()
+
+os.environ['HOUSES'] = ','.join(f'rumah{i}' for i in range(1, args.houses))
+os.environ.setdefault('JOURNAL_DIR', '')
+if args.broker:
+    host, _, port = args.broker.partition(':')
+    os.environ['MQTT_BROKER'] = host
+    os.environ['MQTT_PORT'] = port or '1883'
+    os.environ['MQTT_ENABLED'] = '1'
+else:
+    os.environ['MQTT_ENABLED'] = '0'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# print di handler (LOCK AKTIF, dsb.) ikut dibayar, tapi tidak ditampung di memori
+devnull = open(os.devnull, 'w')
+real_stdout, sys.stdout = sys.stdout, devnull
+import app  # noqa: E402
+
+
+class FakeClient:
+    def publish(self, topic, payload, *args, **kwargs):
+        pass
+
+    def subscribe(self, *args, **kwargs):
+        return 0, 1
+
+
+class Message:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload.encode()
+
+
+class FakeBroker:
+    """Pengganti broker: antrian FIFO terbatas + satu thread pengantar"""
+
+    def __init__(self, client, capacity):
+        self.client = client
+        self.queue = queue.Queue(capacity)
+        self.thread = threading.Thread(target=self.run, name='fake-broker', daemon=True)
+
+    def publish(self, topic, payload):
+        self.queue.put((topic, payload))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            app.on_message(self.client, None, Message(*item))
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def add(self, n=1):
+        with self.lock:
+            self.value += n
+
+
+def rss_kb():
+    """RSS saat ini (Linux /proc), selain itu RSS maksimum"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def make_traffic(probe_topic):
+    """Pesan sintetis untuk semua topik yang dirouting, kecuali lampu rumah probe"""
+    probe_house = app.houses.default
+    messages = []
+    for topic, (handler, handler_args) in app.topic_router.routes.items():
+        if handler is app.handle_presence:
+            messages += [(topic, '1'), (topic, '0')]
+        elif handler is app.handle_light:
+            if handler_args[0] is not probe_house:
+                messages += [(topic, 'lampu/nyala'), (topic, 'lampu/mati')]
+        else:
+            on_payload = handler_args[2]
+            messages += [(topic, on_payload), (topic, on_payload.replace('nyala', 'mati'))]
+    assert probe_topic in app.topic_router
+    return messages
+
+
+def publisher(send, messages, rate, stop, offered):
+    rng = random.Random()
+    interval = 1 / rate if rate else 0
+    next_at = time.perf_counter()
+    sent = 0
+    while not stop.is_set():
+        send(*rng.choice(messages))
+        sent += 1
+        if interval:
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    offered.add(sent)
+
+
+def reader(stop, served):
+    http = app.app.test_client()
+    urls = ['/api/status'] + [f'/api/houses/{house.id}/status' for house in app.houses]
+    rng = random.Random()
+    n = 0
+    while not stop.is_set():
+        http.get(rng.choice(urls))
+        n += 1
+    served.add(n)
+
+
+def prober(send, probe_topic, stop, latencies, timeouts):
+    """Nyalakan/matikan satu lampu lalu polling /api/status sampai perubahan terlihat"""
+    http = app.app.test_client()
+    lit = http.get('/api/status').get_json()['active_lights']
+    while not stop.is_set():
+        lit = 1 - lit
+        start = time.perf_counter()
+        send(probe_topic, 'lampu/nyala' if lit else 'lampu/mati')
+        while http.get('/api/status').get_json()['active_lights'] != lit:
+            if time.perf_counter() - start > 5:
+                timeouts.add()
+                break
+        else:
+            latencies.append(time.perf_counter() - start)
+        time.sleep(0.005)
+
+
+def wait_subscribed(timeout=10):
+    deadline = time.time() + timeout
+    while app.mqtt_connection.subscribe_ms is None:
+        if time.time() > deadline:
+            sys.exit(f'Broker {args.broker} tidak merespons SUBSCRIBE')
+        time.sleep(0.05)
+
+
+if __name__ == '__main__':
+    processed = Counter()
+    on_message = app.on_message
+
+    def counted_on_message(client, userdata, msg):
+        on_message(client, userdata, msg)
+        processed.add()
+
+    if args.broker:
+        import paho.mqtt.client as mqtt
+        app.client.on_message = counted_on_message
+        wait_subscribed()
+        loadgen = mqtt.Client()
+        loadgen.connect(host, int(port or 1883))
+        loadgen.loop_start()
+
+        def send(topic, payload):
+            loadgen.publish(topic, payload)
+    else:
+        app.on_message = counted_on_message
+        fake_client = FakeClient()
+        app.client = fake_client   # publish lock dari OccupancyAggregator
+        app.on_connect(fake_client, None, None, 0)
+        broker = FakeBroker(fake_client, args.backlog)
+        broker.thread.start()
+        send = broker.publish
+
+    probe_topic = f'{app.houses.default.topic_prefix}/kamar1/lampu'
+    messages = make_traffic(probe_topic)
+
+    stop = threading.Event()
+    offered, served, timeouts = Counter(), Counter(), Counter()
+    latencies = []
+    rate = args.rate / args.publishers if args.rate else 0
+    threads = [threading.Thread(target=publisher, args=(send, messages, rate, stop, offered))
+               for _ in range(args.publishers)]
+    threads += [threading.Thread(target=reader, args=(stop, served)) for _ in range(args.readers)]
+    threads.append(threading.Thread(target=prober, args=(send, probe_topic, stop, latencies, timeouts)))
+
+    rss_start = rss_kb()
+    processed_start = processed.value
+    ingest_start = dict(app.ingest_queue.stats) if app.ingest_queue is not None else None
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done = processed.value - processed_start
+    backlog = 0 if args.broker else broker.queue.qsize()
+    if ingest_start is not None:
+        ingest = {key: app.ingest_queue.stats[key] - ingest_start[key] for key in ingest_start}
+    rss_end = rss_kb()
+
+    sys.stdout = real_stdout
+    mode = f'broker {args.broker}' if args.broker else 'broker palsu in-process'
+    print(f"{args.houses} rumah, {len(messages)} pesan sintetis, {mode}, {elapsed:.1f} s")
+    print(f"ditawarkan : {offered.value / elapsed:>10,.0f} msg/s "
+          f"(target {'maks' if not args.rate else f'{args.rate:,.0f}'})")
+    print(f"diterima   : {done / elapsed:>10,.0f} msg/s  sisa antrian broker {backlog}")
+    if ingest_start is None:
+        print("ingest     : langsung di callback (INGEST_QUEUE=0)")
+    else:
+        print(f"diterapkan : {ingest['applied'] / elapsed:>10,.0f} msg/s  digabung {ingest['coalesced']:,}  "
+              f"dibuang {ingest['dropped']:,}  antrian maks {app.ingest_queue.high_water}")
+    print(f"GET status : {served.value / elapsed:>10,.0f} req/s")
+    print(f"end-to-end : p50 {percentile(latencies, 0.5):.3f} ms  p99 {percentile(latencies, 0.99):.3f} ms  "
+          f"({len(latencies)} probe, {timeouts.value} timeout)")
+    print(f"memori RSS : {rss_start / 1024:.1f} MB -> {rss_end / 1024:.1f} MB "
+          f"({(rss_end - rss_start) / 1024:+.1f} MB)")
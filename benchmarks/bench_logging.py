@@ -0,0 +1,65 @@
+"""Biaya log di thread pemanggil: print() langsung vs logger antrian (applog)
+
+Stream tujuan disimulasikan lambat (mis. pipe ke journald yang tersendat): setiap write
+tidur sebentar. print() menanggung penuh lambatnya stream di thread MQTT, logger antrian
+hanya membayar enqueue. Biaya enqueue diukur dengan rate limit mati (rate=0) supaya setiap
+record benar-benar masuk antrian; kasus dengan rate limit default
+(sebagian besar record ditahan filter) dan sampling PIR dilaporkan terpisah.
+
+Jalankan: python benchmarks/bench_logging.py [jumlah_pesan] [delay_write_us]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from applog import setup_logging
+
+
+class SlowStream:
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay = (int(sys.argv[2]) if len(sys.argv) > 2 else 200) / 1e6
+
+    stream = SlowStream(delay)
+    start = time.perf_counter()
+    for i in range(n):
+        print(f"⚠ LOCK AKTIF [utama] (Ada orang!) {i}", file=stream)
+    t_print = time.perf_counter() - start
+
+    logger, stats = setup_logging('bench', rate=0, queue_size=n + 1, stream=SlowStream(delay))
+    start = time.perf_counter()
+    for i in range(n):
+        logger.info("⚠ LOCK AKTIF [%s] (Ada orang!) %d", 'utama', i)
+    t_queue = time.perf_counter() - start
+
+    limited, limited_stats = setup_logging('bench.limited', stream=SlowStream(delay))
+    start = time.perf_counter()
+    for i in range(n):
+        limited.info("⚠ LOCK AKTIF [%s] (Ada orang!) %d", 'utama', i)
+    t_limited = time.perf_counter() - start
+
+    pir, sampled_stats = setup_logging('bench.pir', level='DEBUG', stream=SlowStream(delay))
+    start = time.perf_counter()
+    for i in range(n):
+        pir.debug("PIR [%s] %s: %s", 'utama', 'kamar1', i % 2, extra={'sample': 100})
+    t_sampled = time.perf_counter() - start
+
+    print(f"{n} pesan, write stream {delay * 1e6:.0f} us")
+    print(f"print()          : {t_print / n * 1e6:>8.2f} us/pesan")
+    print(f"logger antrian   : {t_queue / n * 1e6:>8.2f} us/pesan  {stats}")
+    print(f"+ rate limit     : {t_limited / n * 1e6:>8.2f} us/pesan  {limited_stats}")
+    print(f"PIR sample 1/100 : {t_sampled / n * 1e6:>8.2f} us/pesan  {sampled_stats}")
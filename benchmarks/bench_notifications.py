@@ -0,0 +1,96 @@
+"""Notifikasi: jumlah alert yang benar-benar dikirim saat sensor berkedip, dibanding
+perilaku lama (setiap raise = notifikasi baru dengan id = len(list) + 1)
+
+Simulasi satu hari dengan jam palsu: beberapa ruangan yang lampunya berkedip nyala/mati
+(anomali raise/clear) setiap beberapa detik saat rumah kosong, plus tombol yang ditekan
+berulang. Dilaporkan: notifikasi terkirim, ID unik, dan biaya post/since per operasi.
+
+Jalankan: python benchmarks/bench_notifications.py [detik_antar_kedip]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from notifications import NotificationCenter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def events(flap_every, rooms=5, seconds=86400):
+    """(t, aksi, key) urut waktu: raise/clear anomali per ruangan dan klik tombol"""
+    rng = random.Random(1)
+    result = []
+    for i in range(rooms):
+        t = rng.uniform(0, flap_every)
+        while t < seconds:
+            result.append((t, 'raise', f'light_on_empty:kamar{i}'))
+            result.append((t + flap_every / 2, 'clear', f'light_on_empty:kamar{i}'))
+            t += flap_every
+    t = 0.0
+    while t < seconds:
+        result.append((t, 'post', 'Tidak bisa matikan semua lampu saat ada penghuni'))
+        t += rng.expovariate(1 / 20)
+    result.sort()
+    return result
+
+
+def legacy(stream):
+    """Perilaku lama: list maks 10, id = len(list) + 1, setiap raise/post dikirim"""
+    notifications, sent, ids = [], 0, set()
+    for _, action, key in stream:
+        if action == 'clear':
+            notifications = [n for n in notifications if n['key'] != key]
+            continue
+        notification = {'id': len(notifications) + 1, 'key': key}
+        notifications.append(notification)
+        del notifications[:-10]
+        sent += 1
+        ids.add(notification['id'])
+    return sent, len(ids)
+
+
+def center(stream, min_interval):
+    clock = FakeClock()
+    notices = NotificationCenter(min_interval=min_interval, clock=clock)
+    for t, action, key in stream:
+        clock.now = t
+        if action == 'clear':
+            notices.resolve(key)
+        else:
+            notices.post(key, {'message': key}, sticky=action == 'raise')
+    return notices
+
+
+if __name__ == '__main__':
+    flap_every = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    stream = events(flap_every)
+    print(f"{len(stream):,} event dalam 1 hari (lampu berkedip tiap {flap_every:g} s, 5 ruangan)")
+    sent, unique = legacy(stream)
+    print(f"lama          : {sent:>7,} notifikasi terkirim, hanya {unique} ID berbeda")
+    for min_interval in (30, 300):
+        notices = center(stream, min_interval)
+        stats = notices.status()
+        print(f"min {min_interval:>4} s    : {stats['sent']:>7,} terkirim  {stats['rate_limited']:>7,} ditahan  "
+              f"ID {stats['last_id'] - stats['sent'] + 1}..{stats['last_id']}")
+
+    notices = NotificationCenter(feed_capacity=500, min_interval=0)
+    n = 100000
+    start = time.perf_counter()
+    for i in range(n):
+        notices.post(i, {'message': 'x'})
+    post_us = (time.perf_counter() - start) / n * 1e6
+    last = notices.last_id
+    start = time.perf_counter()
+    for _ in range(n):
+        notices.since(last - 3)
+    since_us = (time.perf_counter() - start) / n * 1e6
+    print(f"post {post_us:.2f} µs/op   since (3 baru) {since_us:.2f} µs/op")
@@ -0,0 +1,50 @@
+"""Per-poll /api/rooms: jsonify dict penuh (lama) vs body pra-encode + state ringkas + gzip
+
+Jalankan: python benchmarks/bench_payloads.py [jumlah_ruangan] [jumlah_poll]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask, jsonify
+
+from http_cache import EncodedBody
+from slot_table import SlotTable
+
+app = Flask(__name__)
+
+
+def per_poll(fn, polls, headers=None):
+    with app.test_request_context(headers=headers or {}):
+        start = time.perf_counter()
+        for _ in range(polls):
+            response = fn()
+        elapsed = (time.perf_counter() - start) / polls * 1e6
+        return elapsed, len(response.get_data())
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(1)
+    table = SlotTable({f'kamar{i}': {'name': f'Kamar {i}', 'icon': '💡', 'light': rng.random() < 0.3,
+                                     'occupied': rng.random() < 0.5} for i in range(n)}, ('light', 'occupied'))
+    view = table.view()
+    full = EncodedBody(view)
+    live = EncodedBody({'version': 1, 'rooms': table.live()})
+
+    rows = [
+        ('jsonify dict penuh (lama)', lambda: jsonify(view), None),
+        ('pra-encode dict penuh', full.response, None),
+        ('pra-encode state ringkas', live.response, None),
+        ('state ringkas + gzip', live.response, {'Accept-Encoding': 'gzip'}),
+        ('If-None-Match cocok (304)', live.response, {'If-None-Match': live.etag}),
+    ]
+    print(f"{n:,} ruangan, {polls} poll")
+    print(f"{'':28} {'us/poll':>10} {'byte':>10}")
+    for label, fn, headers in rows:
+        us, size = per_poll(fn, polls, headers)
+        print(f"{label:28} {us:>10,.1f} {size:>10,}")
@@ -0,0 +1,74 @@
+"""Dict-of-dicts vs SlotTable untuk state ruangan: memori, hitung active_lights, encode JSON
+
+Jalankan: python benchmarks/bench_slot_table.py [jumlah_ruangan]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from slot_table import SlotTable
+
+
+def make_template(n, rng):
+    return {f'kamar{i}': {'name': f'Kamar {i}', 'light': rng.random() < 0.3, 'occupied': rng.random() < 0.5}
+            for i in range(n)}
+
+
+def measure(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(1)
+    template = make_template(n, rng)
+
+    rooms, dict_bytes = measure(lambda: json.loads(json.dumps(template)))
+    table, table_bytes = measure(lambda: SlotTable(template, ('light', 'occupied')))
+    repeat = max(10, 200000 // n)
+
+    count_dict = timeit(lambda: sum(1 for r in rooms.values() if r['light']), repeat)
+    count_table = timeit(lambda: table.count('light'), repeat)
+    assert sum(1 for r in rooms.values() if r['light']) == table.count('light')
+
+    ids = list(template)
+
+    def flip_and_count_dict():
+        room = rooms[rng.choice(ids)]
+        room['light'] = not room['light']
+        return sum(1 for r in rooms.values() if r['light'])
+
+    def flip_and_count_table():
+        room_id = rng.choice(ids)
+        table.set(room_id, 'light', not table.get(room_id, 'light'))
+        return table.count('light')
+
+    flip_dict = timeit(flip_and_count_dict, repeat)
+    flip_table = timeit(flip_and_count_table, repeat)
+    dumps_dict = timeit(lambda: json.dumps(rooms, separators=(',', ':'), ensure_ascii=False).encode(),
+                        max(3, repeat // 10))
+    dumps_table = timeit(table.encode, max(3, repeat // 10))
+    assert json.loads(table.encode()) == table.view()
+
+    print(f"{n:,} ruangan")
+    print(f"{'':24} {'dict':>12} {'SlotTable':>12}")
+    print(f"{'memori (KB)':24} {dict_bytes / 1024:>12,.0f} {table_bytes / 1024:>12,.0f}  (SlotTable: metadata + kolom)")
+    print(f"{'active_lights (us)':24} {count_dict:>12,.1f} {count_table:>12,.1f}")
+    print(f"{'toggle + hitung (us)':24} {flip_dict:>12,.1f} {flip_table:>12,.1f}")
+    print(f"{'encode JSON (us)':24} {dumps_dict:>12,.1f} {dumps_table:>12,.1f}  (SlotTable: langsung dari kolom)")
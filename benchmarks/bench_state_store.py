@@ -0,0 +1,114 @@
+"""Stress test StateStore: publisher MQTT paralel vs pembaca HTTP
+
+Mengukur latensi on_message (thread MQTT), latensi GET /api/snapshot dan /api/rooms,
+serta konsistensi: active_lights/active_devices di status harus cocok dengan isi
+rooms/devices dalam response yang sama.
+
+Jalankan: python benchmarks/bench_state_store.py [detik] [publisher] [reader]
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+os.environ.setdefault('MQTT_ENABLED', '0')
+os.environ.setdefault('JOURNAL_DIR', '')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+
+
+class FakeClient:
+    def publish(self, topic, payload, *args, **kwargs):
+        pass
+
+    def subscribe(self, *args, **kwargs):
+        return 0, 1
+
+
+class Message:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload.encode()
+
+
+def make_messages():
+    messages = []
+    for room in app.rooms:
+        messages += [Message(f'smarthome/deteksi/{room}', v) for v in '01']
+        messages += [Message(f'smarthome/{room}/lampu', v) for v in ('lampu/nyala', 'lampu/mati')]
+    for dev, topic_dev in [('mesinCuci', 'mesinCuci'), ('pompa_air', 'pompa'),
+                           ('kompor', 'kompor'), ('kulkas', 'kulkas')]:
+        messages += [Message(f'smarthome/dapur/{topic_dev}', f'{topic_dev}/{v}') for v in ('nyala', 'mati')]
+    return messages
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def publisher(client, messages, stop, latencies):
+    rng = random.Random()
+    while not stop.is_set():
+        msg = rng.choice(messages)
+        start = time.perf_counter()
+        # Langsung ke jalur penerapan (bukan antrian ingest) supaya penulis benar-benar paralel
+        app.apply_message(msg.topic, client, msg.payload.decode())
+        latencies.append(time.perf_counter() - start)
+
+
+def reader(stop, latencies, violations):
+    http = app.app.test_client()
+    while not stop.is_set():
+        for url in ('/api/snapshot', '/api/rooms'):
+            start = time.perf_counter()
+            response = http.get(url)
+            latencies.append(time.perf_counter() - start)
+            if url == '/api/snapshot':
+                data = json.loads(response.data)
+                lights = sum(1 for r in data['rooms'].values() if r['light'])
+                active = sum(1 for d in data['devices'].values() if d['status'])
+                if (data['status']['active_lights'], data['status']['active_devices']) != (lights, active):
+                    violations.append(data['version'])
+
+
+if __name__ == '__main__':
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_publishers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    n_readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    client = FakeClient()
+    app.client = client   # publish lock dari OccupancyAggregator
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.on_connect(client, None, None, 0)
+    messages = make_messages()
+
+    stop = threading.Event()
+    pub_latencies, read_latencies, violations = [], [], []
+    threads = [threading.Thread(target=publisher, args=(client, messages, stop, pub_latencies))
+               for _ in range(n_publishers)]
+    threads += [threading.Thread(target=reader, args=(stop, read_latencies, violations))
+                for _ in range(n_readers)]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in threads:
+            t.join()
+
+    print(f"{n_publishers} publisher, {n_readers} reader, {duration:.0f} s")
+    print(f"on_message : {len(pub_latencies) / duration:>10,.0f} msg/s  "
+          f"p50 {percentile(pub_latencies, 0.5):.3f} ms  p99 {percentile(pub_latencies, 0.99):.3f} ms")
+    print(f"HTTP GET   : {len(read_latencies) / duration:>10,.0f} req/s  "
+          f"p50 {percentile(read_latencies, 0.5):.3f} ms  p99 {percentile(read_latencies, 0.99):.3f} ms")
+    print(f"snapshot tidak konsisten: {len(violations)}")
@@ -0,0 +1,83 @@
+"""Micro-benchmark dispatch on_message: scan rooms x devices (lama) vs TopicRouter (baru)
+
+Keduanya memanggil handler asli app.py untuk rumah default; yang berbeda hanya cara mencari
+handler. Router yang diukur adalah hasil app.build_topic_router().
+
+Jalankan: python benchmarks/bench_topic_router.py [jumlah_pesan]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('MQTT_ENABLED', '0')
+os.environ['JOURNAL_DIR'] = ''
+
+import app
+
+# Rekaman topik dari ESP (PIR + monitoring device), diputar ulang berkali-kali
+RECORDED = [
+    ('smarthome/deteksi/kamar1', '1'),
+    ('smarthome/deteksi/kamar1', '0'),
+    ('smarthome/deteksi/kamar2', '1'),
+    ('smarthome/deteksi/jemuran', '1'),
+    ('smarthome/deteksi/dapur', '0'),
+    ('smarthome/kamar1/lampu', 'lampu/nyala'),
+    ('smarthome/kamar3/lampu', 'lampu/mati'),
+    ('smarthome/jemuran/lampu', 'lampu/nyala'),
+    ('smarthome/dapur/kompor', 'kompor/nyala'),
+    ('smarthome/dapur/kulkas', 'kulkas/nyala'),
+    ('smarthome/jemuran/pompa', 'pompa/nyala'),
+    ('smarthome/jemuran/mesinCuci', 'mesinCuci/mati'),
+]
+
+
+class FakeClient:
+    def publish(self, topic, payload):
+        pass
+
+
+def make_old_dispatch(house):
+    """Pencarian handler versi lama (scan f-string per pesan), lalu handler yang sama"""
+    def on_message(client, topic, payload):
+        for room in app.rooms:
+            if topic == f"smarthome/deteksi/{room}":
+                slot = 'ruang_cuci' if room == 'jemuran' else room
+                app.handle_presence(client, payload, house, room, slot)
+                return
+        for room in app.rooms:
+            for dev in app.devices:
+                topic_dev = 'pompa' if dev == 'pompa_air' else dev
+                if topic == f"smarthome/{room}/{topic_dev}":
+                    if dev == 'lampu':
+                        app.handle_light(client, payload, house, 'ruang_cuci' if room == 'jemuran' else room)
+                    else:
+                        app.handle_device(client, payload, house, dev, f'{topic_dev}/nyala')
+                    return
+    return on_message
+
+
+def make_new_dispatch(house):
+    router = app.build_topic_router()
+    return lambda client, topic, payload: router.dispatch(topic, client, payload)
+
+
+def run(name, factory, messages):
+    house = app.houses.get(app.DEFAULT_HOUSE)
+    dispatch = factory(house)
+    client = FakeClient()
+    start = time.perf_counter()
+    for topic, payload in messages:
+        dispatch(client, topic, payload)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<8} {len(messages) / elapsed:>12,.0f} msg/s  "
+          f"{elapsed / len(messages) * 1e9:>8.0f} ns/msg")
+    return house.state.table('rooms').rows(), house.state.table('devices').rows()
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    messages = (RECORDED * (count // len(RECORDED) + 1))[:count]
+    old_state = run('lama', make_old_dispatch, messages)
+    new_state = run('router', make_new_dispatch, messages)
+    assert old_state == new_state, 'state akhir berbeda antara dispatch lama dan baru'
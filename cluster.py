@@ -0,0 +1,166 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ChangeLog:
+    """Log perubahan bersama antar proses worker: file JSONL append-only di satu direktori
+
+    Setiap penulis menambah satu baris di bawah flock, jadi urutan baris adalah urutan
+    global yang sama untuk semua worker. Direktori cukup di tmpfs (mis. /dev/shm/smarthome);
+    untuk uji cukup direktori sementara. Leader merotasi file: baris pertama file baru
+    adalah snapshot state penuh, sehingga worker baru cukup membaca satu file dari awal.
+    """
+
+    def __init__(self, directory, max_bytes=8 << 20):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, 'changes.jsonl')
+        self.max_bytes = max_bytes
+        self.lock_fd = os.open(os.path.join(directory, 'changes.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        # flock berlaku per proses (open file description), antar thread perlu lock sendiri
+        self.lock = threading.Lock()
+        self.fd = None
+
+    @contextmanager
+    def locked(self):
+        """Eksklusif terhadap penulis di thread lain maupun proses lain"""
+        with self.lock:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    def append(self, record):
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        with self.locked():
+            if self.fd is None or self.rotated(self.fd):
+                self.reopen()
+            os.write(self.fd, line)
+
+    def reopen(self):
+        if self.fd is not None:
+            os.close(self.fd)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def rotated(self, fd):
+        """True kalau path sudah menunjuk file lain (dirotasi) dari fd ini"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    def rotate(self, first_record):
+        """Ganti file secara atomik dengan file baru berisi first_record (panggil di dalam locked())"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(first_record, separators=(',', ':')) + '\n')
+        os.replace(tmp_path, self.path)
+        self.reopen()
+
+    def size(self):
+        try:
+            return os.stat(self.path).st_size
+        except FileNotFoundError:
+            return 0
+
+
+class LeaderLock:
+    """Pemilihan satu proses ingest: siapa yang memegang flock non-blocking adalah leader
+
+    Kernel melepas flock saat proses mati, jadi worker lain bisa mengambil alih.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(os.path.join(directory, 'leader.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        self.held = False
+
+    def try_acquire(self):
+        if not self.held:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            os.ftruncate(self.fd, 0)
+            os.write(self.fd, str(os.getpid()).encode())
+            self.held = True
+        return True
+
+
+class ChangeFollower:
+    """Tail ChangeLog di thread sendiri dan terapkan setiap record secara berurutan
+
+    Record milik worker sendiri ikut diterapkan (idempotent), sehingga semua worker berakhir
+    di urutan yang sama. on_tick dipanggil setiap putaran (pemilihan leader, rotasi).
+    """
+
+    def __init__(self, changes, apply, on_tick=None, interval=0.02, logger=None):
+        self.changes = changes
+        self.apply = apply
+        self.on_tick = on_tick
+        self.interval = interval
+        self.logger = logger
+        self.file = None
+        self.partial = b''
+        self.stats = {'applied': 0, 'failed': 0, 'rotations': 0}
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='cluster-follower', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while self.running:
+            self.poll()
+            if self.on_tick is not None:
+                self.on_tick()
+            time.sleep(self.interval)
+
+    def poll(self):
+        """Terapkan semua record baru; pindah ke file baru setelah file lama habis dibaca"""
+        if self.file is None:
+            try:
+                self.file = open(self.changes.path, 'rb')
+            except FileNotFoundError:
+                return
+        while True:
+            self.read_available()
+            if not self.changes.rotated(self.file.fileno()):
+                return
+            # Baris yang ditambahkan sebelum rotasi masih ada di file lama
+            self.read_available()
+            self.file.close()
+            self.file = None
+            self.partial = b''
+            self.stats['rotations'] += 1
+            try:
+                self.file = open(self.changes.path, 'rb')
+            except FileNotFoundError:
+                return
+
+    def read_available(self):
+        data = self.file.read()
+        if not data:
+            return
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()   # baris terakhir belum lengkap (penulis belum selesai)
+        for line in lines:
+            try:
+                self.apply(json.loads(line))
+                self.stats['applied'] += 1
+            except Exception:
+                self.stats['failed'] += 1
+                if self.logger is not None:
+                    self.logger.exception("Gagal menerapkan record cluster")
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+
+class CommandPublisher:
+    """Antrian perintah MQTT keluar dengan thread publisher sendiri
+
+    Perintah ke topik yang sama dalam satu jendela (window) digabung (yang terakhir menang),
+    lalu semuanya dipublish sekaligus dengan QoS 1. PUBACK dilacak lewat on_publish.
+    """
+
+    def __init__(self, client, window=0.02, qos=1):
+        self.client = client
+        self.window = window
+        self.qos = qos
+        self.pending = {}      # topic -> payload (urutan masuk dipertahankan)
+        self.inflight = {}     # mid -> (topic, waktu kirim)
+        self.early_acks = set()
+        self.cond = threading.Condition()
+        # Jangan pernah dipegang saat memanggil paho (on_publish jalan sambil memegang mutex paho)
+        self.ack_lock = threading.Lock()
+        self.stats = {'queued': 0, 'coalesced': 0, 'published': 0, 'acked': 0, 'failed': 0, 'dropped': 0}
+        self.last_ack_ms = None
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='command-publisher', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def enqueue(self, topic, payload):
+        """Non-blocking, dipanggil dari thread request"""
+        with self.cond:
+            if topic in self.pending:
+                self.stats['coalesced'] += 1
+                del self.pending[topic]   # pindah ke belakang, nilai terbaru
+            self.pending[topic] = payload
+            self.stats['queued'] += 1
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.running and not self.pending:
+                    return
+            # Tunggu satu jendela supaya perintah beruntun bisa digabung
+            time.sleep(self.window)
+            with self.cond:
+                batch, self.pending = self.pending, {}
+            self.publish(batch)
+
+    def publish(self, batch):
+        for topic, payload in batch.items():
+            if not self.client.is_connected():
+                # Jangan dititipkan ke antrian paho: perintah (mis. kompor nyala) yang baru
+                # terkirim berjam-jam kemudian setelah reconnect lebih berbahaya daripada gagal
+                self.stats['dropped'] += 1
+                continue
+            sent_at = time.perf_counter()
+            info = self.client.publish(topic, payload, qos=self.qos)
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                self.stats['failed'] += 1
+                continue
+            self.stats['published'] += 1
+            if not self.qos:
+                continue
+            with self.ack_lock:
+                if info.mid in self.early_acks:
+                    self.early_acks.discard(info.mid)
+                    self.record_ack(sent_at)
+                else:
+                    self.inflight[info.mid] = (topic, sent_at)
+
+    def acked(self, mid):
+        """Dipanggil dari on_publish (PUBACK untuk QoS 1)"""
+        with self.ack_lock:
+            sent = self.inflight.pop(mid, None)
+            if sent is None:
+                # PUBACK lebih cepat dari pencatatan inflight, atau publish lain (QoS 0)
+                # di client yang sama; dibatasi supaya yang terakhir tidak menumpuk
+                if len(self.early_acks) >= 1024:
+                    self.early_acks.clear()
+                self.early_acks.add(mid)
+            else:
+                self.record_ack(sent[1])
+
+    def record_ack(self, sent_at):
+        self.stats['acked'] += 1
+        self.last_ack_ms = round((time.perf_counter() - sent_at) * 1000, 1)
+
+    def status(self):
+        return dict(self.stats, pending=len(self.pending), inflight=len(self.inflight),
+                    last_ack_ms=self.last_ack_ms)
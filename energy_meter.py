@@ -0,0 +1,48 @@
+import threading
+
+
+class EnergyMeter:
+    """Total daya dijaga inkremental: saat beban berubah status, dayanya ditambah/dikurangi
+
+    Subtotal per ruangan dan per kategori dijaga dengan cara yang sama, jadi membaca
+    total maupun subtotal selalu O(1), berapa pun jumlah beban terpasang.
+    """
+
+    def __init__(self):
+        self.loads = {}          # load_id -> [power, room, category, on]
+        self.total = 0
+        self.by_room = {}
+        self.by_category = {}
+        self.lock = threading.Lock()
+
+    def add_load(self, load_id, power, room=None, category=None, on=False):
+        with self.lock:
+            if load_id in self.loads:
+                raise ValueError(f"Beban '{load_id}' sudah terdaftar")
+            self.loads[load_id] = [power, room, category, False]
+            if room is not None:
+                self.by_room.setdefault(room, 0)
+            if category is not None:
+                self.by_category.setdefault(category, 0)
+        if on:
+            self.set(load_id, True)
+
+    def set(self, load_id, on):
+        """Ubah status beban; kembalikan perubahan daya (0 kalau status tidak berubah)"""
+        with self.lock:
+            load = self.loads[load_id]
+            if load[3] == on:
+                return 0
+            load[3] = on
+            delta = load[0] if on else -load[0]
+            self.total += delta
+            if load[1] is not None:
+                self.by_room[load[1]] += delta
+            if load[2] is not None:
+                self.by_category[load[2]] += delta
+            return delta
+
+    def recompute(self):
+        """Hitung ulang dari nol (O(n)); hanya untuk verifikasi"""
+        with self.lock:
+            return sum(power for power, _, _, on in self.loads.values() if on)
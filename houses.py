@@ -0,0 +1,64 @@
+import copy
+import threading
+
+from presence import PresenceIndex
+from ringbuffer import RingBuffer
+from slot_table import SlotTable
+from state_store import StateStore
+from stream import EventBroker
+
+
+class House:
+    """State satu properti: house_data, hunian, log, versi, stream SSE dan journal sendiri"""
+
+    def __init__(self, house_id, template, topic_prefix, log_capacity, tables=None):
+        self.id = house_id
+        self.topic_prefix = topic_prefix      # mis. smarthome/<house_id>
+        self.lock_topic = f"{topic_prefix}/lock"
+        self.command_topics = {}              # (room, device) -> topik perintah
+        data = copy.deepcopy(template)
+        # Section panas (mis. rooms/devices) disimpan ringkas sebagai SlotTable: section -> flag
+        for section, flags in (tables or {}).items():
+            data[section] = SlotTable(data[section], flags)
+        self.state = StateStore(data)
+        self.occupancy = None
+        self.presence = PresenceIndex(data['rooms'])   # riwayat hunian per ruangan
+        self.logs = RingBuffer(log_capacity)
+        self.broker = EventBroker()
+        self.version = 0
+        self.snapshot_cache = None            # EncodedBody /api/snapshot versi terakhir
+        self.live_cache = None                # EncodedBody /api/state versi terakhir
+        self.section_cache = {}               # section -> (versi table, EncodedBody)
+        self.meta_body = None                 # EncodedBody metadata statis
+        self.journal = None
+        self.anomalies = None
+        self.notices = None                   # NotificationCenter (ID, dedup, rate limit)
+        self.anomaly_lock = threading.Lock()
+
+
+class HouseRegistry:
+    """Daftar rumah, lookup O(1) berdasarkan house_id"""
+
+    def __init__(self, default_id):
+        self.default_id = default_id
+        self.houses = {}
+
+    def add(self, house):
+        if house.id in self.houses:
+            raise ValueError(f"Rumah '{house.id}' sudah terdaftar")
+        self.houses[house.id] = house
+        return house
+
+    def get(self, house_id=None):
+        """None = rumah default (route /api/... lama)"""
+        return self.houses.get(self.default_id if house_id is None else house_id)
+
+    @property
+    def default(self):
+        return self.houses[self.default_id]
+
+    def __iter__(self):
+        return iter(self.houses.values())
+
+    def __len__(self):
+        return len(self.houses)
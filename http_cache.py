@@ -0,0 +1,51 @@
+import gzip
+import hashlib
+import json
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # opsional: tanpa paket brotli hanya gzip
+    brotli = None
+
+
+class EncodedBody:
+    """Body JSON yang di-encode sekali; varian gzip/br dibuat saat pertama kali diminta
+
+    Dipakai ulang oleh semua request selama datanya belum berubah, jadi per request
+    tinggal cek ETag dan memilih varian sesuai Accept-Encoding.
+    """
+
+    MIN_COMPRESS = 512   # body kecil tidak sepadan dikompres
+
+    def __init__(self, data, etag=None, raw=None):
+        """raw = JSON yang sudah di-encode pemanggil (mis. SlotTable.encode); data diabaikan"""
+        self.raw = raw if raw is not None else json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+        self.digest = hashlib.sha256(self.raw).hexdigest()[:16]
+        self.etag = etag or f'"{self.digest}"'
+        self.variants = {'identity': self.raw}
+
+    def encodings(self):
+        if len(self.raw) < self.MIN_COMPRESS:
+            return ['identity']
+        return (['br'] if brotli is not None else []) + ['gzip', 'identity']
+
+    def encoded(self, encoding):
+        body = self.variants.get(encoding)
+        if body is None:
+            if encoding == 'br':
+                body = brotli.compress(self.raw, quality=5)
+            else:
+                body = gzip.compress(self.raw, 6, mtime=0)
+            self.variants[encoding] = body
+        return body
+
+    def response(self, cache_control='no-cache'):
+        headers = {'ETag': self.etag, 'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+        if request.headers.get('If-None-Match') == self.etag:
+            return Response(status=304, headers=headers)
+        encoding = request.accept_encodings.best_match(self.encodings(), default='identity')
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.encoded(encoding), mimetype='application/json', headers=headers)
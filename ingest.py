@@ -0,0 +1,76 @@
+import threading
+
+
+class IngestQueue:
+    """Antrian pesan MQTT masuk: callback paho hanya menitipkan, worker yang menerapkan
+
+    Nilai untuk topik yang sama digabung (yang terakhir menang), jadi saat burst (mis. semua
+    node ESP reconnect bersamaan) yang diterapkan hanya state terbaru per topik. Kapasitas
+    dihitung per topik berbeda; kalau penuh, pesan topik baru dibuang dan dihitung,
+    put() tidak pernah blocking.
+    """
+
+    def __init__(self, apply, capacity=4096, logger=None):
+        self.apply = apply         # fn(topic, client, payload), dipanggil di thread worker
+        self.capacity = capacity
+        self.logger = logger
+        self.pending = {}          # topic -> (client, payload), urutan masuk dipertahankan
+        self.cond = threading.Condition()
+        self.stats = {'received': 0, 'coalesced': 0, 'dropped': 0, 'applied': 0, 'failed': 0}
+        self.high_water = 0
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='mqtt-ingest', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Terapkan sisa antrian lalu hentikan worker"""
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def put(self, topic, client, payload):
+        """Non-blocking, dipanggil dari thread/loop paho"""
+        with self.cond:
+            self.stats['received'] += 1
+            if topic in self.pending:
+                self.stats['coalesced'] += 1
+                del self.pending[topic]   # pindah ke belakang, nilai terbaru
+            elif len(self.pending) >= self.capacity:
+                self.stats['dropped'] += 1
+                return False
+            self.pending[topic] = (client, payload)
+            if len(self.pending) > self.high_water:
+                self.high_water = len(self.pending)
+            self.cond.notify()
+        return True
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                batch, self.pending = self.pending, {}
+            for topic, (client, payload) in batch.items():
+                try:
+                    self.apply(topic, client, payload)
+                    self.stats['applied'] += 1
+                except Exception:
+                    # Satu payload rusak tidak boleh mematikan worker
+                    self.stats['failed'] += 1
+                    if self.logger is not None:
+                        self.logger.exception("Gagal menerapkan pesan %s", topic)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def status(self):
+        return dict(self.stats, depth=len(self.pending), high_water=self.high_water)
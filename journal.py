@@ -0,0 +1,130 @@
+import json
+import os
+import queue
+import threading
+import time
+
+
+class Journal:
+    """Journal JSONL append-only + snapshot terkompaksi, ditulis oleh thread background
+
+    Record bersifat idempotent (set nilai satu bagian state), jadi replay record yang
+    sudah tercakup di snapshot tetap menghasilkan state yang sama.
+    """
+
+    def __init__(self, directory, snapshot_fn, fsync_interval=1.0, compact_every=5000):
+        self.directory = directory
+        self.snapshot_fn = snapshot_fn          # dipanggil dari thread writer saat kompaksi
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.journal_path = os.path.join(directory, 'journal.jsonl')
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        self.queue = queue.SimpleQueue()
+        self.seq = 0
+        self.since_snapshot = 0
+        self.dirty = False
+        self.last_sync = time.monotonic()
+        self.file = None
+        self.thread = None
+
+    def load(self):
+        """Kembalikan (snapshot atau None, [record setelah snapshot]) untuk rebuild state"""
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.seq = snapshot['seq']
+
+        records = []
+        if os.path.exists(self.journal_path):
+            good = 0   # offset byte setelah baris utuh terakhir
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # baris terakhir terpotong (crash saat menulis)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    good += len(line)
+                    if record['seq'] > self.seq:
+                        records.append(record)
+                        self.seq = record['seq']
+            if good < os.path.getsize(self.journal_path):
+                # Buang sisa baris terpotong, supaya record baru tidak menempel di belakangnya
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good)
+        self.since_snapshot = len(records)
+        return snapshot, records
+
+    def start(self):
+        self.file = open(self.journal_path, 'a', encoding='utf-8')
+        self.thread = threading.Thread(target=self.run, name='journal-writer', daemon=True)
+        self.thread.start()
+
+    def append(self, op, data):
+        """Non-blocking: hanya masuk antrian, penulisan + fsync di thread writer"""
+        self.queue.put((op, data))
+
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.fsync_interval if self.dirty else None)
+            except queue.Empty:
+                self.sync()
+                continue
+
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            self.write([entry for entry in batch if entry is not None])
+            if stop:
+                self.sync()
+                self.file.close()
+                return
+            if time.monotonic() - self.last_sync >= self.fsync_interval:
+                self.sync()
+            if self.since_snapshot >= self.compact_every:
+                self.compact()
+
+    def write(self, batch):
+        lines = []
+        for op, data in batch:
+            self.seq += 1
+            lines.append(json.dumps({'seq': self.seq, 'op': op, 'data': data},
+                                    separators=(',', ':')) + '\n')
+        self.file.write(''.join(lines))
+        self.file.flush()
+        self.since_snapshot += len(batch)
+        self.dirty = True
+
+    def sync(self):
+        if self.dirty:
+            os.fsync(self.file.fileno())
+            self.dirty = False
+        self.last_sync = time.monotonic()
+
+    def compact(self):
+        """Tulis snapshot (atomik via rename), lalu kosongkan journal"""
+        self.sync()
+        snapshot = {'seq': self.seq, 'state': self.snapshot_fn()}
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self.file.truncate(0)
+        self.since_snapshot = 0
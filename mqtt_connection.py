@@ -0,0 +1,74 @@
+import os
+import time
+
+
+class MqttConnection:
+    """Koneksi broker dikelola thread paho: connect_async + reconnect exponential backoff"""
+
+    def __init__(self, client, host, port=1883, keepalive=60, min_delay=1, max_delay=60):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.started_at = None
+        self.connected_at = None
+        self.connect_count = 0
+        self.disconnected_at = None
+        self.subscribe_mid = None
+        self.subscribe_started = None
+        self.subscribe_ms = None     # CONNACK -> SUBACK terakhir
+        self.reconnect_ms = None     # putus -> SUBACK (fully subscribed) terakhir
+
+    @classmethod
+    def from_env(cls, client, default_host):
+        """Konfigurasi dari MQTT_BROKER, MQTT_PORT, MQTT_KEEPALIVE, MQTT_RECONNECT_MIN/MAX"""
+        return cls(
+            client,
+            os.environ.get('MQTT_BROKER', default_host),
+            int(os.environ.get('MQTT_PORT', 1883)),
+            int(os.environ.get('MQTT_KEEPALIVE', 60)),
+            int(os.environ.get('MQTT_RECONNECT_MIN', 1)),
+            int(os.environ.get('MQTT_RECONNECT_MAX', 60)),
+        )
+
+    def start(self):
+        """Tidak pernah blocking: TCP connect dan retry berjalan di thread loop paho"""
+        self.started_at = time.perf_counter()
+        self.client.reconnect_delay_set(self.min_delay, self.max_delay)
+        self.client.connect_async(self.host, self.port, self.keepalive)
+        self.client.loop_start()
+
+    def stop(self):
+        self.client.disconnect()
+        self.client.loop_stop()
+
+    def mark_connected(self):
+        """Dipanggil dari on_connect; kembalikan ms sejak start() (None kalau bukan koneksi pertama)"""
+        self.connect_count += 1
+        if self.connected_at is None and self.started_at is not None:
+            self.connected_at = time.perf_counter()
+            return (self.connected_at - self.started_at) * 1000
+        return None
+
+    def mark_disconnected(self):
+        if self.disconnected_at is None:
+            self.disconnected_at = time.perf_counter()
+
+    def subscribe(self, filters, qos=0):
+        """Semua filter dalam satu paket SUBSCRIBE; latensi dicatat saat SUBACK"""
+        self.subscribe_started = time.perf_counter()
+        result, self.subscribe_mid = self.client.subscribe([(f, qos) for f in filters])
+        return result
+
+    def mark_subscribed(self, mid):
+        """Dipanggil dari on_subscribe; True kalau ini SUBACK dari subscribe() terakhir"""
+        if mid != self.subscribe_mid:
+            return False
+        now = time.perf_counter()
+        self.subscribe_ms = round((now - self.subscribe_started) * 1000, 1)
+        if self.disconnected_at is not None:
+            self.reconnect_ms = round((now - self.disconnected_at) * 1000, 1)
+            self.disconnected_at = None
+        return True
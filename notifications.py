@@ -0,0 +1,120 @@
+import threading
+import time
+
+from ringbuffer import RingBuffer
+
+
+class NotificationCenter:
+    """Notifikasi satu rumah: ID naik terus, dedup per key dan rate limit per key
+
+    Setiap notifikasi punya key (mis. 'light_on_empty:kamar1' atau isi pesannya). Key yang
+    masih aktif tidak dikirim ulang; key yang muncul lagi kurang dari min_interval detik
+    setelah kemunculan terakhirnya tidak mendapat ID baru (anomali yang berkedip muncul lagi
+    dengan ID lamanya dan hitungan 'count' naik). Semua notifikasi yang benar-benar dikirim
+    masuk feed RingBuffer dengan seq = ID, untuk /api/notifications?since=.
+
+    Waktu memakai jam dinding (bisa dibawa record cluster lewat now), supaya semua worker yang
+    menerapkan record yang sama dengan urutan yang sama mengambil keputusan yang sama.
+    """
+
+    def __init__(self, capacity=10, feed_capacity=500, min_interval=30.0, first_id=1,
+                 clock=time.time):
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self.clock = clock
+        self.feed = RingBuffer(feed_capacity, first_id)
+        self.active = {}        # key -> notifikasi anomali yang sedang aktif
+        self.recent = []        # notifikasi biasa terakhir (maks capacity)
+        self.sent = {}          # key -> (waktu kirim, notifikasi) untuk rate limit
+        self.lock = threading.Lock()
+        self.stats = {'sent': 0, 'deduplicated': 0, 'rate_limited': 0, 'resolved': 0}
+
+    def post(self, key, notification, sticky=False, now=None):
+        """Kirim notifikasi; sticky = tetap tampil sampai resolve(key)
+
+        Hasilnya notifikasi baru, notifikasi lama yang 'count'-nya naik (kalau masih tampil,
+        perlu di-push ulang), atau None kalau ditahan tanpa perubahan yang terlihat.
+        """
+        now = self.clock() if now is None else now
+        with self.lock:
+            if key in self.active:
+                self.stats['deduplicated'] += 1
+                return None
+            last = self.sent.get(key)
+            if last is not None and now - last[0] < self.min_interval:
+                self.stats['rate_limited'] += 1
+                previous = last[1]
+                # Jendela bergeser: sensor yang terus berkedip tetap satu notifikasi
+                self.sent[key] = (now, previous)
+                previous['count'] = previous.get('count', 1) + 1
+                if sticky:
+                    self.active[key] = previous
+                    return previous
+                return previous if any(n is previous for n in self.recent) else None
+            notification['key'] = key
+            notification['id'] = self.feed.append(notification)
+            self.sent[key] = (now, notification)
+            if sticky:
+                self.active[key] = notification
+            else:
+                self.recent.append(notification)
+                del self.recent[:-self.capacity]
+            self.stats['sent'] += 1
+            if len(self.sent) > 4 * self.feed.capacity:
+                self.sent = {k: v for k, v in self.sent.items() if now - v[0] < self.min_interval}
+            return notification
+
+    def resolve(self, key):
+        """Anomali selesai: hilang dari daftar, boleh dikirim lagi setelah min_interval"""
+        with self.lock:
+            if self.active.pop(key, None) is None:
+                return False
+            self.stats['resolved'] += 1
+            return True
+
+    def clear(self):
+        """Hapus notifikasi biasa; anomali aktif tetap tampil sampai kondisinya hilang"""
+        with self.lock:
+            self.recent = []
+
+    def visible(self):
+        """Daftar untuk dashboard, urut ID"""
+        with self.lock:
+            return sorted([*self.active.values(), *self.recent], key=lambda n: n['id'])
+
+    def dump(self):
+        """State lengkap untuk snapshot cluster: worker baru melanjutkan ID dan rate limit yang sama"""
+        with self.lock:
+            feed = self.feed.since(0)
+            items = {n['id']: n for n in [*feed, *self.active.values(), *self.recent,
+                                          *(n for _, n in self.sent.values())]}
+            return {
+                'next_id': self.feed.next_seq,
+                'items': list(items.values()),
+                'feed': [n['id'] for n in feed],
+                'active': {key: n['id'] for key, n in self.active.items()},
+                'recent': [n['id'] for n in self.recent],
+                'sent': {key: [t, n['id']] for key, (t, n) in self.sent.items()},
+            }
+
+    def load(self, state):
+        items = {n['id']: dict(n) for n in state['items']}
+        feed = RingBuffer(self.feed.capacity, state['feed'][0] if state['feed'] else state['next_id'])
+        for notification_id in state['feed']:
+            feed.append(items[notification_id], seq=notification_id)
+        feed.next_seq = state['next_id']
+        with self.lock:
+            self.feed = feed
+            self.active = {key: items[i] for key, i in state['active'].items()}
+            self.recent = [items[i] for i in state['recent']]
+            self.sent = {key: (t, items[i]) for key, (t, i) in state['sent'].items()}
+
+    def since(self, notification_id=0, limit=None):
+        return self.feed.since(notification_id, limit)
+
+    @property
+    def last_id(self):
+        return self.feed.last_seq
+
+    def status(self):
+        return dict(self.stats, active=len(self.active), last_id=self.last_id)
@@ -0,0 +1,78 @@
+import threading
+
+
+class OccupancyAggregator:
+    """Hunian rumah dari PIR per ruangan dengan hitungan ruangan terisi yang berjalan
+
+    on_change(occupied) hanya dipanggil saat hunian rumah benar-benar berubah (edge-triggered).
+    debounce: status baru harus bertahan selama ini (detik) sebelum dipublikasikan.
+    hold: setelah ruangan terakhir kosong, status berpenghuni ditahan selama ini (detik).
+    Kedip sensor yang kembali sebelum batas waktu tidak memicu on_change sama sekali.
+    """
+
+    def __init__(self, on_change, rooms, debounce=0, hold=0):
+        self.on_change = on_change
+        self.debounce = debounce
+        self.hold = hold
+        self.presence = {room: 0 for room in rooms}
+        self.count = 0
+        self.published = False   # hunian terakhir yang dikirim ke on_change
+        self.generation = 0      # naik setiap jadwal baru; timer lama jadi basi
+        self.timer = None
+        self.lock = threading.Lock()
+
+    @property
+    def occupied(self):
+        return self.count > 0
+
+    def set(self, room, value):
+        """Update satu ruangan; True kalau hunian rumah (ada orang/tidak) berubah"""
+        value = 1 if int(value) else 0
+        with self.lock:
+            old = self.presence.get(room, 0)
+            if old == value:
+                return False
+            self.presence[room] = value
+            was_occupied = self.count > 0
+            self.count += value - old
+            if (self.count > 0) == was_occupied:
+                return False
+            self.schedule(self.count > 0)
+            return True
+
+    def reset(self, presence):
+        """Isi ulang dari state yang dipulihkan, tanpa memanggil on_change"""
+        with self.lock:
+            self.presence.update({room: 1 if value else 0 for room, value in presence.items()})
+            self.count = sum(self.presence.values())
+            self.published = self.count > 0
+            self.cancel()
+
+    def schedule(self, occupied):
+        self.cancel()
+        if occupied == self.published:
+            return   # kembali ke status yang sudah dipublikasikan sebelum timer habis
+        delay = self.debounce if occupied else max(self.debounce, self.hold)
+        if delay <= 0:
+            self.publish(occupied)
+            return
+        self.timer = threading.Timer(delay, self.fire, (self.generation, occupied))
+        self.timer.daemon = True
+        self.timer.start()
+
+    def cancel(self):
+        self.generation += 1
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def fire(self, generation, occupied):
+        with self.lock:
+            if generation == self.generation:
+                self.timer = None
+                self.publish(occupied)
+
+    def publish(self, occupied):
+        # Masih di dalam lock supaya urutan publish sama dengan urutan perubahan
+        self.published = occupied
+        self.on_change(occupied)
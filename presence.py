@@ -0,0 +1,254 @@
+import base64
+import bisect
+import threading
+import time
+from array import array
+
+HOUR = 3600
+WEEK_HOURS = 7 * 24
+
+
+class RoomHistory:
+    """Riwayat hunian satu ruangan: interval (start/end) ringkas + detik terisi per jam
+
+    Bucket jam diisi saat interval ditutup (atau di-flush saat query), jadi query rentang
+    panjang cukup menjumlah slice array, tanpa memindai event PIR mentah.
+    """
+
+    def __init__(self, max_intervals, max_hours):
+        self.max_intervals = max_intervals
+        self.max_hours = max_hours
+        self.starts = array('d')
+        self.ends = array('d')
+        self.base = None           # jam epoch (t // 3600) untuk hours[0]
+        self.hours = array('f')    # detik terisi per jam
+        self.since = None          # awal interval yang sedang terbuka
+        self.counted = None        # interval terbuka sudah masuk bucket sampai waktu ini
+        self.last_seen = None      # akhir interval terakhir
+
+    def record(self, occupied, now):
+        # Record lebih tua dari riwayat (replay journal yang sudah tercakup snapshot) diabaikan
+        latest = self.counted if self.since is not None else self.last_seen
+        if latest is not None and now < latest:
+            return
+        if occupied and self.since is None:
+            self.since = self.counted = now
+        elif not occupied and self.since is not None:
+            self.flush(now)
+            if len(self.starts) >= self.max_intervals:
+                del self.starts[:self.max_intervals // 2]
+                del self.ends[:self.max_intervals // 2]
+            self.starts.append(self.since)
+            self.ends.append(now)
+            self.last_seen = now
+            self.since = self.counted = None
+
+    def flush(self, now):
+        """Masukkan bagian interval terbuka sampai now ke bucket jam"""
+        if self.since is not None and now > self.counted:
+            self.add_span(self.counted, now)
+            self.counted = now
+
+    def add_span(self, t0, t1):
+        first, last = int(t0 // HOUR), int((t1 - 1e-9) // HOUR)
+        if self.base is None:
+            self.base = first
+        if last - self.base >= len(self.hours):
+            self.hours.extend(array('f', bytes(4 * (last - self.base + 1 - len(self.hours)))))
+        hour = first
+        while t0 < t1:
+            end = min((hour + 1) * HOUR, t1)
+            if hour >= self.base:
+                self.hours[hour - self.base] += end - t0
+            t0 = end
+            hour += 1
+        if len(self.hours) > self.max_hours:
+            drop = len(self.hours) - self.max_hours
+            del self.hours[:drop]
+            self.base += drop
+
+    def hour_range(self, t_from, t_to):
+        """Index bucket [a, b) untuk jam yang beririsan dengan [t_from, t_to)"""
+        if self.base is None:
+            return 0, 0
+        a = max(0, int(t_from // HOUR) - self.base)
+        b = min(len(self.hours), int(-(-t_to // HOUR)) - self.base)
+        return a, max(a, b)
+
+    def exact(self, t0, t1):
+        """Detik terisi di [t0, t1) dari interval (hanya untuk potongan jam di tepi rentang)"""
+        total = 0.0
+        i = bisect.bisect_right(self.ends, t0)
+        while i < len(self.starts) and self.starts[i] < t1:
+            total += min(self.ends[i], t1) - max(self.starts[i], t0)
+            i += 1
+        if self.since is not None and self.since < t1:
+            total += t1 - max(self.since, t0)
+        return max(total, 0.0)
+
+    def occupied_seconds(self, t_from, t_to):
+        """Jam penuh dari bucket; potongan jam di awal/akhir dihitung tepat dari interval"""
+        first_full = int(-(-t_from // HOUR)) * HOUR
+        last_full = int(t_to // HOUR) * HOUR
+        if first_full >= last_full:
+            return self.exact(t_from, t_to)
+        a, b = self.hour_range(first_full, last_full)
+        return self.exact(t_from, first_full) + sum(self.hours[a:b]) + self.exact(last_full, t_to)
+
+    def hour_values(self, h0, h1):
+        """Detik terisi per jam epoch [h0, h1); jam di luar riwayat bernilai 0"""
+        n = h1 - h0
+        if self.base is None:
+            return array('f', bytes(4 * n))
+        lo = min(max(h0 - self.base, 0), len(self.hours))
+        hi = max(min(h1 - self.base, len(self.hours)), lo)
+        lead = min(max(self.base - h0, 0), n)
+        inside = self.hours[lo:hi]
+        return array('f', bytes(4 * lead)) + inside + array('f', bytes(4 * (n - lead - len(inside))))
+
+    def series(self, t_from, t_to, step_hours, offset_hours):
+        """[(awal bucket, detik terisi)] per jam atau per hari (hari mengikuti jam lokal)"""
+        h0, h1 = int(t_from // HOUR), int(-(-t_to // HOUR))
+        if step_hours > 1:
+            # Mundur ke tengah malam lokal supaya bucket hari tidak terpotong di jam UTC
+            h0 -= (h0 + offset_hours) % step_hours
+        values = self.hour_values(h0, h1)
+        return [((h0 + i) * HOUR, sum(values[i:i + step_hours])) for i in range(0, h1 - h0, step_hours)]
+
+    def heatmap(self, t_from, t_to, offset_hours):
+        """7x24 (Senin..Minggu x jam lokal): [detik terisi, jumlah jam] per sel"""
+        h0, h1 = int(t_from // HOUR), int(-(-t_to // HOUR))
+        cells = [[0.0, 0] for _ in range(WEEK_HOURS)]
+        # Semua jam di rentang query ikut dihitung, termasuk yang tidak pernah terisi
+        values = self.hour_values(h0, h1)
+        # Jam epoch 0 = Kamis 00:00 UTC; jam lokal L jatuh di sel (L + 72) % 168
+        cell_0 = (h0 + offset_hours + 72) % WEEK_HOURS
+        for k in range(min(WEEK_HOURS, len(values))):
+            # Satu slice ber-stride 168 per sel: jam yang sama di semua minggu dalam rentang
+            hours = values[k::WEEK_HOURS]
+            cell = cells[(cell_0 + k) % WEEK_HOURS]
+            cell[0] += sum(hours)
+            cell[1] += len(hours)
+        return cells
+
+    def dump(self):
+        return {
+            'starts': pack(self.starts), 'ends': pack(self.ends), 'base': self.base, 'hours': pack(self.hours),
+            'since': self.since, 'counted': self.counted, 'last_seen': self.last_seen,
+        }
+
+    def load(self, state):
+        self.starts, self.ends = unpack('d', state['starts']), unpack('d', state['ends'])
+        self.base, self.hours = state['base'], unpack('f', state['hours'])
+        self.since, self.counted, self.last_seen = state['since'], state['counted'], state['last_seen']
+
+    def intervals(self, t_from, t_to, limit):
+        i = bisect.bisect_right(self.ends, t_from)
+        result = []
+        while i < len(self.starts) and self.starts[i] < t_to and len(result) < limit:
+            result.append([self.starts[i], self.ends[i]])
+            i += 1
+        if self.since is not None and self.since < t_to and len(result) < limit:
+            result.append([self.since, None])
+        return result
+
+
+class PresenceIndex:
+    """Analitik hunian per ruangan satu rumah: dwell time, last-seen dan heatmap hari x jam
+
+    Retensi default: 100k interval dan 2 tahun bucket jam per ruangan (~70 KB/tahun/ruangan).
+    """
+
+    def __init__(self, rooms, max_intervals=100000, max_hours=2 * 366 * 24, clock=time.time):
+        self.rooms = {room: RoomHistory(max_intervals, max_hours) for room in rooms}
+        self.max_hours = max_hours
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def record(self, room, occupied, now=None):
+        """PIR/flag occupied ruangan; nilai berulang diabaikan"""
+        now = self.clock() if now is None else now
+        with self.lock:
+            self.rooms[room].record(bool(occupied), now)
+
+    def horizon(self, now=None):
+        """Waktu tertua yang masih ada di retensi bucket jam; query sebelum ini tidak berarti"""
+        return (self.clock() if now is None else now) - self.max_hours * HOUR
+
+    def select(self, rooms):
+        return {room: self.rooms[room] for room in (rooms or self.rooms)}
+
+    def flush(self, histories):
+        now = self.clock()
+        for history in histories.values():
+            history.flush(now)
+        return now
+
+    def dwell(self, t_from, t_to, rooms=None, step_hours=None, offset_hours=0):
+        """Detik terisi dan rasio hunian per ruangan, opsional deret per jam/hari"""
+        with self.lock:
+            histories = self.select(rooms)
+            t_to = min(t_to, self.flush(histories))
+            t_from = min(max(t_from, self.horizon()), t_to)
+            span = max(t_to - t_from, 0.0)
+            result = {}
+            for room, history in histories.items():
+                seconds = history.occupied_seconds(t_from, t_to) if span else 0.0
+                item = {'seconds': round(seconds, 1), 'ratio': round(seconds / span, 4) if span else 0.0}
+                if step_hours:
+                    item['series'] = [[t, round(s, 1)] for t, s in
+                                      history.series(t_from, t_to, step_hours, offset_hours)] if span else []
+                result[room] = item
+        return result
+
+    def heatmap(self, t_from, t_to, rooms=None, offset_hours=0):
+        """Rasio hunian per sel hari x jam, per ruangan dan rata-rata semua ruangan terpilih"""
+        with self.lock:
+            histories = self.select(rooms)
+            t_to = min(t_to, self.flush(histories))
+            t_from = min(max(t_from, self.horizon()), t_to)
+            cells = {room: history.heatmap(t_from, t_to, offset_hours) for room, history in histories.items()}
+        result = {room: to_grid(room_cells) for room, room_cells in cells.items()}
+        total = [[sum(c[k][0] for c in cells.values()), sum(c[k][1] for c in cells.values())]
+                 for k in range(WEEK_HOURS)]
+        return result, to_grid(total)
+
+    def last_seen(self):
+        now = self.clock()
+        with self.lock:
+            return {room: {
+                'occupied': history.since is not None,
+                'since': history.since,
+                'last_seen': now if history.since is not None else history.last_seen,
+            } for room, history in self.rooms.items()}
+
+    def intervals(self, room, t_from, t_to, limit=1000):
+        with self.lock:
+            return self.rooms[room].intervals(t_from, t_to, limit)
+
+    def dump(self):
+        """Riwayat semua ruangan untuk snapshot journal (array sebagai base64)"""
+        with self.lock:
+            return {room: history.dump() for room, history in self.rooms.items()}
+
+    def load(self, state):
+        with self.lock:
+            for room, history in state.items():
+                if room in self.rooms:
+                    self.rooms[room].load(history)
+
+
+def to_grid(cells):
+    """168 sel [detik, jam] -> 7 baris (Senin..Minggu) x 24 rasio hunian"""
+    return [[round(cells[day * 24 + hour][0] / (cells[day * 24 + hour][1] * HOUR), 4)
+             if cells[day * 24 + hour][1] else 0.0 for hour in range(24)] for day in range(7)]
+
+
+def pack(values):
+    return base64.b64encode(values.tobytes()).decode()
+
+
+def unpack(typecode, text):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(text))
+    return values
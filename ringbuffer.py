@@ -0,0 +1,45 @@
+import threading
+
+
+class RingBuffer:
+    """Buffer kapasitas tetap; setiap item dapat nomor urut (seq) yang terus naik"""
+
+    def __init__(self, capacity, first_seq=1):
+        self.capacity = capacity
+        self.items = [None] * capacity
+        self.next_seq = first_seq
+        self.first_seq = first_seq  # seq tertua yang masih valid (naik kalau seq replay melompat)
+        self.lock = threading.Lock()
+
+    def append(self, item, seq=None):
+        """Simpan item (menimpa yang paling lama saat penuh), kembalikan seq-nya.
+        seq eksplisit hanya untuk replay journal dan harus >= seq berikutnya"""
+        with self.lock:
+            if seq is None or seq < self.next_seq:
+                seq = self.next_seq
+            elif seq > self.next_seq:
+                self.first_seq = seq
+            self.items[seq % self.capacity] = item
+            self.next_seq = seq + 1
+        return seq
+
+    def since(self, seq=0, limit=None):
+        """Item dengan seq > seq, urut dari yang paling lama; limit = halaman berikutnya setelah
+        cursor (bukan item terbaru). Biaya sebanding jumlah item yang dikembalikan"""
+        with self.lock:
+            start = max(seq + 1, self.next_seq - self.capacity, self.first_seq)
+            end = self.next_seq if limit is None else min(start + limit, self.next_seq)
+            return [self.items[i % self.capacity] for i in range(start, end)]
+
+    def latest(self, limit):
+        """limit item terbaru"""
+        with self.lock:
+            start = max(self.next_seq - limit, self.next_seq - self.capacity, self.first_seq)
+            return [self.items[i % self.capacity] for i in range(start, self.next_seq)]
+
+    @property
+    def last_seq(self):
+        return self.next_seq - 1
+
+    def __len__(self):
+        return min(self.next_seq - self.first_seq, self.capacity)
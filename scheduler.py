@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class Scheduler:
+    """Timer berbasis heap dengan satu thread: schedule/cancel O(log n), tanpa loop polling
+
+    Thread tidur tepat sampai deadline terdekat (Condition.wait dengan timeout) dan hanya
+    dibangunkan kalau ada timer baru yang lebih awal. Timer ber-key: menjadwalkan key yang
+    sama menggantikan timer lama. Entri yang dibatalkan cukup ditandai lalu dibuang saat
+    sampai di puncak heap (heap dibangun ulang kalau sebagian besar isinya sudah batal).
+    """
+
+    def __init__(self, clock=time.monotonic, logger=None):
+        self.clock = clock
+        self.logger = logger
+        self.heap = []          # [deadline, urutan, key, fn, args]; fn None = dibatalkan
+        self.timers = {}        # key -> entri aktif
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.stats = {'scheduled': 0, 'fired': 0, 'cancelled': 0, 'failed': 0}
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def call_later(self, key, delay, fn, *args):
+        """Jalankan fn(*args) setelah delay detik; timer lama dengan key sama dibatalkan"""
+        entry = [self.clock() + delay, next(self.counter), key, fn, args]
+        with self.cond:
+            self.discard(key)
+            self.timers[key] = entry
+            heapq.heappush(self.heap, entry)
+            self.stats['scheduled'] += 1
+            if self.heap[0] is entry:
+                self.cond.notify()   # deadline terdekat berubah, bangunkan thread
+
+    def cancel(self, key):
+        """True kalau ada timer aktif dengan key ini"""
+        with self.cond:
+            return self.discard(key)
+
+    def discard(self, key):
+        entry = self.timers.pop(key, None)
+        if entry is None:
+            return False
+        entry[3] = None
+        self.stats['cancelled'] += 1
+        if len(self.heap) > 64 and len(self.heap) > 2 * len(self.timers):
+            self.heap = [item for item in self.heap if item[3] is not None]
+            heapq.heapify(self.heap)
+        return True
+
+    def daily(self, key, at, fn, *args):
+        """Jalankan fn(*args) setiap hari pada jam dinding at (datetime.time)"""
+        def run():
+            self.daily(key, at, fn, *args)   # jadwal besok dulu, supaya error tidak memutus rantai
+            fn(*args)
+        self.call_later(key, seconds_until(at), run)
+
+    def run(self):
+        while True:
+            with self.cond:
+                while True:
+                    if not self.running:
+                        return
+                    while self.heap and self.heap[0][3] is None:
+                        heapq.heappop(self.heap)
+                    if not self.heap:
+                        self.cond.wait()
+                        continue
+                    delay = self.heap[0][0] - self.clock()
+                    if delay <= 0:
+                        break
+                    self.cond.wait(delay)
+                entry = heapq.heappop(self.heap)
+                del self.timers[entry[2]]
+                fn, args = entry[3], entry[4]
+            try:
+                fn(*args)
+                self.stats['fired'] += 1
+            except Exception:
+                self.stats['failed'] += 1
+                if self.logger is not None:
+                    self.logger.exception("Timer %s gagal", entry[2])
+
+    def __contains__(self, key):
+        return key in self.timers
+
+    def __len__(self):
+        return len(self.timers)
+
+    def status(self):
+        return dict(self.stats, pending=len(self.timers))
+
+
+def seconds_until(at, now=None):
+    """Detik sampai jam dinding at berikutnya; yang baru saja lewat dihitung besok"""
+    now = now or datetime.now()
+    target = datetime.combine(now.date(), at)
+    # Toleransi 1 detik: timer harian yang bangun sedikit lebih awal tidak jalan dua kali
+    if target <= now + timedelta(seconds=1):
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
@@ -0,0 +1,144 @@
+import json
+import operator
+import threading
+
+MISSING = object()   # item tanpa key metadata ini
+
+
+class TableView(dict):
+    """View dict-of-dicts (untuk JSON) beserta hitungan flag dari versi yang sama"""
+
+    __slots__ = ('counts',)
+
+    def count(self, field):
+        return self.counts[field]
+
+
+class SlotTable:
+    """State panas ruangan/perangkat: satu bytearray per flag, diindeks slot
+
+    Metadata statis (nama, ikon, daya) disimpan terpisah sekali saja. Hitungan seperti
+    active_lights memakai bytearray.count (loop C), bukan sum generator atas dict.
+    JSON dirakit langsung dari kolom (encode) tanpa view perantara: potongan '"id":{metadata,'
+    di-encode sekali, sisa baris diambil dari tabel kombinasi flag.
+    """
+
+    def __init__(self, template, flags):
+        self.ids = tuple(template)
+        self.slots = {item_id: i for i, item_id in enumerate(self.ids)}
+        self.flags = tuple(flags)
+        # Metadata per kolom juga (tuple per key), bukan dict per item
+        keys = dict.fromkeys(key for item in template.values() for key in item if key not in self.flags)
+        self.metadata = {key: tuple(template[item_id].get(key, MISSING) for item_id in self.ids) for key in keys}
+        self.columns = {field: bytearray(1 if template[item_id].get(field) else 0 for item_id in self.ids)
+                        for field in self.flags}
+        self.prefixes = tuple(f'{dumps(item_id)}:{dumps(meta)[:-1]}{"," if meta else ""}'
+                              for item_id, meta in zip(self.ids, map(self.row_meta, range(len(self.ids)))))
+        # Sisa baris per kombinasi flag; kode = bit flag pertama paling kiri
+        self.suffixes = tuple(dumps({field: bool(code >> (len(self.flags) - 1 - j) & 1)
+                                     for j, field in enumerate(self.flags)})[1:]
+                              for code in range(1 << len(self.flags)))
+        self.version = 0         # naik setiap ada flag yang berubah
+        self.observer = None     # fn(item_id, field, value) setelah perubahan; item_id None = fill
+        self.lock = threading.Lock()
+
+    def __contains__(self, item_id):
+        return item_id in self.slots
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def meta(self, item_id):
+        return self.row_meta(self.slots[item_id])
+
+    def row_meta(self, i):
+        return {key: column[i] for key, column in self.metadata.items() if column[i] is not MISSING}
+
+    def get(self, item_id, field):
+        return bool(self.columns[field][self.slots[item_id]])
+
+    def set(self, item_id, field, value, observe=True):
+        """Ubah satu flag; True kalau nilainya berubah"""
+        i = self.slots[item_id]
+        value = 1 if value else 0
+        with self.lock:
+            column = self.columns[field]
+            if column[i] == value:
+                return False
+            column[i] = value
+            self.version += 1
+        if observe and self.observer is not None:
+            self.observer(item_id, field, value)
+        return True
+
+    def fill(self, field, value, observe=True):
+        """Set flag yang sama untuk semua item; daftar id yang berubah"""
+        value = 1 if value else 0
+        with self.lock:
+            column = self.columns[field]
+            changed = [self.ids[i] for i, current in enumerate(column) if current != value]
+            if changed:
+                column[:] = bytes([value]) * len(column)
+                self.version += 1
+        if changed and observe and self.observer is not None:
+            self.observer(None, field, value)
+        return changed
+
+    def update(self, item_id, values, observe=True):
+        """Terapkan dict {field: nilai} (record journal); field metadata diabaikan"""
+        changed = False
+        for field, value in values.items():
+            if field in self.columns:
+                changed = self.set(item_id, field, value, observe) or changed
+        return changed
+
+    def count(self, field):
+        return self.columns[field].count(1)
+
+    def codes(self):
+        """Kode kombinasi flag per slot (bytes); kolom 0/1 digabung per byte tanpa carry"""
+        with self.lock:
+            code = 0
+            for field in self.flags:
+                code = code * 2 + int.from_bytes(self.columns[field], 'big')
+        return code.to_bytes(len(self.ids), 'big')
+
+    def encode(self):
+        """View dict-of-dicts sebagai JSON (bytes), sama dengan json.dumps(view()) ringkas"""
+        rows = map(operator.add, self.prefixes, map(self.suffixes.__getitem__, self.codes()))
+        return ('{' + ','.join(rows) + '}').encode()
+
+    def view(self):
+        """Dict-of-dicts beserta hitungan flag dari versi yang sama (dibangun setiap dipanggil)"""
+        view = TableView()
+        with self.lock:
+            for i, item_id in enumerate(self.ids):
+                row = self.row_meta(i)
+                for field in self.flags:
+                    row[field] = bool(self.columns[field][i])
+                view[item_id] = row
+            view.counts = {field: column.count(1) for field, column in self.columns.items()}
+        return view
+
+    def live(self):
+        """State ringkas {id: [flag 0/1 sesuai urutan self.flags]} tanpa metadata"""
+        with self.lock:
+            columns = [bytes(self.columns[field]) for field in self.flags]
+        return {item_id: list(row) for item_id, row in zip(self.ids, zip(*columns))}
+
+    def rows(self, item_ids=None):
+        """Flag saja {id: {flag: bool}} untuk item tertentu (delta SSE/journal); None = semua"""
+        slots = range(len(self.ids)) if item_ids is None else [self.slots[item_id] for item_id in item_ids]
+        with self.lock:
+            return {self.ids[i]: {field: bool(self.columns[field][i]) for field in self.flags} for i in slots}
+
+    def metadata_view(self):
+        """Metadata statis {id: {...}} (tidak pernah berubah)"""
+        return {item_id: self.row_meta(i) for i, item_id in enumerate(self.ids)}
+
+
+def dumps(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
@@ -0,0 +1,64 @@
+import threading
+from contextlib import contextmanager
+
+from slot_table import SlotTable
+
+
+def freeze(value):
+    """Salinan untuk pembaca; tidak pernah diubah lagi setelah dipublikasikan"""
+    if isinstance(value, dict):
+        return {key: freeze(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [freeze(item) for item in value]
+    return value
+
+
+class StateStore:
+    """State per section: penulis pakai lock per section, pembaca baca snapshot copy-on-write
+
+    Pembaca (request Flask, journal, SSE) tidak pernah mengambil lock, jadi tidak bisa
+    menahan thread MQTT. Penulis hanya saling tunggu kalau menulis section yang sama.
+    Section berupa SlotTable tidak disalin: table membangun view sendiri dari kolomnya.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.tables = {section: value for section, value in data.items() if isinstance(value, SlotTable)}
+        self.locks = {section: threading.Lock() for section in data}
+        self.views = {section: freeze(value) for section, value in data.items() if section not in self.tables}
+
+    @contextmanager
+    def write(self, section):
+        """Ubah section di dalam blok with; view baru dipublikasikan saat blok selesai"""
+        with self.locks[section]:
+            if section in self.tables:
+                yield self.tables[section]
+                return
+            try:
+                yield self.data[section]
+            finally:
+                self.views[section] = freeze(self.data[section])
+
+    def set(self, section, value):
+        """Ganti isi section (mis. status rumah yang berupa string)"""
+        with self.locks[section]:
+            self.data[section] = value
+            self.views[section] = freeze(value)
+
+    def view(self, section):
+        """Snapshot terakhir sebuah section, tanpa lock"""
+        table = self.tables.get(section)
+        if table is not None:
+            return table.view()
+        return self.views[section]
+
+    def table(self, section):
+        """SlotTable sebuah section (baca flag/hitungan langsung tanpa membangun view)"""
+        return self.tables[section]
+
+    def snapshot(self):
+        """Snapshot semua section sekaligus (tiap section konsisten)"""
+        views = dict(self.views)
+        for section, table in self.tables.items():
+            views[section] = table.view()
+        return views
@@ -89,9 +89,20 @@ const appState = {
   devices: {},
   notifications: [],
   logs: [],
-  lastNotifications: [],
+  lastNotificationId: null,
 }
 
+// Prefix API rumah yang sedang dibuka (/api atau /api/houses/<house_id>)
+const API_BASE = window.API_BASE || "/api"
+const POLL_INTERVAL = 2000
+let pollTimer = null
+let eventSource = null
+let renderPending = false
+let stateEtag = null
+let metaDigest = null
+let metaFields = null
+let renderedNotifications = null
+
 // ============================================
 // INITIALIZATION
 // ============================================
@@ -108,8 +119,91 @@ async function initializeApp() {
   renderDevices()
   startClock()
 
-  // Update data every 2 seconds
-  setInterval(fetchAllData, 2000)
+  // Push via Server-Sent Events; polling 2 detik hanya sebagai fallback
+  if (window.EventSource) {
+    connectStream()
+  } else {
+    startPolling()
+  }
+}
+
+function startPolling() {
+  if (pollTimer) return
+  pollTimer = setInterval(fetchAllData, POLL_INTERVAL)
+}
+
+function stopPolling() {
+  clearInterval(pollTimer)
+  pollTimer = null
+}
+
+function connectStream() {
+  eventSource = new EventSource(`${API_BASE}/stream`)
+
+  eventSource.onopen = () => stopPolling()
+  // EventSource reconnect sendiri; selama terputus pakai polling
+  eventSource.onerror = () => startPolling()
+
+  eventSource.addEventListener("snapshot", (e) => {
+    const data = JSON.parse(e.data)
+    applyStatus(data.status)
+    appState.rooms = data.rooms
+    appState.devices = data.devices
+    appState.notifications = data.notifications
+    appState.logs = data.logs
+    checkNewNotifications()
+    scheduleRender()
+  })
+  eventSource.addEventListener("status", (e) => {
+    applyStatus(JSON.parse(e.data))
+    scheduleRender()
+  })
+  // rooms/devices hanya berisi item yang berubah: {id: {flag: nilai}}
+  eventSource.addEventListener("rooms", (e) => {
+    mergeItems(appState.rooms, JSON.parse(e.data))
+    scheduleRender()
+  })
+  eventSource.addEventListener("devices", (e) => {
+    mergeItems(appState.devices, JSON.parse(e.data))
+    scheduleRender()
+  })
+  eventSource.addEventListener("notifications", (e) => {
+    appState.notifications = JSON.parse(e.data)
+    checkNewNotifications()
+    scheduleRender()
+  })
+  eventSource.addEventListener("log", (e) => {
+    appState.logs.push(JSON.parse(e.data))
+    if (appState.logs.length > 100) appState.logs.shift()
+    scheduleRender()
+  })
+}
+
+function mergeItems(items, delta) {
+  Object.entries(delta).forEach(([id, flags]) => {
+    items[id] = { ...items[id], ...flags }
+  })
+}
+
+function applyStatus(status) {
+  appState.houseStatus = status.status
+  appState.mqttConnected = status.mqtt_connected
+}
+
+// Gabungkan beberapa event dalam satu frame menjadi satu render
+function scheduleRender() {
+  if (renderPending) return
+  renderPending = true
+  requestAnimationFrame(() => {
+    renderPending = false
+    updateUI()
+  })
+}
+
+// Setelah aksi: kalau stream hidup, perubahan datang lewat push
+async function refreshAfterAction() {
+  if (eventSource && eventSource.readyState === EventSource.OPEN) return
+  await fetchAllData()
 }
 
 // ============================================
@@ -117,20 +211,21 @@ async function initializeApp() {
 // ============================================
 async function fetchAllData() {
   try {
-    const [status, rooms, devices, notifications, logs] = await Promise.all([
-      fetch("/api/status").then((r) => r.json()),
-      fetch("/api/rooms").then((r) => r.json()),
-      fetch("/api/devices").then((r) => r.json()),
-      fetch("/api/notifications").then((r) => r.json()),
-      fetch("/api/logs").then((r) => r.json()),
-    ])
-
-    appState.houseStatus = status.status
-    appState.mqttConnected = status.mqtt_connected
-    appState.rooms = rooms
-    appState.devices = devices
-    appState.notifications = notifications
-    appState.logs = logs
+    // State ringkas (flag 0/1); server menjawab 304 kalau versi state belum berubah
+    const headers = stateEtag ? { "If-None-Match": stateEtag } : {}
+    const response = await fetch(`${API_BASE}/state`, { headers, cache: "no-store" })
+    if (response.status === 304) return
+    stateEtag = response.headers.get("ETag")
+    const state = await response.json()
+
+    // Metadata (urutan flag) hanya diambil sekali, ulang kalau hash-nya berubah
+    if (state.meta !== metaDigest) await fetchMeta(state.meta)
+
+    appState.houseStatus = state.status
+    appState.mqttConnected = state.mqtt_connected
+    appState.rooms = expandItems(state.rooms, metaFields.rooms)
+    appState.devices = expandItems(state.devices, metaFields.devices)
+    await fetchFeeds()
 
     checkNewNotifications()
 
@@ -140,31 +235,61 @@ async function fetchAllData() {
   }
 }
 
-function checkNewNotifications() {
-  const newNotifications = appState.notifications.filter(
-    (notif) => !appState.lastNotifications.some((old) => old.id === notif.id),
-  )
+async function fetchMeta(digest) {
+  const response = await fetch(`${API_BASE}/meta?v=${digest}`)
+  metaFields = (await response.json()).fields
+  metaDigest = digest
+}
+
+// {id: [0/1 sesuai urutan fields]} -> {id: {flag: boolean}}
+function expandItems(live, fields) {
+  const items = {}
+  Object.entries(live).forEach(([id, values]) => {
+    items[id] = {}
+    fields.forEach((field, i) => {
+      items[id][field] = Boolean(values[i])
+    })
+  })
+  return items
+}
+
+// Versi berubah: notifikasi yang tampil dan log baru sejak seq terakhir
+async function fetchFeeds() {
+  const lastLog = appState.logs[appState.logs.length - 1]
+  const logsUrl = lastLog ? `${API_BASE}/logs?since=${lastLog.seq}` : `${API_BASE}/logs`
+  const [notifications, logs] = await Promise.all([
+    fetch(`${API_BASE}/notifications`, { cache: "no-store" }).then((r) => r.json()),
+    fetch(logsUrl, { cache: "no-store" }).then((r) => r.json()),
+  ])
+  appState.notifications = notifications
+  appState.logs = appState.logs.concat(logs).slice(-100)
+}
 
-  newNotifications.forEach((notif) => {
+// ID notifikasi naik terus di server: bunyi hanya untuk ID yang belum pernah dilihat,
+// bukan untuk notifikasi lama yang muncul lagi (anomali berkedip) atau dikirim ulang
+function checkNewNotifications() {
+  const lastId = appState.lastNotificationId
+  appState.notifications.forEach((notif) => {
+    if (lastId !== null && notif.id <= lastId) return
     if (notif.sound_type === "light") {
       soundManager.playLightBeep()
     } else if (notif.sound_type === "device") {
       soundManager.playDeviceBeep()
     }
   })
-
-  appState.lastNotifications = appState.notifications
+  const ids = appState.notifications.map((notif) => notif.id)
+  appState.lastNotificationId = Math.max(lastId ?? 0, ...ids)
 }
 
 async function toggleRoomLight(roomId) {
   try {
-    const response = await fetch(`/api/room/${roomId}/toggle`, { method: "POST" })
+    const response = await fetch(`${API_BASE}/room/${roomId}/toggle`, { method: "POST" })
     if (!response.ok) {
       const error = await response.json()
       showNotification(error.error, "warning")
       return
     }
-    await fetchAllData()
+    await refreshAfterAction()
   } catch (error) {
     console.error("Error toggling light:", error)
   }
@@ -172,7 +297,7 @@ async function toggleRoomLight(roomId) {
 
 async function setRoomOccupied(roomId, occupied) {
   try {
-    const response = await fetch(`/api/room/${roomId}/occupied`, {
+    const response = await fetch(`${API_BASE}/room/${roomId}/occupied`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ occupied }),
@@ -180,7 +305,7 @@ async function setRoomOccupied(roomId, occupied) {
     if (!response.ok) {
       return
     }
-    await fetchAllData()
+    await refreshAfterAction()
   } catch (error) {
     console.error("Error setting room occupied:", error)
   }
@@ -188,13 +313,13 @@ async function setRoomOccupied(roomId, occupied) {
 
 async function toggleDevice(deviceId) {
   try {
-    const response = await fetch(`/api/device/${deviceId}/toggle`, { method: "POST" })
+    const response = await fetch(`${API_BASE}/device/${deviceId}/toggle`, { method: "POST" })
     if (!response.ok) {
       const error = await response.json()
       showNotification(error.error, "warning")
       return
     }
-    await fetchAllData()
+    await refreshAfterAction()
   } catch (error) {
     console.error("Error toggling device:", error)
   }
@@ -202,13 +327,13 @@ async function toggleDevice(deviceId) {
 
 async function turnOffAllLights() {
   try {
-    const response = await fetch("/api/lights/all/off", { method: "POST" })
+    const response = await fetch(`${API_BASE}/lights/all/off`, { method: "POST" })
     if (!response.ok) {
       const error = await response.json()
       showNotification(error.error, "warning")
       return
     }
-    await fetchAllData()
+    await refreshAfterAction()
   } catch (error) {
     console.error("Error turning off all lights:", error)
   }
@@ -216,13 +341,13 @@ async function turnOffAllLights() {
 
 async function turnOffAllDevices() {
   try {
-    const response = await fetch("/api/devices/all/off", { method: "POST" })
+    const response = await fetch(`${API_BASE}/devices/all/off`, { method: "POST" })
     if (!response.ok) {
       const error = await response.json()
       showNotification(error.error, "warning")
       return
     }
-    await fetchAllData()
+    await refreshAfterAction()
   } catch (error) {
     console.error("Error turning off all devices:", error)
   }
@@ -230,12 +355,12 @@ async function turnOffAllDevices() {
 
 async function setHouseStatus(status) {
   try {
-    await fetch("/api/house/status", {
+    await fetch(`${API_BASE}/house/status`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ status }),
     })
-    await fetchAllData()
+    await refreshAfterAction()
   } catch (error) {
     console.error("Error setting house status:", error)
   }
@@ -329,6 +454,10 @@ function renderDevices() {
 
 function renderNotifications() {
   const container = document.getElementById("notificationsContainer")
+  // Daftar sama (ID dan hitungan ulang) tidak perlu dirender ulang
+  const signature = appState.notifications.map((notif) => `${notif.id}:${notif.count || 1}`).join(",")
+  if (signature === renderedNotifications) return
+  renderedNotifications = signature
 
   if (appState.notifications.length === 0) {
     container.innerHTML = '<p class="empty-state">Tidak ada notifikasi</p>'
@@ -340,7 +469,7 @@ function renderNotifications() {
       (notif) => `
         <div class="notification-item ${notif.type}">
             <div class="notification-content">
-                <div class="notification-message">${notif.message}</div>
+                <div class="notification-message">${notif.message}${notif.count > 1 ? ` (${notif.count}×)` : ""}</div>
                 <div class="notification-time">${notif.timestamp}</div>
             </div>
         </div>
@@ -0,0 +1,84 @@
+import json
+import queue
+import threading
+
+
+class EventBroker:
+    """Fan-out event perubahan state ke semua klien Server-Sent Events"""
+
+    def __init__(self, max_pending=256, heartbeat=15):
+        self.max_pending = max_pending
+        self.heartbeat = heartbeat
+        self.subscribers = set()
+        self.listeners = []     # fn(message) untuk fan-out di luar thread (mis. event loop ASGI)
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_pending)
+        with self.lock:
+            self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    def add_listener(self, fn):
+        with self.lock:
+            self.listeners = self.listeners + [fn]
+
+    def remove_listener(self, fn):
+        with self.lock:
+            self.listeners = [listener for listener in self.listeners if listener is not fn]
+
+    def publish(self, event, data):
+        """Encode sekali, lalu titipkan ke antrian tiap klien (tidak pernah blocking)"""
+        if not self.subscribers and not self.listeners:
+            return
+        message = format_sse(event, data)
+        with self.lock:
+            subscribers = list(self.subscribers)
+            listeners = self.listeners
+        for listener in listeners:
+            listener(message)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Klien terlalu lambat: putuskan, EventSource akan reconnect dan dapat snapshot baru
+                self.unsubscribe(q)
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(None)
+
+    def stream(self, initial=None):
+        """Iterable untuk Response Flask: snapshot awal, lalu event perubahan + heartbeat
+
+        initial: fungsi pembuat snapshot, dipanggil setelah subscribe supaya event yang
+        terjadi di antaranya tidak terlewat (generator baru jalan saat server mengiterasinya).
+        """
+        q = self.subscribe()
+        return self.events(q, initial() if initial is not None else None)
+
+    def events(self, q, initial):
+        try:
+            if initial is not None:
+                yield format_sse('snapshot', initial)
+            while True:
+                try:
+                    message = q.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(q)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
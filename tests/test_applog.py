@@ -0,0 +1,27 @@
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from applog import RateLimitFilter
+
+
+def passed(log_filter, n, **extra):
+    records = [logging.LogRecord('uji', logging.INFO, __file__, 1, 'pesan %d', (i,), None) for i in range(n)]
+    for record in records:
+        record.__dict__.update(extra)
+    return sum(log_filter.filter(record) for record in records)
+
+
+def test_zero_rate_disables_rate_limit():
+    stats = {'rate_limited': 0, 'sampled_out': 0}
+    assert passed(RateLimitFilter(rate=0, burst=50, stats=stats), 500) == 500
+    assert stats['rate_limited'] == 0
+
+
+def test_burst_then_limited_and_sampling_still_applies():
+    stats = {'rate_limited': 0, 'sampled_out': 0}
+    assert passed(RateLimitFilter(rate=1e-9, burst=50, stats=stats), 500) == 50
+    assert stats['rate_limited'] == 450
+    assert passed(RateLimitFilter(rate=0, stats=stats), 500, sample=100) == 5
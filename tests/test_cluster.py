@@ -0,0 +1,73 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cluster import ChangeFollower, ChangeLog, LeaderLock
+
+
+def follower_of(directory):
+    applied = []
+    return ChangeFollower(ChangeLog(str(directory)), applied.append), applied
+
+
+def test_leader_lock_is_taken_over_when_holder_dies(tmp_path):
+    leader, follower = LeaderLock(str(tmp_path)), LeaderLock(str(tmp_path))
+    assert leader.try_acquire() and leader.try_acquire()
+    assert not follower.try_acquire()
+    # Proses leader mati: kernel melepas flock bersama fd-nya
+    os.close(leader.fd)
+    assert follower.try_acquire()
+    with open(tmp_path / 'leader.lock') as f:
+        assert f.read() == str(os.getpid())
+
+
+def test_writers_share_one_order_across_rotation(tmp_path):
+    worker_a, worker_b = ChangeLog(str(tmp_path)), ChangeLog(str(tmp_path))
+    follower, applied = follower_of(tmp_path)
+    worker_a.append({'op': 'log', 'd': 1})
+    worker_b.append({'op': 'log', 'd': 2})
+    follower.poll()
+    worker_a.append({'op': 'log', 'd': 3})
+    # Leader merotasi; record worker lain sesudahnya masuk ke file baru
+    with worker_a.locked():
+        worker_a.rotate({'op': 'snapshot', 'd': 3})
+    worker_b.append({'op': 'log', 'd': 4})
+    follower.poll()
+    assert [(r['op'], r['d']) for r in applied] == [
+        ('log', 1), ('log', 2), ('log', 3), ('snapshot', 3), ('log', 4)]
+    assert follower.stats == {'applied': 5, 'failed': 0, 'rotations': 1}
+
+    # Worker yang baru bergabung cukup membaca file baru: snapshot dulu
+    late, late_applied = follower_of(tmp_path)
+    late.poll()
+    assert [(r['op'], r['d']) for r in late_applied] == [('snapshot', 3), ('log', 4)]
+
+
+def test_partial_line_waits_for_the_writer(tmp_path):
+    follower, applied = follower_of(tmp_path)
+    with open(tmp_path / 'changes.jsonl', 'wb') as f:
+        f.write(b'{"op":"log","d":1}\n{"op":"lo')
+        f.flush()
+        follower.poll()
+        assert applied == [{'op': 'log', 'd': 1}]
+        f.write(b'g","d":2}\n')
+    follower.poll()
+    assert applied == [{'op': 'log', 'd': 1}, {'op': 'log', 'd': 2}]
+
+
+def test_failing_record_is_counted_and_skipped(tmp_path):
+    applied = []
+
+    def apply(record):
+        if record['op'] == 'rusak':
+            raise KeyError('d')
+        applied.append(record)
+
+    changes = ChangeLog(str(tmp_path))
+    follower = ChangeFollower(changes, apply)
+    changes.append({'op': 'rusak'})
+    changes.append({'op': 'log', 'd': 1})
+    follower.poll()
+    assert applied == [{'op': 'log', 'd': 1}]
+    assert follower.stats['failed'] == 1
@@ -0,0 +1,48 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingest import IngestQueue
+
+
+def test_same_topic_coalesces_to_latest_value_at_the_back():
+    applied = []
+    ingest = IngestQueue(lambda topic, client, payload: applied.append((topic, payload)))
+    for topic, payload in [('a', '1'), ('b', '1'), ('a', '0'), ('c', '1'), ('a', '1')]:
+        assert ingest.put(topic, None, payload)
+    assert len(ingest) == 3 and ingest.high_water == 3
+    ingest.start()
+    ingest.stop()   # sisa antrian diterapkan dulu
+    assert applied == [('b', '1'), ('c', '1'), ('a', '1')]
+    assert ingest.status() == {'received': 5, 'coalesced': 2, 'dropped': 0, 'applied': 3, 'failed': 0,
+                               'depth': 0, 'high_water': 3}
+
+
+def test_full_queue_drops_new_topics_but_still_coalesces():
+    ingest = IngestQueue(lambda *args: None, capacity=2)
+    assert ingest.put('a', None, '1') and ingest.put('b', None, '1')
+    assert not ingest.put('c', None, '1')
+    assert ingest.put('a', None, '0')
+    assert ingest.stats['dropped'] == 1 and len(ingest) == 2
+
+
+def test_failing_message_does_not_stop_the_worker():
+    applied, done = [], threading.Event()
+
+    def apply(topic, client, payload):
+        if payload == 'rusak':
+            raise ValueError(payload)
+        applied.append(topic)
+        if topic == 'terakhir':
+            done.set()
+
+    ingest = IngestQueue(apply)
+    ingest.start()
+    ingest.put('a', None, 'rusak')
+    ingest.put('terakhir', None, '1')
+    assert done.wait(2.0)
+    ingest.stop()
+    assert applied == ['terakhir']
+    assert ingest.stats['failed'] == 1 and ingest.stats['applied'] == 1
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('MQTT_ENABLED', '0')
+os.environ['JOURNAL_DIR'] = ''
+
+from journal import Journal
+
+
+def write_journal(journal, records):
+    journal.start()
+    for op, data in records:
+        journal.append(op, data)
+    journal.stop()
+
+
+def test_record_after_torn_line_survives_restart(tmp_path):
+    journal = Journal(str(tmp_path), lambda: {})
+    journal.load()
+    write_journal(journal, [('status', {'status': 'kosong'})] * 3)
+    # Crash di tengah penulisan record ke-4
+    with open(journal.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"seq":4,"op":"lo')
+
+    journal = Journal(str(tmp_path), lambda: {})
+    _, records = journal.load()
+    assert [r['seq'] for r in records] == [1, 2, 3]
+    write_journal(journal, [('status', {'status': 'berpenghuni'})])
+
+    journal = Journal(str(tmp_path), lambda: {})
+    _, records = journal.load()
+    assert [r['seq'] for r in records] == [1, 2, 3, 4]
+    assert records[-1]['data'] == {'status': 'berpenghuni'}
+    with open(journal.journal_path, encoding='utf-8') as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_log_record_already_in_snapshot_is_not_duplicated():
+    import app
+    from ringbuffer import RingBuffer
+
+    house = app.create_house('uji_journal', 'smarthome/uji_journal')
+    house.logs = RingBuffer(100)
+    entries = [{'seq': seq, 'action': 'a', 'details': str(seq)} for seq in (1, 2, 3)]
+    # Snapshot kompaksi sudah berisi seq 1..3, record journal seq 2..3 masih menyusul
+    app.load_house_state(house, {'status': 'kosong', 'rooms': {}, 'devices': {}, 'logs': entries})
+    for entry in entries[1:]:
+        app.apply_record(house, 'log', dict(entry))
+    app.apply_record(house, 'log', {'seq': 4, 'action': 'a', 'details': '4'})
+    assert [entry['seq'] for entry in house.logs.latest(100)] == [1, 2, 3, 4]
+
+
+def test_presence_history_survives_restart(tmp_path, monkeypatch):
+    import functools
+    import time
+
+    import app
+
+    clock = [0.0]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+
+    def open_house(compact_every):
+        house = app.create_house('uji_presence', 'smarthome/uji_presence')
+        house.journal = Journal(str(tmp_path), functools.partial(app.journal_snapshot, house),
+                                compact_every=compact_every)
+        house.presence.clock = time.time
+        app.restore_state(house)
+        return house
+
+    def visit(house, start, end):
+        for clock[0], occupied in ((start, 1), (end, 0)):
+            app.room_occupancy_changed(house, 'kamar1', occupied)
+
+    house = open_house(5000)
+    visit(house, 1000.0, 1600.0)
+    house.journal.stop()
+
+    # Restart pertama: dari record journal; lalu kompaksi memindahkan riwayat ke snapshot
+    house = open_house(2)
+    assert house.presence.intervals('kamar1', 0, 5000) == [[1000.0, 1600.0]]
+    visit(house, 2000.0, 2600.0)
+    for _ in range(200):
+        if os.path.exists(house.journal.snapshot_path):
+            break
+        time.sleep(0.01)
+    house.journal.stop()
+    assert os.path.exists(house.journal.snapshot_path)
+
+    house = open_house(5000)
+    assert house.presence.intervals('kamar1', 0, 5000) == [[1000.0, 1600.0], [2000.0, 2600.0]]
+    assert house.presence.dwell(0, 3600, rooms=['kamar1'])['kamar1']['seconds'] == 1200.0
+
+
+def test_flip_journals_only_the_changed_item(tmp_path):
+    import app
+
+    house = app.create_house('uji_delta', 'smarthome/uji_delta')
+    house.journal = Journal(str(tmp_path), lambda: {})
+    app.restore_state(house)
+    app.handle_light(None, 'lampu/nyala', house, 'kamar2')
+    house.journal.stop()
+
+    _, records = Journal(str(tmp_path), lambda: {}).load()
+    assert [r['data'] for r in records if r['op'] == 'rooms'] == [{'kamar2': {'light': True, 'occupied': False}}]
@@ -0,0 +1,65 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from notifications import NotificationCenter
+
+
+def test_active_anomaly_is_deduplicated_until_resolved():
+    notices = NotificationCenter(min_interval=30)
+    first = notices.post('light_on_empty:kamar1', {'message': 'lampu'}, sticky=True, now=0)
+    assert first['id'] == 1
+    assert notices.post('light_on_empty:kamar1', {'message': 'lampu'}, sticky=True, now=100) is None
+    assert notices.status()['deduplicated'] == 1
+
+    assert notices.resolve('light_on_empty:kamar1')
+    assert not notices.resolve('light_on_empty:kamar1')
+    assert notices.visible() == []
+    # Lewat min_interval: kemunculan berikutnya notifikasi baru
+    again = notices.post('light_on_empty:kamar1', {'message': 'lampu'}, sticky=True, now=200)
+    assert again['id'] == 2
+
+
+def test_flapping_anomaly_keeps_its_id_and_counts():
+    notices = NotificationCenter(min_interval=30)
+    notices.post('k', {'message': 'lampu'}, sticky=True, now=0)
+    for t in (10, 20, 45, 70):
+        notices.resolve('k')
+        again = notices.post('k', {'message': 'lampu'}, sticky=True, now=t)
+        assert again['id'] == 1
+    # Jendela bergeser: setiap kedipan memperpanjang rate limit
+    assert notices.visible() == [again] and again['count'] == 5
+    assert notices.status()['rate_limited'] == 4 and notices.last_id == 1
+
+
+def test_rate_limited_repeat_is_returned_only_while_visible():
+    notices = NotificationCenter(min_interval=30)
+    first = notices.post('pesan', {'message': 'pesan'}, now=0)
+    repeat = notices.post('pesan', {'message': 'pesan'}, now=5)
+    assert repeat is first and first['count'] == 2
+    assert notices.since(0) == [first]
+
+    notices.clear()
+    assert notices.post('pesan', {'message': 'pesan'}, now=10) is None
+    assert notices.post('pesan', {'message': 'pesan'}, now=100)['id'] == 2
+
+
+def test_recent_list_is_capped_and_since_pages_by_id():
+    notices = NotificationCenter(capacity=3, min_interval=0)
+    for i in range(5):
+        notices.post(i, {'message': str(i)}, now=i)
+    assert [n['id'] for n in notices.visible()] == [3, 4, 5]
+    assert [n['id'] for n in notices.since(2, limit=2)] == [3, 4]
+
+
+def test_dump_load_continues_ids_and_rate_limits():
+    notices = NotificationCenter(min_interval=30)
+    notices.post('a', {'message': 'a'}, sticky=True, now=0)
+    notices.post('b', {'message': 'b'}, now=1)
+
+    other = NotificationCenter(min_interval=30)
+    other.load(notices.dump())
+    assert other.visible() == notices.visible()
+    assert other.post('b', {'message': 'b'}, now=2)['count'] == 2
+    assert other.post('c', {'message': 'c'}, now=3)['id'] == 3
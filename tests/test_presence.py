@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from presence import PresenceIndex
+
+# Senin 2023-11-13 00:00 UTC
+MONDAY = 1699833600
+HOUR = 3600
+
+
+def index_with_visits(visits, now):
+    index = PresenceIndex(['kamar1', 'dapur'], clock=lambda: now)
+    for room, start, end in visits:
+        index.record(room, 1, now=start)
+        index.record(room, 0, now=end)
+    return index
+
+
+def test_dwell_totals_and_partial_hours():
+    index = index_with_visits([('kamar1', MONDAY + 1800, MONDAY + 2 * HOUR + 900)], MONDAY + 10 * HOUR)
+    result = index.dwell(MONDAY, MONDAY + 4 * HOUR)
+    assert result['kamar1'] == {'seconds': 6300.0, 'ratio': round(6300 / (4 * HOUR), 4)}
+    assert result['dapur'] == {'seconds': 0.0, 'ratio': 0.0}
+    # Potongan jam di tepi rentang dihitung tepat dari interval
+    assert index.dwell(MONDAY + 2400, MONDAY + 2 * HOUR)['kamar1']['seconds'] == 2 * HOUR - 2400
+
+
+def test_dwell_series_per_hour_and_open_interval():
+    now = MONDAY + 3 * HOUR
+    index = index_with_visits([('kamar1', MONDAY + 1800, MONDAY + HOUR + 1800)], now)
+    index.record('dapur', 1, now=MONDAY + 2 * HOUR)   # masih terisi sampai sekarang
+    result = index.dwell(MONDAY, now, step_hours=1)
+    assert result['kamar1']['series'] == [[MONDAY, 1800.0], [MONDAY + HOUR, 1800.0], [MONDAY + 2 * HOUR, 0.0]]
+    assert result['dapur']['seconds'] == HOUR
+    assert index.last_seen()['dapur'] == {'occupied': True, 'since': MONDAY + 2 * HOUR, 'last_seen': now}
+
+
+def test_repeated_and_stale_events_are_ignored():
+    index = index_with_visits([('kamar1', MONDAY, MONDAY + HOUR)], MONDAY + 2 * HOUR)
+    index.record('kamar1', 0, now=MONDAY + 1.5 * HOUR)
+    # Replay record yang sudah tercakup riwayat tidak menambah interval kedua
+    index.record('kamar1', 1, now=MONDAY)
+    index.record('kamar1', 0, now=MONDAY + HOUR)
+    assert index.intervals('kamar1', 0, MONDAY + 2 * HOUR) == [[MONDAY, MONDAY + HOUR]]
+
+
+def test_heatmap_counts_every_hour_in_the_window():
+    # Kamar1 terisi penuh Senin 08:00-09:00 dua minggu berturut-turut, dari rentang 3 minggu
+    visits = [('kamar1', MONDAY + week * 7 * 86400 + 8 * HOUR, MONDAY + week * 7 * 86400 + 9 * HOUR)
+              for week in (0, 1)]
+    now = MONDAY + 21 * 86400
+    rooms, total = index_with_visits(visits, now).heatmap(MONDAY, now)
+    assert rooms['kamar1'][0][8] == round(2 / 3, 4)
+    assert rooms['kamar1'][0][9] == 0.0 and rooms['kamar1'][1][8] == 0.0
+    assert rooms['dapur'][0][8] == 0.0
+    # Rata-rata dua ruangan
+    assert total[0][8] == round(2 / 6, 4)
+    # offset jam lokal (WIB = UTC+7) menggeser sel
+    rooms, _ = index_with_visits(visits, now).heatmap(MONDAY, now, offset_hours=7)
+    assert rooms['kamar1'][0][15] == round(2 / 3, 4)
+
+
+def test_queries_are_clamped_to_retention():
+    now = MONDAY + 10 * 86400
+    index = PresenceIndex(['kamar1'], max_hours=48, clock=lambda: now)
+    assert index.horizon() == now - 48 * HOUR
+    result = index.dwell(0, now, step_hours=24)
+    assert len(result['kamar1']['series']) <= 3
+    assert index.dwell(now - HOUR, now - 2 * HOUR)['kamar1'] == {'seconds': 0.0, 'ratio': 0.0}
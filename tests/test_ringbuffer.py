@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ringbuffer import RingBuffer
+
+
+def filled(capacity, n, first_seq=1):
+    buffer = RingBuffer(capacity, first_seq)
+    for i in range(n):
+        buffer.append({'i': i})
+    return buffer
+
+
+def test_since_returns_items_after_cursor_in_order():
+    buffer = filled(10, 5)
+    assert [item['i'] for item in buffer.since(0)] == [0, 1, 2, 3, 4]
+    assert [item['i'] for item in buffer.since(3)] == [3, 4]
+    assert buffer.since(5) == []
+    assert buffer.last_seq == 5
+
+
+def test_limit_pages_forward_from_cursor():
+    buffer = filled(100, 25)
+    seen, cursor = [], 0
+    while True:
+        page = buffer.since(cursor, limit=10)
+        if not page:
+            break
+        seen += [item['i'] for item in page]
+        cursor += len(page)
+    assert seen == list(range(25))
+
+
+def test_overwritten_items_are_skipped():
+    buffer = filled(4, 10)
+    assert len(buffer) == 4
+    # seq 1..6 sudah tertimpa: klien yang tertinggal mulai dari item tertua yang tersisa
+    assert [item['i'] for item in buffer.since(2)] == [6, 7, 8, 9]
+    assert [item['i'] for item in buffer.latest(2)] == [8, 9]
+
+
+def test_replay_with_explicit_seq_jumps_forward():
+    buffer = RingBuffer(10)
+    assert buffer.append('a', seq=40) == 40
+    # seq lebih kecil dari berikutnya diabaikan: item mendapat seq berikutnya
+    assert buffer.append('b', seq=3) == 41
+    assert buffer.since(0) == ['a', 'b']
+    assert len(buffer) == 2
+    assert RingBuffer(10, first_seq=100).append('x') == 100
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+from datetime import datetime, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scheduler import Scheduler, seconds_until
+
+
+def run_until(scheduler, done, timeout=2.0):
+    scheduler.start()
+    try:
+        assert done.wait(timeout)
+    finally:
+        scheduler.stop()
+
+
+def test_timers_fire_in_deadline_order():
+    scheduler, fired, done = Scheduler(), [], threading.Event()
+    scheduler.call_later('c', 0.15, fired.append, 'c')
+    scheduler.call_later('a', 0.05, fired.append, 'a')
+    scheduler.call_later('b', 0.10, fired.append, 'b')
+    scheduler.call_later('selesai', 0.20, done.set)
+    run_until(scheduler, done)
+    assert fired == ['a', 'b', 'c']
+    assert scheduler.status() == {'scheduled': 4, 'fired': 4, 'cancelled': 0, 'failed': 0, 'pending': 0}
+
+
+def test_cancel_and_reschedule_same_key():
+    scheduler, fired, done = Scheduler(), [], threading.Event()
+    scheduler.call_later('lampu:kamar1', 0.05, fired.append, 'lama')
+    scheduler.call_later('lampu:kamar1', 0.10, fired.append, 'baru')   # menggantikan timer lama
+    scheduler.call_later('pompa', 0.05, fired.append, 'pompa')
+    assert scheduler.cancel('pompa')
+    assert not scheduler.cancel('pompa')
+    assert 'lampu:kamar1' in scheduler and len(scheduler) == 1
+    scheduler.call_later('selesai', 0.15, done.set)
+    run_until(scheduler, done)
+    assert fired == ['baru']
+    assert scheduler.stats['cancelled'] == 2
+
+
+def test_failing_timer_does_not_stop_the_thread():
+    scheduler, done = Scheduler(), threading.Event()
+    scheduler.call_later('gagal', 0.01, lambda: 1 / 0)
+    scheduler.call_later('selesai', 0.05, done.set)
+    run_until(scheduler, done)
+    assert scheduler.stats['failed'] == 1 and scheduler.stats['fired'] == 1
+
+
+def test_seconds_until_next_wall_clock_time():
+    now = datetime(2024, 5, 1, 21, 0, 0)
+    assert seconds_until(time(22, 0), now) == 3600
+    # Jam yang baru saja lewat (atau kurang dari 1 detik lagi) dijadwalkan besok
+    assert seconds_until(time(21, 0), now) == 24 * 3600
+    assert seconds_until(time(20, 0), now) == 23 * 3600
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from timeseries import EnergySeries, parse_time
+
+DAY0 = 1700006400   # tengah malam UTC
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def day_of_usage():
+    """100 W sepanjang hari, 2 kW selama 30 menit mulai 08:00, lalu query di 24:00"""
+    clock = FakeClock(DAY0)
+    series = EnergySeries(clock=clock)
+    series.record(100, now=DAY0)
+    series.record(2000, now=DAY0 + 8 * 3600)
+    series.record(100, now=DAY0 + 8 * 3600 + 1800)
+    clock.now = DAY0 + 86400
+    return series
+
+
+def test_tiers_roll_up_to_the_same_energy():
+    series = day_of_usage()
+    expected_kwh = (100 * 86400 + 1900 * 1800) / 3.6e6
+    for resolution, points in (('minute', 1440), ('hour', 24), ('day', 1)):
+        result = series.query(DAY0, DAY0 + 86400 - 1, resolution)
+        assert len(result['points']) == points
+        assert result['kwh'] == pytest.approx(expected_kwh)
+        assert result['peak_w'] == 2000
+
+
+def test_hour_bucket_average_and_peak():
+    points = {p['t']: p for p in day_of_usage().query(DAY0, DAY0 + 86400 - 1, 'hour')['points']}
+    assert points[DAY0 + 8 * 3600]['avg_w'] == pytest.approx((2000 * 1800 + 100 * 1800) / 3600)
+    assert points[DAY0 + 8 * 3600]['peak_w'] == 2000
+    assert points[DAY0 + 9 * 3600] == {'t': DAY0 + 9 * 3600, 'avg_w': 100.0, 'peak_w': 100.0, 'kwh': 0.1}
+
+
+def test_pick_resolution_follows_range_and_retention():
+    series = day_of_usage()
+    now = DAY0 + 86400
+    assert series.pick_resolution(now - 3600, now) == 'minute'
+    assert series.pick_resolution(now - 7 * 86400, now) == 'hour'
+    assert series.pick_resolution(now - 365 * 86400, now) == 'day'
+
+
+def test_parse_time_accepts_epoch_and_iso_only():
+    assert parse_time(None, 5.0) == 5.0
+    assert parse_time('1700000000.5', 0) == 1700000000.5
+    assert parse_time('2024-01-31T08:00:00+00:00', 0) == 1706688000
+    for value in ('nan', 'inf', '-inf', 'kemarin'):
+        with pytest.raises(ValueError):
+            parse_time(value, 0)
@@ -0,0 +1,157 @@
+import math
+import threading
+import time
+from array import array
+from datetime import datetime
+
+
+class Tier:
+    """Bucket interval tetap dalam array melingkar: energi (W·detik) dan puncak daya per bucket"""
+
+    def __init__(self, interval, slots):
+        self.interval = interval
+        self.slots = slots
+        self.starts = array('q', [-1]) * slots   # awal bucket (epoch detik), -1 = kosong
+        self.energy = array('d', [0.0]) * slots
+        self.peak = array('d', [0.0]) * slots
+
+    def slot(self, start):
+        """Index slot untuk bucket yang dimulai di start; slot basi direset dulu"""
+        i = (start // self.interval) % self.slots
+        if self.starts[i] != start:
+            self.starts[i] = start
+            self.energy[i] = 0.0
+            self.peak[i] = 0.0
+        return i
+
+    def add(self, t0, t1, power):
+        """Integrasikan daya konstan power pada [t0, t1) ke bucket-bucket yang dilewati"""
+        interval = self.interval
+        # Bucket yang sudah keluar retensi tidak perlu diisi
+        t0 = max(t0, t1 - interval * self.slots)
+        start = int(t0 // interval) * interval
+        while start < t1:
+            end = start + interval
+            i = self.slot(start)
+            self.energy[i] += power * (min(end, t1) - max(start, t0))
+            if power > self.peak[i]:
+                self.peak[i] = power
+            start = end
+
+    def mark_peak(self, t, power):
+        i = self.slot(int(t // self.interval) * self.interval)
+        if power > self.peak[i]:
+            self.peak[i] = power
+
+    def oldest(self, now):
+        return (int(now // self.interval) - self.slots + 1) * self.interval
+
+    def buckets(self, t_from, t_to):
+        """(start, energi, puncak) untuk bucket yang beririsan dengan [t_from, t_to]"""
+        interval = self.interval
+        start = max(int(t_from // interval) * interval, self.oldest(t_to))
+        result = []
+        while start <= t_to:
+            i = (start // interval) % self.slots
+            if self.starts[i] == start:
+                result.append((start, self.energy[i], self.peak[i]))
+            start += interval
+        return result
+
+
+class EnergySeries:
+    """Riwayat daya listrik berbobot waktu dengan tier menit, jam dan hari
+
+    Dicatat hanya saat daya berubah (record); hasil query tidak bergantung pada
+    seberapa sering klien polling.
+    """
+
+    RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+    def __init__(self, minutes=2 * 1440, hours=90 * 24, days=5 * 365, clock=time.time):
+        self.tiers = {
+            'minute': Tier(60, minutes),
+            'hour': Tier(3600, hours),
+            'day': Tier(86400, days),
+        }
+        self.clock = clock
+        self.power = 0.0
+        self.since = None
+        self.started = None
+        self.lock = threading.Lock()
+
+    def record(self, power, now=None):
+        """Daya berubah menjadi power (W) pada waktu now"""
+        now = self.clock() if now is None else now
+        with self.lock:
+            if self.started is None:
+                self.started = now
+            self.advance(now)
+            self.power = float(power)
+            for tier in self.tiers.values():
+                tier.mark_peak(now, self.power)
+
+    def advance(self, now):
+        """Integrasikan daya saat ini sampai now (daya konstan sejak perubahan terakhir)"""
+        if self.since is not None and now > self.since:
+            for tier in self.tiers.values():
+                tier.add(self.since, now, self.power)
+        self.since = now
+
+    def pick_resolution(self, t_from, t_to, max_points=1500):
+        """Tier paling halus yang retensinya mencakup t_from dan jumlah titiknya wajar"""
+        for name, tier in self.tiers.items():
+            if tier.oldest(t_to) <= t_from and (t_to - t_from) / tier.interval <= max_points:
+                return name
+        return 'day'
+
+    def query(self, t_from, t_to, resolution=None):
+        """Rata-rata berbobot waktu, puncak dan kWh per bucket beserta totalnya"""
+        now = self.clock()
+        t_to = min(t_to, now)
+        with self.lock:
+            started = now if self.started is None else self.started
+            self.advance(now)
+            resolution = resolution or self.pick_resolution(t_from, t_to)
+            tier = self.tiers[resolution]
+            buckets = tier.buckets(t_from, t_to)
+
+        points = []
+        total_energy = 0.0
+        covered = 0.0
+        peak = 0.0
+        for start, energy, bucket_peak in buckets:
+            # Bucket pertama/yang sedang berjalan hanya terisi sebagian
+            duration = min(start + tier.interval, now) - max(start, started)
+            points.append({
+                't': start,
+                'avg_w': round(energy / duration, 2) if duration > 0 else 0.0,
+                'peak_w': bucket_peak,
+                'kwh': round(energy / 3.6e6, 6),
+            })
+            total_energy += energy
+            covered += duration
+            peak = max(peak, bucket_peak)
+        return {
+            'resolution': resolution,
+            'from': t_from,
+            'to': t_to,
+            'avg_w': round(total_energy / covered, 2) if covered > 0 else 0.0,
+            'peak_w': peak,
+            'kwh': round(total_energy / 3.6e6, 6),
+            'points': points,
+        }
+
+
+def parse_time(value, default):
+    """Epoch detik atau tanggal ISO (2024-01-31T08:00:00); ValueError kalau tidak valid
+    atau bukan bilangan berhingga (nan/inf)"""
+    if not value:
+        return default
+    try:
+        t = float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+    if not math.isfinite(t):
+        raise ValueError(f'waktu tidak berhingga: {value}')
+    return t
@@ -0,0 +1,46 @@
+class TopicRouter:
+    """Tabel routing topik MQTT -> handler, dibangun sekali saat connect"""
+
+    def __init__(self):
+        self.routes = {}
+        self.misses = 0  # pesan dari wildcard yang tidak punya handler (dibuang lokal)
+
+    def add(self, topic, handler, *args):
+        """Daftarkan handler (beserta argumen slot state) untuk satu topik"""
+        self.routes[topic] = (handler, args)
+
+    def wildcards(self):
+        """Filter subscribe minimal per prefix rumah (topik berbentuk <prefix>/<a>/<b>)
+
+        mis. smarthome/deteksi/kamar1 dan smarthome/kamar1/lampu -> smarthome/+/+. Prefix yang
+        membawahi rumah lain (smarthome vs smarthome/<house_id>) dipecah per induk topik
+        (smarthome/deteksi/+, smarthome/kamar1/+, ...) supaya lock/perintah rumah lain dan
+        perintah yang dipublish app sendiri tidak ikut diterima.
+        """
+        prefixes = {topic.rsplit('/', 2)[0] for topic in self.routes}
+        filters = []
+        for topic in self.routes:
+            prefix = topic.rsplit('/', 2)[0]
+            if any(other.startswith(prefix + '/') for other in prefixes):
+                topic_filter = topic.rsplit('/', 1)[0] + '/+'
+            else:
+                topic_filter = prefix + '/+/+'
+            if topic_filter not in filters:
+                filters.append(topic_filter)
+        return filters
+
+    def dispatch(self, topic, client, payload):
+        """Satu kali lookup dict, lalu panggil handler. False jika topik tidak dikenal"""
+        route = self.routes.get(topic)
+        if route is None:
+            self.misses += 1
+            return False
+        handler, args = route
+        handler(client, payload, *args)
+        return True
+
+    def __len__(self):
+        return len(self.routes)
+
+    def __contains__(self, topic):
+        return topic in self.routes